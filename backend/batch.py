@@ -0,0 +1,209 @@
+# Headless bulk scanning, for when the career office forwards a few thousand
+# postings at once and clicking through the web app isn't an option.
+#
+#   python -m backend.batch offers/ -o results.jsonl
+#   python -m backend.batch postings.jsonl --workers 16
+#   python -m backend.batch offers/ --llm          # also ask Gemini for a verdict
+#
+# Input is either a folder of .pdf/.txt files, or a JSONL file where each line
+# looks like {"id": "...", "file": "...", "text": "...", "url": "...",
+# "company": "...", "email": "...", "message": "..."} (all keys optional).
+# Results are streamed out as JSONL, one line per item, as soon as each is done.
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from backend import metrics
+from backend.config import (
+    BATCH_WORKERS, WHOIS_RATE, WHOIS_CONCURRENCY, INPUT_MAX_CHARS,
+)
+from backend.engine import Engine, ScanInput, get_engine
+from backend.llm import get_gateway
+from backend.ratelimit import ServiceLimiter, shared_bucket
+
+SUPPORTED_FILES = (".pdf", ".txt")
+
+
+def load_items(path):
+    # Yields work items from a folder of files or a JSONL file. A line that
+    # isn't a JSON object becomes an item with a load_error, reported like a failed scan.
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.lower().endswith(SUPPORTED_FILES):
+                yield {"id": name, "file": os.path.join(path, name)}
+        return
+
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                yield {"id": str(line_no), "load_error": f"line {line_no}: {type(e).__name__}: {e}"}
+                continue
+            if not isinstance(item, dict):
+                error = f"line {line_no}: expected a JSON object, got {type(item).__name__}"
+                yield {"id": str(line_no), "load_error": error}
+                continue
+            item.setdefault("id", str(line_no))
+            if item.get("file") and not os.path.isabs(item["file"]):
+                item["file"] = os.path.join(base, item["file"])
+            yield item
+
+
+def read_item_file(path, engine=None):
+    with open(path, "rb") as f:
+        text, _ = (engine or get_engine()).read_document(f, path)
+    return text
+
+
+def build_input_text(item, file_text=""):
+    # Same shape of input the web app sends to the scanner
+    parts = []
+    if file_text:
+        parts.append(file_text)
+    if item.get("text"):
+        parts.append(item["text"][:INPUT_MAX_CHARS])
+    if item.get("url"):
+        parts.append(f"URL to Analyze: {item['url']}")
+    if item.get("company"):
+        parts.append(f"Company: {item['company']}")
+    if item.get("email"):
+        parts.append(f"Email: {item['email']}")
+    if item.get("message"):
+        parts.append(f"Message: {item['message']}")
+    return "\n".join(parts)
+
+
+def report_record(report, scan_input):
+    # Flattens an engine Report into one JSON-friendly output line
+    evidence = report.evidence
+    record = {}
+    if evidence.domain is not None:
+        record["domain"] = evidence.domain
+    if evidence.reputation is not None:
+        record["reputation"] = evidence.reputation
+    if evidence.link_ages:
+        record["links"] = {domain: result[1] if result else None for domain, result in evidence.link_ages.items()}
+    if evidence.keyword_scan is not None:
+        record["keywords"] = dict(evidence.keyword_scan.counts)
+        record["keyword_score"] = evidence.keyword_scan.score
+    screen = report.prescreen
+    record["prescreen"] = {"verdict": screen.verdict, "confidence": screen.confidence, "points": screen.points}
+    record["input_chars"] = len(scan_input.text)
+    record["forensic_context"] = evidence.context
+    if report.decided:
+        record.update({"verdict": report.verdict, "report": report.body, "decided_by": report.decided_by})
+    if report.llm_attempts is not None:
+        record.update({"llm_attempts": report.llm_attempts, "usage": report.usage})
+    return record
+
+
+class BatchScanner:
+    """Runs items through the forensic checks on a bounded pool.
+
+    WHOIS calls go through their own limiter, so no matter how many workers
+    (or batch processes, or replicas with CACHE_BACKEND=redis) there are we
+    stay under the WHOIS servers' limits. Searches are already limited the
+    same way by the reputation service.
+    """
+
+    def __init__(self, workers=BATCH_WORKERS, whois_limiter=None, search_limiter=None, gateway=None):
+        self.workers = workers
+        self.gateway = gateway
+        self.whois_limiter = whois_limiter or ServiceLimiter(
+            "whois", WHOIS_RATE, burst=WHOIS_CONCURRENCY, concurrency=WHOIS_CONCURRENCY,
+            bucket=shared_bucket("whois", WHOIS_RATE, burst=WHOIS_CONCURRENCY),
+        )
+        self.search_limiter = search_limiter
+        self.engine = Engine(self.whois_limiter, self.search_limiter)
+
+    def scan_item(self, item):
+        started = time.perf_counter()
+        result = {"id": item.get("id")}
+        if item.get("load_error"):
+            result["error"] = item["load_error"]
+            result["elapsed_ms"] = 0.0
+            return result
+        try:
+            file_text = read_item_file(item["file"], self.engine) if item.get("file") else ""
+            scan_input = ScanInput(
+                text=build_input_text(item, file_text),
+                url=item.get("url") or "",
+                company=item.get("company") or "",
+                email=item.get("email") or "",
+            )
+            result.update(report_record(self.engine.analyze(scan_input, self.gateway), scan_input))
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    def run(self, items):
+        # Yields results as they finish. Only a few batches of items are in
+        # flight at any time, so huge inputs don't get loaded all at once.
+        max_in_flight = self.workers * 4
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as pool:
+            in_flight = set()
+            for item in items:
+                in_flight.add(pool.submit(self.scan_item, item))
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in in_flight:
+                yield future.result()
+
+
+def scan_batch(items, workers=BATCH_WORKERS, gateway=None):
+    # Library entry point: iterable of item dicts in, iterator of result dicts out
+    return BatchScanner(workers, gateway=gateway).run(items)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan a folder or JSONL file of offers in bulk.")
+    parser.add_argument("input", help="folder of .pdf/.txt files, or a .jsonl file")
+    parser.add_argument("-o", "--output", help="where to write JSONL results (default: stdout)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--llm", action="store_true", help="also get a Gemini verdict (needs GOOGLE_API_KEY)")
+    parser.add_argument("--metrics", help="write a JSON snapshot of stage timings/counters here when done")
+    parser.add_argument("--metrics-port", type=int, help="serve /metrics while running")
+    args = parser.parse_args(argv)
+
+    gateway = None
+    if args.llm:
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            parser.error("--llm needs GOOGLE_API_KEY to be set")
+        gateway = get_gateway(api_key)
+
+    if args.metrics_port:
+        metrics.start_metrics_server(args.metrics_port)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    count = errors = 0
+    started = time.perf_counter()
+    try:
+        for result in scan_batch(load_items(args.input), workers=args.workers, gateway=gateway):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            count += 1
+            errors += "error" in result
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Scanned {count} items ({errors} errors) in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            json.dump(metrics.snapshot(), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
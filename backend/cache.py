@@ -0,0 +1,326 @@
+# Two-level cache for slow lookups (WHOIS and friends).
+# A small LRU in memory sits in front of a shared store, so results survive
+# Streamlit reruns, restarts, and are shared between sessions. The store is
+# a sqlite file (every process on this host) or Redis (every replica), picked
+# with CACHE_BACKEND. Either way keys are "<cache name>:<key>" and values are
+# the same canonical JSON, so any worker can read what another one wrote.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from backend.config import CACHE_DIR, CACHE_BACKEND, CACHE_KEY_PREFIX
+from backend.resp import RedisError, get_redis_client
+
+# Returned by get() when there's nothing usable in the cache
+MISS = object()
+
+# Every TTLCache in the process, so metrics can report hit rates
+_all_caches = weakref.WeakSet()
+
+# What a store can throw when the disk or the network lets us down. The cache
+# carries on memory-only for that call.
+STORE_ERRORS = (sqlite3.Error, OSError, RedisError)
+
+
+def dump_value(value):
+    # Canonical JSON, so the same value is stored byte for byte the same by every worker
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def all_cache_stats():
+    return sorted((cache.stats() for cache in list(_all_caches)), key=lambda stats: stats["name"])
+
+
+def clear_all_caches():
+    # Empties the memory side of every cache (benchmarks use this between runs)
+    for cache in list(_all_caches):
+        cache.clear()
+
+
+def enable_wal(conn):
+    # Readers don't block the writer (and the other way round), which matters
+    # once several workers share the file. Some filesystems (NFS) can't do WAL;
+    # the default journal still works there, just with more waiting.
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    except sqlite3.Error:
+        pass
+
+
+class SQLiteStore:
+    # Dead simple key/value table with an expiry column
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        enable_wal(self._conn)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        # Gives back (value, expires_at) or None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at <= time.time():
+            self.delete(key)
+            return None
+        return json.loads(value), expires_at
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, dump_value(value), expires_at),
+            )
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge_expired(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+
+    def trim(self, prefix, max_rows):
+        # Keeps at most max_rows keys starting with prefix, dropping the ones expiring soonest
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache WHERE key >= ? AND key < ? ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (prefix, prefix + "\uffff", max_rows),
+            )
+            self._conn.commit()
+
+
+class RedisStore:
+    """Same interface as SQLiteStore, kept in Redis so every replica shares it.
+
+    Values are stored as [expires_at, value] with a matching PX expiry, so
+    Redis drops them on its own and trim()/purge_expired() have nothing to do.
+    """
+
+    def __init__(self, client=None, prefix=CACHE_KEY_PREFIX):
+        self.client = client or get_redis_client()
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.execute("GET", self.prefix + key)
+        if raw is None:
+            return None
+        expires_at, value = json.loads(raw)
+        if expires_at <= time.time():
+            return None
+        return value, expires_at
+
+    def set(self, key, value, expires_at):
+        ttl_ms = int((expires_at - time.time()) * 1000)
+        if ttl_ms > 0:
+            self.client.execute("SET", self.prefix + key, dump_value([expires_at, value]), "PX", ttl_ms)
+
+    def delete(self, key):
+        self.client.execute("DEL", self.prefix + key)
+
+    def purge_expired(self):
+        pass
+
+    def trim(self, prefix, max_rows):
+        # Everything has a TTL; past that, the server's maxmemory policy is in charge
+        pass
+
+
+def open_store(backend=CACHE_BACKEND):
+    # The store for CACHE_BACKEND, or None for memory-only. If Redis can't be
+    # reached we fall back to the local sqlite file rather than to nothing.
+    if backend == "memory":
+        return None
+    if backend == "redis":
+        try:
+            store = RedisStore()
+            store.client.ping()
+            return store
+        except STORE_ERRORS:
+            pass
+    store = SQLiteStore(os.path.join(CACHE_DIR, "cache.sqlite3"))
+    store.purge_expired()
+    return store
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store():
+    # One store per process, opened the first time someone needs it.
+    # If the disk isn't writable (read-only container etc.) we just run memory-only.
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            try:
+                _default_store = open_store() or False
+            except STORE_ERRORS:
+                _default_store = False
+    return _default_store or None
+
+
+class TTLCache:
+    """LRU in memory + optional persistent store, with separate TTLs for good and bad results.
+
+    max_bytes caps the memory side by (JSON) size as well as by count, and
+    max_disk_items keeps the persistent side from growing forever.
+    """
+
+    # How many writes between trims of the persistent store
+    TRIM_EVERY = 50
+
+    def __init__(self, name, ttl, negative_ttl=None, max_items=1024, store=MISS,
+                 max_bytes=None, max_disk_items=None):
+        self.name = name
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_disk_items = max_disk_items
+        self.store = get_default_store() if store is MISS else store
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        _all_caches.add(self)
+
+    def _store_key(self, key):
+        return f"{self.name}:{key}"
+
+    def _remember(self, key, value, expires_at):
+        size = len(json.dumps(value)) if self.max_bytes else 0
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            # Too big to keep in memory; the old value for this key is gone either way
+            if self.max_bytes and size > self.max_bytes:
+                return
+            self._items[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._items) > self.max_items or (self.max_bytes and self._bytes > self.max_bytes):
+                _, dropped = self._items.popitem(last=False)
+                self._bytes -= dropped[2]
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._items[key]
+                self._bytes -= entry[2]
+
+        if self.store is not None:
+            try:
+                found = self.store.get(self._store_key(key))
+            except STORE_ERRORS + (ValueError, TypeError):   # unreadable entry
+                found = None
+            if found is not None:
+                value, expires_at = found
+                self._remember(key, value, expires_at)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return MISS
+
+    def set(self, key, value, negative=False):
+        # Values need to be JSON friendly since they end up on disk
+        expires_at = time.time() + (self.negative_ttl if negative else self.ttl)
+        self._remember(key, value, expires_at)
+        if self.store is not None:
+            try:
+                self.store.set(self._store_key(key), value, expires_at)
+                self._writes += 1
+                if self.max_disk_items and self._writes % self.TRIM_EVERY == 0:
+                    self.store.trim(self._store_key(""), self.max_disk_items)
+            except STORE_ERRORS:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "size": len(self._items),
+                "bytes": self._bytes,
+                "store": type(self.store).__name__ if self.store is not None else "memory",
+            }
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one.
+
+    If ten sessions ask about "Acme Corp" at once, the first one does the
+    lookup and the other nine wait for its answer (or its exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return call.result()
+        try:
+            result = fn(*args, **kwargs)
+            call.set_result(result)
+            return result
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
@@ -1,6 +1,8 @@
 # Just keeping the colors and stuff here
 # Trying to keep it simple you know?
 
+import os
+
 PAGE_TITLE = "Internship Safe-Guard"
 PAGE_ICON = "🛡️"
 THEME_COLOR = "#86AAF9"
@@ -13,3 +15,202 @@ SCAM_KEYWORDS = [
     "training fee", "refundable deposit", "google chat interview", 
     "wire transfer", "cashier's check", "urgent response required"
 ]
+
+# How much each keyword counts towards the risk (anything missing counts as 1)
+SCAM_KEYWORD_WEIGHTS = {
+    "money order": 2, "check processing": 2, "training fee": 3,
+    "refundable deposit": 3, "wire transfer": 2, "cashier's check": 3,
+}
+
+# Obfuscated spellings scammers use to get around filters
+SCAM_KEYWORD_VARIANTS = {
+    "kindly": ["k1ndly", "kindIy"],
+    "wire transfer": ["w-i-r-e transfer", "wire-transfer", "wiretransfer"],
+    "cashier's check": ["cashiers check", "cashier check", "cashier's cheque"],
+    "whatsapp": ["whats app", "whatsap", "wh@tsapp"],
+    "telegram": ["telegr@m", "t.me/"],
+}
+
+# Optional extra phrase list (tab separated: phrase, weight, keyword).
+# See backend/matcher.py for the format.
+SCAM_KEYWORDS_FILE = os.getenv("SCAM_KEYWORDS_FILE")
+
+# Which matcher engine to use: "regex" (default), "aho" or "substring"
+KEYWORD_ENGINE = os.getenv("KEYWORD_ENGINE", "regex")
+
+# Fold homoglyphs, hidden characters, odd spacing and leetspeak before the
+# keyword scan (backend/normalize.py). Off = plain lowercase matching.
+KEYWORD_NORMALIZE = os.getenv("KEYWORD_NORMALIZE", "1") == "1"
+
+# Where we keep lookup caches between restarts (WHOIS etc.)
+CACHE_DIR = os.getenv("SAFEGUARD_CACHE_DIR", ".cache")
+
+# Where the caches and rate limiters are shared:
+#   "sqlite" (default) - files in CACHE_DIR, shared by every process on this host
+#   "redis"            - a Redis (or anything speaking its protocol) at REDIS_URL,
+#                        shared by every replica behind the load balancer
+#   "memory"           - nothing shared, each process on its own
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
+REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", 0.5))
+# Every key we write to Redis starts with this. Bump the version if the stored format changes.
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "safeguard:v1:")
+
+# How long a domain age lookup stays good. Failed lookups expire way sooner
+# so a flaky WHOIS server doesn't stick around for a week.
+DOMAIN_CACHE_TTL = int(os.getenv("DOMAIN_CACHE_TTL", 7 * 24 * 3600))
+DOMAIN_CACHE_NEGATIVE_TTL = int(os.getenv("DOMAIN_CACHE_NEGATIVE_TTL", 30 * 60))
+DOMAIN_CACHE_MAX_ITEMS = 2048
+
+# Domain ages come from our own client (backend/whois_client.py). Set
+# WHOIS_BACKEND=python-whois to go back to the python-whois package.
+WHOIS_BACKEND = os.getenv("WHOIS_BACKEND", "native")
+WHOIS_QUERY_TIMEOUT = float(os.getenv("WHOIS_QUERY_TIMEOUT", 5))
+RDAP_ENABLED = os.getenv("RDAP_ENABLED", "1") == "1"
+
+# Forensic checks run side by side; each one gets its own deadline (seconds)
+FORENSIC_WORKERS = int(os.getenv("FORENSIC_WORKERS", 8))
+FORENSIC_TIMEOUTS = {
+    "domain_age": float(os.getenv("WHOIS_TIMEOUT", 6)),
+    "reputation": float(os.getenv("REPUTATION_TIMEOUT", 8)),
+    "keywords": 2.0,
+    "email_dns": float(os.getenv("EMAIL_DNS_TIMEOUT", 3)),
+    "links": float(os.getenv("LINKS_TIMEOUT", 8)),
+}
+FORENSIC_DEFAULT_TIMEOUT = 10.0
+# A check that timed out or failed is tried again on reruns after this many seconds
+FORENSIC_RETRY_AFTER = float(os.getenv("FORENSIC_RETRY_AFTER", 5))
+
+# Links and domains found inside the offer text (backend/links.py) get a WHOIS
+# check too, LINK_FANOUT at a time per document, at most LINK_MAX_DOMAINS of them
+LINK_CHECKS = os.getenv("LINK_CHECKS", "1") == "1"
+LINK_FANOUT = int(os.getenv("LINK_FANOUT", 4))
+LINK_MAX_DOMAINS = int(os.getenv("LINK_MAX_DOMAINS", 12))
+LINK_WORKERS = int(os.getenv("LINK_WORKERS", 16))
+
+# Uploads (backend/uploads.py). Anything bigger than UPLOAD_MAX_BYTES is refused
+# (keep server.maxUploadSize in .streamlit/config.toml in line with it), anything
+# over UPLOAD_SPOOL_BYTES goes to a temp file in UPLOAD_TMP_DIR (empty = system
+# temp dir) instead of staying in memory.
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", 15 * 1024 * 1024))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", 1024 * 1024))
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+# Most text we take from one input (pasted, .txt or batch JSONL); the rest is dropped
+INPUT_MAX_CHARS = int(os.getenv("INPUT_MAX_CHARS", 100_000))
+# Keyword scans go through long texts this many characters at a time
+KEYWORD_CHUNK_CHARS = int(os.getenv("KEYWORD_CHUNK_CHARS", 64_000))
+# How much of the input a cached scan result keeps (for debugging, nothing reads it back)
+SCAN_RECORD_EXCERPT_CHARS = 2000
+
+# PDF guard rails. Some "offer letters" are 200 page scanned dumps.
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", 15 * 1024 * 1024))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 30))
+# Once we have this much text there's enough to judge the offer
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", 60_000))
+# Big PDFs get split across processes so one upload can't hog the GIL
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", 2))
+PDF_PARALLEL_MIN_PAGES = 8
+PDF_PAGES_PER_TASK = 4
+
+# Identical uploads (scam campaigns mail the same PDF to everyone) reuse old results
+SCAN_CACHE_TTL = int(os.getenv("SCAN_CACHE_TTL", 24 * 3600))
+SCAN_CACHE_MAX_ITEMS = 512
+SCAN_CACHE_MAX_BYTES = int(os.getenv("SCAN_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+SCAN_CACHE_MAX_DISK_ITEMS = 20_000
+
+# Company reputation searches. Results are kept for a few days, failures only
+# briefly. SEARCH_RATE below is shared by every process on the machine.
+# REPUTATION_BACKEND=stub swaps Google for canned results (offline/dev).
+REPUTATION_BACKEND = os.getenv("REPUTATION_BACKEND", "google")
+REPUTATION_CACHE_TTL = int(os.getenv("REPUTATION_CACHE_TTL", 3 * 24 * 3600))
+REPUTATION_CACHE_NEGATIVE_TTL = int(os.getenv("REPUTATION_CACHE_NEGATIVE_TTL", 10 * 60))
+REPUTATION_CACHE_MAX_ITEMS = 2048
+# How long a lookup waits for a search slot before giving up (seconds)
+REPUTATION_RATE_WAIT = float(os.getenv("REPUTATION_RATE_WAIT", 5))
+REPUTATION_RESULTS = 3
+
+# Batch mode (python -m backend.batch). Rates are requests per second.
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", 8))
+WHOIS_RATE = float(os.getenv("WHOIS_RATE", 2))
+WHOIS_CONCURRENCY = int(os.getenv("WHOIS_CONCURRENCY", 4))
+SEARCH_RATE = float(os.getenv("SEARCH_RATE", 0.5))
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", 1))
+
+# Gemini. GEMINI_BASE_URL lets you point at a local fake server (benchmarks/fake_gemini.py).
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", 250_000))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 60))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+LLM_BACKOFF_BASE = 1.0
+LLM_BACKOFF_CAP = 20.0
+# Rough guess of how long the report is, used to budget tokens before the call
+LLM_EXPECTED_OUTPUT_TOKENS = 600
+# Show the verdict as soon as Gemini writes it instead of waiting for the whole report
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") == "1"
+# Ask for the verdict as JSON (checked against a schema) instead of free-form markdown
+LLM_JSON_OUTPUT = os.getenv("LLM_JSON_OUTPUT", "1") == "1"
+# Most tokens of the offer text / forensic notes we send; longer input is deduped, then cut
+PROMPT_TEXT_TOKENS = int(os.getenv("PROMPT_TEXT_TOKENS", 3000))
+PROMPT_EVIDENCE_TOKENS = int(os.getenv("PROMPT_EVIDENCE_TOKENS", 800))
+
+# Background scan jobs (backend/jobs.py). The app hands the Gemini part of a
+# scan to JOB_WORKERS threads and polls for the result; finished jobs are kept
+# JOB_RESULT_TTL seconds so a rerun or a reopened tab can still show them.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", 30 * 60))
+JOB_MAX_KEPT = 500
+JOB_POLL_INTERVAL = 0.25
+# A scan nobody has looked at for this long (closed tab, changed inputs) is
+# stopped, Gemini call included
+JOB_ABANDON_AFTER = float(os.getenv("JOB_ABANDON_AFTER", 15))
+
+# Local pre-screen: clear-cut cases get a verdict without calling Gemini.
+# Risk points above SCAM_POINTS lean scam, below SAFE_POINTS lean safe;
+# we only skip the LLM when the confidence is at least MIN_CONFIDENCE and at
+# least MIN_FAMILIES kinds of evidence (domain, text, email, links) agree.
+PRESCREEN_ENABLED = os.getenv("PRESCREEN_ENABLED", "1") == "1"
+PRESCREEN_SCAM_POINTS = float(os.getenv("PRESCREEN_SCAM_POINTS", 5))
+PRESCREEN_SAFE_POINTS = float(os.getenv("PRESCREEN_SAFE_POINTS", -3))
+PRESCREEN_MIN_CONFIDENCE = float(os.getenv("PRESCREEN_MIN_CONFIDENCE", 0.85))
+PRESCREEN_MIN_FAMILIES = int(os.getenv("PRESCREEN_MIN_FAMILIES", 2))
+
+# Replay recordings (backend/replay.py). With REPLAY_RECORD set to a file
+# (.jsonl or .jsonl.gz) every scan is appended to it: input, check results,
+# Gemini's reply and the verdict. REPLAY_RECORD_SAMPLE keeps only that fraction.
+# benchmarks/bench_replay.py plays a recording back under other settings.
+REPLAY_RECORD = os.getenv("REPLAY_RECORD") or None
+REPLAY_RECORD_SAMPLE = float(os.getenv("REPLAY_RECORD_SAMPLE", 1.0))
+
+# Webmail providers real recruiters don't use
+FREE_MAIL_DOMAINS = {
+    "gmail.com", "googlemail.com", "yahoo.com", "ymail.com", "outlook.com", "hotmail.com",
+    "live.com", "msn.com", "aol.com", "icloud.com", "me.com", "protonmail.com", "proton.me",
+    "mail.com", "gmx.com", "gmx.net", "yandex.com", "yandex.ru", "zoho.com", "rediffmail.com",
+    "qq.com", "163.com", "tutanota.com",
+}
+
+# Recruiter email checks (backend/email_check.py). The free-mail / disposable
+# provider list is backend/data/mail_providers.txt plus FREE_MAIL_DOMAINS above.
+# With EMAIL_DNS_CHECKS on, company mail domains also get an MX/SPF/DMARC lookup
+# (backend/dns_client.py); DNS_SERVERS is a comma separated "host[:port]" list,
+# empty = whatever /etc/resolv.conf says.
+EMAIL_DNS_CHECKS = os.getenv("EMAIL_DNS_CHECKS", "1") == "1"
+DNS_SERVERS = [s.strip() for s in os.getenv("DNS_SERVERS", "").split(",") if s.strip()]
+DNS_TIMEOUT = float(os.getenv("DNS_TIMEOUT", 2))
+MAIL_DNS_CACHE_TTL = int(os.getenv("MAIL_DNS_CACHE_TTL", 24 * 3600))
+MAIL_DNS_CACHE_NEGATIVE_TTL = int(os.getenv("MAIL_DNS_CACHE_NEGATIVE_TTL", 10 * 60))
+MAIL_DNS_CACHE_MAX_ITEMS = 2048
+
+# Extra allow/block list entries on top of backend/data/domain_reputation.txt
+DOMAIN_REPUTATION_FILE = os.getenv("DOMAIN_REPUTATION_FILE")
+
+# Metrics (backend/metrics.py). METRICS_PORT serves /metrics and /metrics.json
+# on METRICS_HOST (all interfaces by default, so a scraper outside the
+# container can reach it; 127.0.0.1 keeps it local), DEBUG_PANEL=1 shows the
+# timings in the app's sidebar.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0)) or None
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+DEBUG_PANEL = os.getenv("DEBUG_PANEL", "0") == "1"
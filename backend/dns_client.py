@@ -0,0 +1,203 @@
+# Just enough DNS to check a recruiter's mail domain: MX and TXT lookups over
+# UDP (TCP when the answer is truncated), straight to a resolver, with one
+# overall deadline per lookup. No dnspython needed.
+#
+# Servers are "host" or "host:port", which is how the benchmarks point it at
+# benchmarks/fake_dns.py. By default we use DNS_SERVERS, or whatever
+# /etc/resolv.conf says.
+
+import random
+import socket
+import struct
+import threading
+import time
+
+from backend.config import DNS_SERVERS, DNS_TIMEOUT
+
+DNS_PORT = 53
+RESOLV_CONF = "/etc/resolv.conf"
+
+TYPE_MX = 15
+TYPE_TXT = 16
+TYPE_OPT = 41
+CLASS_IN = 1
+
+RCODE_OK = 0
+RCODE_NXDOMAIN = 3
+# Big enough for the TXT records of most domains, small enough to dodge fragmentation
+UDP_PAYLOAD = 1232
+
+
+class DnsError(Exception):
+    pass
+
+
+def split_server(server):
+    host, _, port = server.partition(":")
+    return host, int(port) if port else DNS_PORT
+
+
+def system_servers(path=RESOLV_CONF):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.split()[1] for line in f if line.startswith("nameserver") and len(line.split()) > 1]
+    except OSError:
+        return []
+
+
+def encode_name(name):
+    out = b""
+    for label in name.strip(".").split("."):
+        raw = label.encode("idna")
+        if not 0 < len(raw) < 64:
+            raise DnsError(f"bad name: {name!r}")
+        out += bytes([len(raw)]) + raw
+    return out + b"\0"
+
+
+def build_query(name, qtype, query_id):
+    # Header (recursion desired, one question, one OPT record for the bigger UDP size)
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 1)
+    question = encode_name(name) + struct.pack("!HH", qtype, CLASS_IN)
+    opt = b"\0" + struct.pack("!HHIH", TYPE_OPT, UDP_PAYLOAD, 0, 0)
+    return header + question + opt
+
+
+def read_name(data, offset):
+    # Returns (name, offset after it), following compression pointers
+    labels = []
+    end = None
+    for _ in range(128):
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            return ".".join(labels), end if end is not None else offset
+        labels.append(data[offset:offset + length].decode("ascii", "replace"))
+        offset += length
+    raise DnsError("name compression loop")
+
+
+def parse_response(data, query_id):
+    # Returns (rcode, truncated, [(type, value)]) for the answer section.
+    # MX values are (preference, host), TXT values one joined string.
+    try:
+        ident, flags, qdcount, ancount, _, _ = struct.unpack_from("!HHHHHH", data)
+        if ident != query_id:
+            raise DnsError("answer to a different query")
+        offset = 12
+        for _ in range(qdcount):
+            _, offset = read_name(data, offset)
+            offset += 4
+        answers = []
+        for _ in range(ancount):
+            _, offset = read_name(data, offset)
+            rtype, _, _, length = struct.unpack_from("!HHIH", data, offset)
+            offset += 10
+            rdata_end = offset + length
+            if rtype == TYPE_MX:
+                preference = struct.unpack_from("!H", data, offset)[0]
+                answers.append((rtype, (preference, read_name(data, offset + 2)[0].lower())))
+            elif rtype == TYPE_TXT:
+                parts, pos = [], offset
+                while pos < rdata_end:
+                    size = data[pos]
+                    parts.append(data[pos + 1:pos + 1 + size].decode("utf-8", "replace"))
+                    pos += 1 + size
+                answers.append((rtype, "".join(parts)))
+            offset = rdata_end
+    except (struct.error, IndexError) as e:
+        raise DnsError(f"malformed answer: {e}") from e
+    return flags & 0x000F, bool(flags & 0x0200), answers
+
+
+class DnsResolver:
+    """MX/TXT lookups against a list of resolvers, tried in order.
+
+    query() returns the records of that type ([] for NXDOMAIN or no data) and
+    raises DnsError if no server gave a usable answer before the deadline.
+    """
+
+    def __init__(self, servers=None, timeout=DNS_TIMEOUT):
+        self.servers = list(servers or DNS_SERVERS or system_servers() or ["127.0.0.1"])
+        self.timeout = timeout
+
+    def _remaining(self, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DnsError("timed out")
+        return remaining
+
+    def query(self, name, qtype):
+        deadline = time.monotonic() + self.timeout
+        errors = []
+        # Each server gets an equal share of what's left, so one dead server can't eat it all
+        for i, server in enumerate(self.servers):
+            share = (deadline - time.monotonic()) / (len(self.servers) - i)
+            try:
+                rcode, answers = self._ask(server, name, qtype, min(deadline, time.monotonic() + share))
+            except (OSError, DnsError) as e:
+                errors.append(f"{server}: {e}")
+                continue
+            if rcode == RCODE_NXDOMAIN:
+                return []
+            if rcode != RCODE_OK:
+                errors.append(f"{server}: rcode {rcode}")
+                continue
+            return [value for rtype, value in answers if rtype == qtype]
+        raise DnsError("; ".join(errors) or "no DNS servers")
+
+    def _ask(self, server, name, qtype, deadline):
+        host, port = split_server(server)
+        query_id = random.getrandbits(16)
+        packet = build_query(name, qtype, query_id)
+        family, _, _, _, address = socket.getaddrinfo(host, port, type=socket.SOCK_DGRAM)[0]
+        with socket.socket(family, socket.SOCK_DGRAM) as sock:
+            sock.connect(address)
+            sock.send(packet)
+            while True:
+                sock.settimeout(self._remaining(deadline))
+                data = sock.recv(65535)
+                try:
+                    rcode, truncated, answers = parse_response(data, query_id)
+                    break
+                except DnsError:
+                    continue    # stray or garbled packet, keep waiting for ours
+        if truncated:
+            rcode, _, answers = self._ask_tcp(host, port, packet, query_id, deadline)
+        return rcode, answers
+
+    def _ask_tcp(self, host, port, packet, query_id, deadline):
+        with socket.create_connection((host, port), timeout=self._remaining(deadline)) as sock:
+            sock.sendall(struct.pack("!H", len(packet)) + packet)
+            data = b""
+            while len(data) < 2 or len(data) < 2 + struct.unpack_from("!H", data)[0]:
+                sock.settimeout(self._remaining(deadline))
+                chunk = sock.recv(65535)
+                if not chunk:
+                    raise DnsError("connection closed")
+                data += chunk
+        return parse_response(data[2:], query_id)
+
+    def mx(self, domain):
+        # Mail servers, best first
+        return [host for _, host in sorted(self.query(domain, TYPE_MX))]
+
+    def txt(self, name):
+        return self.query(name, TYPE_TXT)
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_dns_resolver():
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = DnsResolver()
+    return _resolver
@@ -0,0 +1,64 @@
+# Helpers for turning whatever the user pasted into a clean domain name
+
+import ipaddress
+import re
+
+# Public suffixes where the registrable part is three labels deep,
+# e.g. example.co.uk or iitb.ac.in. Not the full public suffix list,
+# just the ones we actually see in student job posts.
+MULTI_PART_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "ltd.uk", "plc.uk", "me.uk",
+    "co.in", "ac.in", "org.in", "net.in", "gov.in", "edu.in", "res.in",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au",
+    "co.nz", "org.nz", "ac.nz",
+    "co.za", "org.za", "ac.za",
+    "com.br", "com.mx", "com.ar", "com.co",
+    "com.sg", "edu.sg", "com.my", "com.ph", "com.pk", "com.ng",
+    "co.jp", "ac.jp", "ne.jp", "or.jp",
+    "co.kr", "ac.kr",
+    "com.cn", "edu.cn", "com.hk", "com.tw",
+    "com.tr", "com.eg", "com.sa",
+    "co.id", "ac.id", "co.il", "ac.il", "co.ke",
+}
+
+_HOST_RE = re.compile(r'^(?:[a-z][a-z0-9+.\-]*://)?(?:[^@/?#]*@)?([^/:?#\s]+)', re.IGNORECASE)
+_LABEL_RE = re.compile(r'^[a-z0-9](?:[a-z0-9\-]*[a-z0-9])?$')
+
+
+def is_ip_address(host):
+    try:
+        ipaddress.ip_address(host or "")
+    except ValueError:
+        return False
+    return True
+
+
+def extract_domain(url):
+    # Pulls the host out of a URL ("https://www.foo.com/jobs" -> "foo.com").
+    # An IP address comes back as it is.
+    if not url:
+        return None
+    match = _HOST_RE.match(url.strip())
+    if not match:
+        return None
+    host = match.group(1).lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    labels = host.split(".")
+    if len(labels) < 2 or not all(_LABEL_RE.match(label) for label in labels):
+        return None
+    return host
+
+
+def registrable_domain(url):
+    # The part you actually buy from a registrar ("jobs.foo.co.uk" -> "foo.co.uk").
+    # This is what WHOIS knows about and what we key caches on.
+    host = extract_domain(url)
+    # An IP address has no registrable part, and "1.1" of 192.168.1.1 is no domain
+    if not host or is_ip_address(host):
+        return None
+    labels = host.split(".")
+    depth = 3 if ".".join(labels[-2:]) in MULTI_PART_SUFFIXES else 2
+    if len(labels) < depth:
+        return None
+    return ".".join(labels[-depth:])
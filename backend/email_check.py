@@ -0,0 +1,178 @@
+# Recruiter email forensics.
+#
+# Scammers write from Gmail, from a throwaway inbox, or from a domain that has
+# nothing to do with the company or the website they sent. Most of that shows
+# without touching the network:
+#   * parse the address ("Jane <jane@acme.com>", "mailto:jane@acme.com")
+#   * free-mail / disposable provider, from a local list (backend/data/mail_providers.txt)
+#   * does the domain match the company (its official domain if we know it)
+#     and the website's domain? Only the name itself counts as a match: a
+#     domain that merely contains it (acme-onboarding.top) is a lookalike
+# Company domains can also get a DNS check (check_mail_dns): no MX means the
+# domain can't even receive replies, and real employers publish SPF and DMARC.
+
+import os
+import re
+import threading
+from dataclasses import dataclass
+
+from backend import metrics
+from backend.cache import TTLCache, MISS
+from backend.config import (
+    FREE_MAIL_DOMAINS, MAIL_DNS_CACHE_TTL, MAIL_DNS_CACHE_NEGATIVE_TTL, MAIL_DNS_CACHE_MAX_ITEMS,
+)
+from backend.dns_client import DnsError, get_dns_resolver
+from backend.domains import extract_domain, registrable_domain
+from backend.reputation_index import lookup_company
+
+PROVIDER_LIST = os.path.join(os.path.dirname(__file__), "data", "mail_providers.txt")
+
+# Words in company names that don't help when matching against a domain
+COMPANY_FILLER = {
+    "inc", "llc", "ltd", "limited", "corp", "corporation", "co", "company", "plc", "gmbh",
+    "pvt", "private", "group", "the", "and", "global", "international", "solutions",
+    "services", "technologies", "technology", "tech",
+}
+
+_ADDRESS_RE = re.compile(r"([a-z0-9.!#$%&'*+/=?^_`{|}~-]{1,64})@([a-z0-9.-]+)", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class EmailAddress:
+    local: str
+    host: str           # everything after the @, lowercased
+    domain: str         # the registrable part of it
+
+
+@dataclass
+class EmailCheck:
+    address: EmailAddress
+    provider: str = None            # "free", "disposable" or None for a company domain
+    company_match: bool = None      # None when there was nothing to compare with
+    lookalike: bool = False         # has the company's name in it, but isn't its domain
+    official_domain: str = None     # the company's real domain, if it's on our list
+    website_domain: str = None
+    website_match: bool = None
+
+    @property
+    def domain(self):
+        return self.address.domain
+
+
+def parse_address(text):
+    # First address in whatever was pasted, or None
+    match = _ADDRESS_RE.search(text or "")
+    if not match:
+        return None
+    host = extract_domain(match.group(2).strip("."))
+    domain = registrable_domain(host) if host else None
+    if not domain:
+        return None
+    return EmailAddress(match.group(1).lower(), host, domain)
+
+
+def company_tokens(company_name):
+    words = re.findall(r"[a-z0-9]+", (company_name or "").lower())
+    return [w for w in words if len(w) >= 3 and w not in COMPANY_FILLER]
+
+
+class MailProviderIndex:
+    def __init__(self):
+        self.kinds = {}     # domain -> "free" / "disposable"
+
+    def load_file(self, path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] in ("free", "disposable"):
+                    self.kinds[parts[1].lower()] = parts[0]
+
+    def kind(self, address):
+        return self.kinds.get(address.host) or self.kinds.get(address.domain)
+
+    def __len__(self):
+        return len(self.kinds)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_provider_index():
+    # Loaded once per process on first use
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = MailProviderIndex()
+                index.kinds.update(dict.fromkeys(FREE_MAIL_DOMAINS, "free"))
+                index.load_file(PROVIDER_LIST)
+                _index = index
+    return _index
+
+
+def check_email(email, company_name="", url=""):
+    # Everything we can tell about the address locally. None if it isn't one.
+    address = parse_address(email)
+    if address is None:
+        return None
+    check = EmailCheck(address, provider=get_provider_index().kind(address))
+    if check.provider:
+        return check
+
+    listing = lookup_company(company_name) if company_name else None
+    tokens = company_tokens(company_name)
+    label = address.domain.split(".")[0]
+    if listing is not None:
+        check.official_domain = listing.domain
+        check.company_match = address.domain == listing.domain
+        tokens.append(listing.domain.split(".")[0])
+    elif tokens:
+        # acme.com or acme-corp.com for "Acme Corp", not acme-onboarding.top
+        full_name = "".join(re.findall(r"[a-z0-9]+", company_name.lower()))
+        check.company_match = label.replace("-", "") in (tokens[0], "".join(tokens), full_name)
+    check.lookalike = not check.company_match and any(token in label for token in tokens)
+
+    check.website_domain = registrable_domain(url) if url else None
+    if check.website_domain:
+        check.website_match = address.domain == check.website_domain
+    return check
+
+
+# MX/SPF/DMARC per domain. They rarely change; failed lookups are retried soon.
+mail_dns_cache = TTLCache(
+    "mail_dns",
+    ttl=MAIL_DNS_CACHE_TTL,
+    negative_ttl=MAIL_DNS_CACHE_NEGATIVE_TTL,
+    max_items=MAIL_DNS_CACHE_MAX_ITEMS,
+)
+
+
+def dmarc_policy(record):
+    # "v=DMARC1; p=reject; rua=..." -> "reject"
+    for part in record.split(";"):
+        key, _, value = part.strip().partition("=")
+        if key.strip().lower() == "p":
+            return value.strip().lower() or "none"
+    return "none"
+
+
+def _lookup_mail_dns(domain):
+    resolver = get_dns_resolver()
+    try:
+        with metrics.timed("dns", service="dns"):
+            mx = resolver.mx(domain)
+            spf = next((t for t in resolver.txt(domain) if t.lower().startswith("v=spf1")), None)
+            dmarc = next((t for t in resolver.txt(f"_dmarc.{domain}") if t.lower().startswith("v=dmarc1")), None)
+    except DnsError:
+        return None
+    return {"mx": mx[:3], "spf": spf, "dmarc": dmarc_policy(dmarc) if dmarc else None}
+
+
+def check_mail_dns(domain):
+    # {"mx": [hosts], "spf": record or None, "dmarc": policy or None}, or None if DNS didn't answer
+    record = mail_dns_cache.get(domain)
+    if record is MISS:
+        record = _lookup_mail_dns(domain)
+        mail_dns_cache.set(domain, record, negative=record is None)
+    return record
@@ -0,0 +1,346 @@
+# The scanner itself: one input in, one Report out.
+#
+#   from backend.engine import analyze, ScanInput
+#   report = analyze(ScanInput(text=offer_text, url="https://acme-careers.xyz"))
+#   print(report.verdict, report.decided_by)
+#
+# The web app, the batch runner and anything else go through here, so they all
+# share the same checks, caches and keyword matcher. Nothing in here knows
+# about streamlit.
+#
+# Order of business for each input:
+#   1. local allow/block list, then WHOIS / reputation search for the rest
+#   2. recruiter email (local checks, then MX/SPF/DMARC for company domains)
+#   3. links and domains inside the text (WHOIS for the unknown ones, side by side)
+#   4. keyword scan
+#   5. cached result for this exact input, if we've seen it
+#   6. local prescreen, if it's clear-cut
+#   7. Gemini (only when a gateway is passed in)
+
+import threading
+import time
+from functools import partial
+from dataclasses import dataclass, field
+
+from backend import metrics
+from backend.cache import MISS
+from backend.config import PRESCREEN_ENABLED, EMAIL_DNS_CHECKS, LINK_CHECKS
+from backend.domains import registrable_domain
+from backend.email_check import check_email, check_mail_dns
+from backend.forensics import (
+    domain_age_note, reputation_note, keyword_note, listed_domain_note, listed_company_note,
+    email_note, email_dns_note, links_note, unfinished_note, is_unfinished,
+)
+from backend.links import scan_links, check_domains
+from backend.prescreen import prescreen, prescreen_report
+from backend.prompt import VERDICTS, build_prompt, generation_config, parse_reply, VerdictStream
+from backend.replay import get_recorder
+from backend.reputation_index import lookup_domain, lookup_company
+from backend.result_cache import document_cache, scan_cache, scan_key, make_scan_record
+from backend.uploads import Upload, UploadTooLarge
+from backend.utils import (
+    DocumentError, check_domain_age, check_company_reputation, scan_keywords_detailed, extract_text_from_pdf,
+)
+
+@dataclass
+class ScanInput:
+    text: str = ""              # everything the LLM gets to read
+    url: str = ""               # checked with WHOIS
+    company: str = ""           # checked with a reputation search
+    email: str = ""             # recruiter's address, compared with the company
+    upload_digest: str = None   # hash of the uploaded file, if there was one
+
+
+@dataclass
+class Evidence:
+    context: str = ""           # the forensic notes, as handed to Gemini
+    age_days: int = None
+    domain: dict = None
+    reputation: str = None
+    keyword_scan: object = None
+    url_listing: object = None
+    company_listing: object = None
+    email: object = None        # EmailCheck, if an address was given
+    email_dns: dict = None
+    links: object = None        # LinkScan of the text
+    link_ages: dict = None      # domain -> (label, age_days) for links we looked up
+    unfinished: list = field(default_factory=list)  # checks that timed out or failed
+
+    def skip(self, name, result):
+        # A check that didn't finish in time: say so in the notes and remember it
+        self.unfinished.append(name)
+        self.context += unfinished_note(name, result)
+
+
+@dataclass
+class Report:
+    verdict: str                # "VERDICT: SAFE" etc, or None if nobody decided
+    body: str = ""              # markdown report
+    decided_by: str = None      # "cache", "prescreen" or "llm"
+    evidence: Evidence = field(default_factory=Evidence)
+    prescreen: object = None
+    llm_attempts: int = None
+    usage: dict = None
+    elapsed_ms: float = None
+    llm_reply: object = None    # the LLMResult, kept for replay recordings
+
+    @property
+    def decided(self):
+        return self.verdict is not None
+
+
+def is_readable_verdict(verdict_line):
+    return any(v in verdict_line for v in VERDICTS)
+
+
+def count_verdict(report):
+    word = next((v for v in VERDICTS if v in report.verdict), "UNKNOWN")
+    metrics.count("verdicts_total", decided_by=report.decided_by, verdict=word)
+    return report
+
+
+def _run_now(name, value, check):
+    return check(value)
+
+
+class Engine:
+    """Runs the checks for a ScanInput and picks the cheapest way to a verdict.
+
+    The keyword matcher and caches are module level (built once per process),
+    so making more than one Engine is cheap. The batch runner does that to put
+    its rate limiters in front of WHOIS and search.
+
+    With REPLAY_RECORD set, every verdict it gives is also written to a replay
+    recording (backend/replay.py).
+    """
+
+    def __init__(self, whois_limiter=None, search_limiter=None, recorder=None):
+        # The limiters only guard real WHOIS queries and searches; cache hits don't wait
+        self.check_domain_age = partial(check_domain_age, limiter=whois_limiter) if whois_limiter else check_domain_age
+        self.check_company_reputation = (
+            partial(check_company_reputation, limiter=search_limiter) if search_limiter else check_company_reputation
+        )
+        self.check_mail_dns = check_mail_dns
+        self.recorder = recorder or get_recorder()
+
+    def record(self, scan_input, report):
+        # Cache hits are left out, they repeat an answer recorded the first time
+        if self.recorder is not None and report.decided_by != "cache":
+            self.recorder.record(scan_input, report)
+        return report
+
+    def check_link_domains(self, domains):
+        # WHOIS for every domain found in the text, side by side (through the
+        # same limiter as the URL's own lookup)
+        return check_domains(domains, self.check_domain_age)
+
+    def scan_links(self, scan_input):
+        # Links in the text, minus the URL's own domain (checked on its own). None if off.
+        if not LINK_CHECKS or not scan_input.text:
+            return None
+        skip = [registrable_domain(scan_input.url)] if scan_input.url else []
+        return scan_links(scan_input.text, skip=skip)
+
+    def check_email(self, scan_input):
+        # Local checks on the recruiter's address, or None. Cheap, no network.
+        if not scan_input.email:
+            return None
+        return check_email(scan_input.email, scan_input.company, scan_input.url)
+
+    def mail_domain(self, email_check):
+        # Domain to look up in DNS; free/disposable providers tell us nothing about the sender
+        if not EMAIL_DNS_CHECKS or email_check is None or email_check.provider:
+            return None
+        return email_check.domain
+
+    def scan_keywords(self, text):
+        with metrics.timed("keywords"):
+            return scan_keywords_detailed(text)
+
+    def read_document(self, data, filename):
+        # Text of an uploaded .pdf/.txt (bytes or a binary file object), extracted
+        # once per distinct file. Big files are spooled to disk, not kept in memory
+        # (backend/uploads.py). Returns (text, digest); raises DocumentError.
+        try:
+            upload = Upload(data)
+        except UploadTooLarge as e:
+            raise DocumentError(f"{e}. Please upload a smaller file.") from e
+        with upload:
+            text = document_cache.get(upload.digest)
+            if text is MISS:
+                if filename.lower().endswith(".pdf"):
+                    with metrics.timed("pdf_extract"):
+                        text = extract_text_from_pdf(upload)
+                else:
+                    text = upload.read_text()
+                if text:
+                    document_cache.set(upload.digest, text)
+        return text or "", upload.digest
+
+    def checks(self, scan_input):
+        # The slow checks this input needs, as (name, value, check). Listed
+        # domains and companies are answered locally, so they don't show up.
+        todo = []
+        if scan_input.url and lookup_domain(scan_input.url) is None:
+            todo.append(("domain_age", scan_input.url, self.check_domain_age))
+        if scan_input.company and lookup_company(scan_input.company) is None:
+            todo.append(("reputation", scan_input.company, self.check_company_reputation))
+        mail_domain = self.mail_domain(self.check_email(scan_input))
+        if mail_domain:
+            todo.append(("email_dns", mail_domain, self.check_mail_dns))
+        links = self.scan_links(scan_input)
+        if links is not None and links.unknown:
+            todo.append(("links", tuple(links.unknown), self.check_link_domains))
+        if scan_input.text:
+            todo.append(("keywords", scan_input.text, self.scan_keywords))
+        return todo
+
+    def gather(self, scan_input, run=_run_now):
+        # Builds the Evidence. `run(name, value, check)` gives each check's result;
+        # by default the check just runs here, the app passes in its pipeline
+        # results instead (which may be TIMED_OUT / FAILED).
+        evidence = Evidence()
+        url, company = scan_input.url, scan_input.company
+
+        evidence.url_listing = lookup_domain(url) if url else None
+        if evidence.url_listing is not None:
+            listing = evidence.url_listing
+            evidence.domain = {"listed": listing.kind, "domain": listing.domain}
+            evidence.context += listed_domain_note(listing)
+        elif url:
+            result = run("domain_age", url, self.check_domain_age)
+            if is_unfinished(result):
+                evidence.skip("domain_age", result)
+            else:
+                reg_date, age = result
+                evidence.domain = {"registered": reg_date, "age_days": age}
+                evidence.age_days = age
+                evidence.context += domain_age_note(reg_date, age)
+
+        evidence.company_listing = lookup_company(company) if company else None
+        if evidence.company_listing is not None:
+            evidence.reputation = f"listed employer ({evidence.company_listing.domain})"
+            evidence.context += listed_company_note(company, evidence.company_listing)
+        elif company:
+            result = run("reputation", company, self.check_company_reputation)
+            if is_unfinished(result):
+                evidence.skip("reputation", result)
+            else:
+                evidence.reputation = result
+                evidence.context += reputation_note(company, result)
+
+        evidence.email = self.check_email(scan_input)
+        if evidence.email is not None:
+            evidence.context += email_note(evidence.email, company)
+            mail_domain = self.mail_domain(evidence.email)
+            if mail_domain:
+                result = run("email_dns", mail_domain, self.check_mail_dns)
+                if is_unfinished(result):
+                    evidence.skip("email_dns", result)
+                else:
+                    evidence.email_dns = result
+                    evidence.context += email_dns_note(mail_domain, result)
+
+        evidence.links = self.scan_links(scan_input)
+        if evidence.links is not None:
+            evidence.link_ages = {}
+            if evidence.links.unknown:
+                result = run("links", tuple(evidence.links.unknown), self.check_link_domains)
+                if is_unfinished(result):
+                    evidence.skip("links", result)
+                else:
+                    evidence.link_ages = result
+            evidence.context += links_note(evidence.links, evidence.link_ages)
+
+        if scan_input.text:
+            result = run("keywords", scan_input.text, self.scan_keywords)
+            if is_unfinished(result):
+                evidence.skip("keywords", result)
+            else:
+                evidence.keyword_scan = result
+                evidence.context += keyword_note(result.keywords, result.disguised)
+        return evidence
+
+    def quick_verdict(self, scan_input, evidence):
+        # Everything short of calling Gemini: the scan cache, then the prescreen.
+        # The Report comes back undecided (verdict None) if neither could call it.
+        screen = prescreen(age_days=evidence.age_days, keyword_scan=evidence.keyword_scan,
+                           email=scan_input.email, company_name=scan_input.company,
+                           listing=evidence.url_listing, email_check=evidence.email,
+                           mail_dns=evidence.email_dns, links=evidence.links, link_ages=evidence.link_ages)
+
+        # Seen this exact offer before? Then there's no need to ask Gemini again
+        cached = scan_cache.get(scan_key(scan_input))
+        if cached is not MISS:
+            return count_verdict(Report(cached["verdict"], cached["report"], "cache", evidence, screen))
+
+        # Clear-cut cases don't need the LLM at all
+        if PRESCREEN_ENABLED and screen.decisive:
+            verdict, body = prescreen_report(screen)
+            return self.record(scan_input, count_verdict(Report(verdict, body, "prescreen", evidence, screen)))
+        return Report(None, evidence=evidence, prescreen=screen)
+
+    def ask_llm(self, scan_input, evidence, gateway, screen=None, on_update=None):
+        # The gateway handles retries and the global concurrency/token limits.
+        # With on_update the reply is streamed, and on_update(verdict_line, body)
+        # is called every time it grows (verdict_line stays None until the
+        # first line is complete). If on_update raises, the call is cancelled.
+        prompt = build_prompt(scan_input.text, evidence.context)
+        with metrics.timed("llm"):
+            if on_update is None:
+                reply = gateway.generate_sync(prompt, config=generation_config())
+            else:
+                reply = self._stream_reply(gateway, prompt, on_update)
+        verdict, body = parse_reply(reply.text)
+        # Only remember answers we could actually read, and only when every check
+        # finished: a verdict without the WHOIS or search result shouldn't stick for a day
+        if is_readable_verdict(verdict) and not evidence.unfinished:
+            scan_cache.set(scan_key(scan_input),
+                           make_scan_record(scan_input.text, evidence.context, verdict, body))
+        report = Report(verdict, body, "llm", evidence, screen, reply.attempts, reply.usage, llm_reply=reply)
+        return self.record(scan_input, count_verdict(report))
+
+    def _stream_reply(self, gateway, prompt, on_update):
+        stream = gateway.stream_sync(prompt, config=generation_config())
+        parsed = VerdictStream()
+        try:
+            for piece in stream:
+                parsed.feed(piece)
+                on_update(parsed.verdict_line, parsed.report_body)
+        finally:
+            stream.close()
+        return stream.result
+
+    def analyze(self, scan_input, gateway=None):
+        # Full scan. Without a gateway, inputs the prescreen can't call come back undecided.
+        started = time.perf_counter()
+        if isinstance(scan_input, str):
+            scan_input = ScanInput(text=scan_input)
+        evidence = self.gather(scan_input)
+        report = self.quick_verdict(scan_input, evidence)
+        if not report.decided and gateway is not None and scan_input.text:
+            report = self.ask_llm(scan_input, evidence, gateway, report.prescreen)
+        elapsed = time.perf_counter() - started
+        metrics.observe("stage_duration_seconds", elapsed, stage="scan")
+        report.elapsed_ms = round(elapsed * 1000, 1)
+        if not report.decided:
+            self.record(scan_input, report)
+        return report
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    # The plain engine (no rate limiters), one per process
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = Engine()
+    return _engine
+
+
+def analyze(scan_input, gateway=None):
+    # Takes a ScanInput (or just the text of an offer) and returns a Report
+    return get_engine().analyze(scan_input, gateway)
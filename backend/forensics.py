@@ -0,0 +1,231 @@
+# Runs the network checks (WHOIS, reputation search) and turns their results
+# into the "forensic evidence" lines we hand to Gemini.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import partial
+
+from backend import metrics
+from backend.config import FORENSIC_WORKERS, FORENSIC_TIMEOUTS, FORENSIC_DEFAULT_TIMEOUT, FORENSIC_RETRY_AFTER
+from backend.result_cache import content_digest
+
+PENDING = object()
+TIMED_OUT = object()
+FAILED = object()
+
+# What each check is called when we have to tell the user it didn't finish
+CHECK_LABELS = {
+    "domain_age": "Domain age (WHOIS)",
+    "reputation": "Company reputation search",
+    "keywords": "Keyword scan",
+    "email_dns": "Email domain DNS (MX/SPF/DMARC)",
+    "links": "Domain age of links in the text (WHOIS)",
+}
+
+
+def domain_age_note(reg_date, age):
+    if age is None:
+        return "⚠️ **Warning:** Could not verify domain age (WHOIS lookup failed or timed out).\n"
+    if age < 180:
+        return f"🚨 **CRITICAL:** Domain is VERY NEW ({age} days old). Real companies usually have older domains.\n"
+    return f"✅ **Domain Trust:** Domain is {age} days old (Created {reg_date}).\n"
+
+
+def listed_domain_note(listing):
+    # For domains on our local allow/block list (backend/reputation_index.py)
+    if listing.kind == "bad":
+        return f"🚨 **CRITICAL:** {listing.domain} is on our list of KNOWN SCAM domains.\n"
+    if listing.kind == "edu":
+        return (f"ℹ️ **Domain:** {listing.domain} is under a university domain. Students and clubs "
+                f"get addresses there too, so this alone doesn't prove who is behind it.\n")
+    company = f" ({listing.company})" if listing.company else ""
+    return f"✅ **Domain Trust:** {listing.domain} is the official domain of a well-known employer{company}.\n"
+
+
+def listed_company_note(company_name, listing):
+    return (
+        f"\n🌍 **Reputation Check for '{company_name}':**\n"
+        f"Well-known legitimate employer. Official domain is {listing.domain}; "
+        f"make sure the recruiter's email and links actually use it.\n"
+    )
+
+
+def reputation_note(company_name, rep):
+    return f"\n🌍 **Reputation Check for '{company_name}':**\n{rep}\n"
+
+
+def email_note(check, company_name):
+    domain = check.domain
+    if check.provider == "disposable":
+        return f"\n🚨 **CRITICAL:** The recruiter writes from a disposable (throwaway) inbox ({domain}).\n"
+    if check.provider == "free":
+        return f"\n⚠️ **Email:** The recruiter uses a free webmail address ({domain}), not a company domain.\n"
+    notes = []
+    if check.official_domain and not check.company_match:
+        lookalike = ", made to look like it" if check.lookalike else ""
+        notes.append(f"🚨 **Email:** {company_name}'s official domain is {check.official_domain}, "
+                     f"but the recruiter writes from {domain}{lookalike}.")
+    elif check.lookalike:
+        notes.append(f"🚨 **Email:** {domain} uses the name '{company_name}' but isn't the company's own "
+                     f"domain. Scammers register lookalikes like this.")
+    elif check.company_match:
+        notes.append(f"✅ **Email:** {domain} matches the company name.")
+    elif check.company_match is False:
+        notes.append(f"⚠️ **Email:** {domain} doesn't match the company name '{company_name}'.")
+    if check.website_match:
+        notes.append("✅ **Email:** Same domain as the website.")
+    elif check.website_match is False:
+        notes.append(f"⚠️ **Email:** {domain} is not the website's domain ({check.website_domain}).")
+    return "\n" + "".join(f"{note}\n" for note in notes) if notes else ""
+
+
+def email_dns_note(domain, records):
+    if records is None:
+        return f"⚠️ **Email domain:** Could not look up the DNS records of {domain}.\n"
+    if not records["mx"]:
+        return f"🚨 **Email domain:** {domain} has no mail servers (no MX record), so it can't even receive replies.\n"
+    if records["spf"] and records["dmarc"]:
+        return f"✅ **Email domain:** {domain} receives mail and publishes SPF and DMARC (policy: {records['dmarc']}).\n"
+    missing = " and ".join(name for name in ("SPF", "DMARC") if not records[name.lower()])
+    return f"⚠️ **Email domain:** {domain} has no {missing} record, so anyone can send mail pretending to be it.\n"
+
+
+def links_note(links, ages):
+    # `ages` is {domain: (label, age_days)} for the domains we looked up
+    lines = []
+    for domain, listing in links.listed.items():
+        if listing.kind == "bad":
+            lines.append(f"🚨 **CRITICAL:** The text links to {domain}, a KNOWN SCAM domain.")
+    old = 0
+    for domain, result in ages.items():
+        age = result[1] if result else None
+        if age is None:
+            lines.append(f"⚠️ **Links:** Could not verify the age of {domain}, mentioned in the text.")
+        elif age < 180:
+            lines.append(f"🚨 **CRITICAL:** The text mentions {domain}, registered only {age} days ago.")
+        else:
+            old += 1
+    if old:
+        lines.append(f"✅ **Links:** {old} other domain(s) in the text have been registered for over six months.")
+    if links.ip_hosts:
+        lines.append(f"🚨 **Links:** The text links straight to an IP address ({', '.join(links.ip_hosts[:5])}). "
+                     f"Real employers use their own domain name.")
+    if links.hosted:
+        lines.append(f"⚠️ **Links:** Shortened or self-published links ({', '.join(links.hosted[:5])}) "
+                     f"hide who is really behind them.")
+    return "\n" + "".join(f"{line}\n" for line in lines) if lines else ""
+
+
+def keyword_note(found_keywords, disguised=()):
+    if not found_keywords:
+        return ""
+    note = f"\n🚩 **Keyword Alert:** Found suspicious terms: {', '.join(found_keywords).upper()}. These are common in scams."
+    if disguised:
+        note += (f" Some were disguised (look-alike or hidden characters, leetspeak) to dodge filters: "
+                 f"{', '.join(disguised).upper()}.")
+    return note
+
+
+def unfinished_note(name, result):
+    # Line for a check that timed out or blew up, so the LLM knows it's missing
+    label = CHECK_LABELS.get(name, name)
+    if result is TIMED_OUT:
+        seconds = FORENSIC_TIMEOUTS.get(name, FORENSIC_DEFAULT_TIMEOUT)
+        return f"\n⏱️ **Timed out:** {label} did not answer within {seconds:g}s, so this evidence is missing.\n"
+    return f"\n⚠️ **Check failed:** {label} could not be completed.\n"
+
+
+def is_unfinished(result):
+    return result is TIMED_OUT or result is FAILED or result is PENDING
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    # One bounded pool per process, shared by every session
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FORENSIC_WORKERS, thread_name_prefix="forensics")
+    return _executor
+
+
+def memo_key(value):
+    # What the memo remembers an input by. Long texts are kept as a hash, so
+    # session state doesn't end up holding a copy of every document.
+    if isinstance(value, str) and len(value) > 256:
+        return "sha256:" + content_digest(value)
+    return value
+
+
+class ForensicsPipeline:
+    """Remembers the last result of each check so reruns don't repeat network calls.
+
+    `memo` is any dict that outlives a single run (st.session_state in the app).
+    It only keeps a hash of long inputs (memo_key), not the text itself.
+    Checks are only queued by request(); nothing touches the network until
+    run_pending() is called, so the caller can render the page first. Pending
+    checks then run in parallel, each with its own deadline. A check that timed
+    out or failed is only remembered for FORENSIC_RETRY_AFTER seconds, then the
+    next request() queues it again.
+    """
+
+    def __init__(self, memo, timeouts=None):
+        self.memo = memo
+        self.timeouts = FORENSIC_TIMEOUTS if timeouts is None else timeouts
+        self.pending = {}
+
+    def request(self, name, value, check):
+        # Gives back the remembered result if the input hasn't changed, else queues it
+        entry = self.memo.get(name)
+        if entry is not None and entry["input"] == memo_key(value):
+            if not is_unfinished(entry["result"]) or time.monotonic() < entry.get("retry_at", 0):
+                return entry["result"]
+        self.pending[name] = (value, check)
+        return PENDING
+
+    def has_pending(self):
+        return bool(self.pending)
+
+    def run_pending(self):
+        # Worst case this takes as long as the slowest deadline, not the sum of them
+        started = time.monotonic()
+        executor = get_executor()
+        futures = {
+            name: (value, executor.submit(check, value))
+            for name, (value, check) in self.pending.items()
+        }
+        self.pending.clear()
+
+        for name, (value, future) in futures.items():
+            deadline = started + self.timeouts.get(name, FORENSIC_DEFAULT_TIMEOUT)
+            try:
+                result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                result = TIMED_OUT
+                metrics.count("forensic_timeouts_total", check=name)
+                # Keep the answer if it shows up later, the next rerun can use it
+                future.add_done_callback(partial(self._late_result, name, value))
+            except Exception:
+                result = FAILED
+                metrics.count("forensic_failures_total", check=name)
+            entry = {"input": memo_key(value), "result": result}
+            if is_unfinished(result):
+                entry["retry_at"] = time.monotonic() + FORENSIC_RETRY_AFTER
+            self.memo[name] = entry
+
+    def _late_result(self, name, value, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        entry = self.memo.get(name)
+        if entry is not None and entry["input"] == memo_key(value) and entry["result"] is TIMED_OUT:
+            self.memo[name] = {"input": memo_key(value), "result": future.result()}
+
+    def result(self, name, value):
+        entry = self.memo.get(name)
+        if entry is None or entry["input"] != memo_key(value):
+            return PENDING
+        return entry["result"]
@@ -0,0 +1,215 @@
+# Background scan jobs, so the slow part of a scan (Gemini, plus any lookups
+# that aren't cached yet) doesn't run on a Streamlit script thread.
+#
+#   queue = get_job_queue()
+#   job_id = queue.submit(scan_input, gateway)   # returns right away
+#   job = queue.get(job_id)                      # poll job.state, job.verdict_line, job.body
+#
+# There's one queue per process with JOB_WORKERS threads, shared by every
+# session, so how many scans run at once depends on the workers and not on how
+# many browser tabs are open. A job belongs to the queue, not to the page: a
+# rerun doesn't stop it, and the next run finds it again by its id. The id is a
+# hash of the input, so pressing the button twice (or two students uploading
+# the same PDF) gives one job.
+#
+# Pages that show a job touch() it every time they draw it. A job submitted
+# with abandon_after that nobody has looked at for that long (the tab was
+# closed, the inputs changed) is dropped before it starts, or has its Gemini
+# stream cancelled halfway.
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from backend import metrics
+from backend.config import JOB_WORKERS, JOB_RESULT_TTL, JOB_MAX_KEPT, LLM_STREAMING
+from backend.engine import get_engine
+from backend.result_cache import content_digest, scan_key
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobAbandoned(Exception):
+    # Raised from the stream callback to cancel the Gemini call of a job nobody watches
+    pass
+
+
+def job_id(scan_input):
+    # Same input -> same id. Built from the scan cache key, so spacing doesn't matter.
+    return content_digest(scan_key(scan_input))[:24]
+
+
+class Job:
+    # State of one scan. Workers write it, any session can read it.
+
+    def __init__(self, id, scan_input, evidence=None, abandon_after=None):
+        self.id = id
+        self.scan_input = scan_input
+        self.evidence = evidence        # already gathered by the caller, or None
+        self.abandon_after = abandon_after
+        self.state = QUEUED
+        self.verdict_line = None        # filled in while Gemini is still writing
+        self.body = ""
+        self.report = None
+        self.error = None
+        self.abandoned = False
+        self.no_verdict_reason = None   # set when the scan finished undecided
+        self.submitted_at = time.time()
+        self.seen_at = self.submitted_at
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+
+    @property
+    def finished(self):
+        return self.state in (DONE, FAILED)
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def touch(self):
+        # Someone is looking at this job
+        self.seen_at = time.time()
+
+    def _unwatched(self):
+        return self.abandon_after is not None and time.time() - self.seen_at > self.abandon_after
+
+    def _update(self, verdict_line, body):
+        self.verdict_line = verdict_line
+        self.body = body
+
+    def _stream_update(self, verdict_line, body):
+        # on_update for ask_llm; raising here cancels the stream
+        if self._unwatched():
+            raise JobAbandoned(f"nobody has looked at the scan for {self.abandon_after:g}s")
+        self._update(verdict_line, body)
+
+    def status(self):
+        return {
+            "id": self.id,
+            "state": self.state,
+            "verdict": self.verdict_line,
+            "decided_by": self.report.decided_by if self.report else None,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """Runs scans on a pool of worker threads and keeps the results for a while.
+
+    Finished jobs are kept for `ttl` seconds (at most `max_kept` of them) so a
+    page that comes back after a rerun can still show the result. A failed job
+    (or one that came back undecided) is replaced by a fresh one when the same
+    input is submitted again.
+    """
+
+    def __init__(self, engine=None, workers=JOB_WORKERS, ttl=JOB_RESULT_TTL, max_kept=JOB_MAX_KEPT):
+        self.engine = engine or get_engine()
+        self.ttl = ttl
+        self.max_kept = max_kept
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, scan_input, gateway=None, evidence=None, abandon_after=None):
+        # Queues a scan (unless the same input already has a job) and returns its id.
+        # Without a gateway, inputs the prescreen can't call finish undecided.
+        # With abandon_after, the job is stopped once nobody has touch()ed it for that long.
+        id = job_id(scan_input)
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(id)
+            if job is not None and job.state != FAILED and not (job.report and not job.report.decided):
+                metrics.count("scan_jobs_total", result="deduplicated")
+                job.touch()
+                return id
+            self._jobs.pop(id, None)
+            job = self._jobs[id] = Job(id, scan_input, evidence, abandon_after)
+        metrics.count("scan_jobs_total", result="submitted")
+        self._executor.submit(self._run, job, gateway)
+        return id
+
+    def get(self, id):
+        with self._lock:
+            return self._jobs.get(id)
+
+    def _run(self, job, gateway):
+        job.started_at = time.time()
+        job.state = RUNNING
+        metrics.observe("stage_duration_seconds", job.started_at - job.submitted_at, stage="job_wait")
+        try:
+            if job._unwatched():
+                raise JobAbandoned("the page was left before the scan started")
+            engine = self.engine
+            evidence = job.evidence if job.evidence is not None else engine.gather(job.scan_input)
+            report = engine.quick_verdict(job.scan_input, evidence)
+            if not report.decided and gateway is not None and job.scan_input.text:
+                on_update = job._stream_update if LLM_STREAMING else None
+                report = engine.ask_llm(job.scan_input, evidence, gateway, report.prescreen, on_update=on_update)
+            elif not report.decided:
+                job.no_verdict_reason = ("there was nothing to analyze" if not job.scan_input.text
+                                         else "the AI analysis isn't available")
+            job.report = report
+            job._update(report.verdict, report.body)
+            job.state = DONE
+        except JobAbandoned as e:
+            job.error = str(e)
+            job.abandoned = True
+            job.state = FAILED
+            metrics.count("scan_jobs_total", result="abandoned")
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            job.state = FAILED
+            metrics.count("scan_jobs_total", result="failed")
+        finally:
+            # The input can be a whole document; the result is all anyone needs from here on
+            job.scan_input = job.evidence = None
+            job.finished_at = time.time()
+            metrics.observe("stage_duration_seconds", job.finished_at - job.started_at, stage="job_run")
+            job._done.set()
+
+    def _expire(self):
+        # Called with the lock held. Oldest jobs are at the front.
+        cutoff = time.time() - self.ttl
+        finished = [job for job in self._jobs.values() if job._done.is_set()]
+        extra = len(finished) - self.max_kept
+        for job in finished:
+            if job.finished_at < cutoff or extra > 0:
+                del self._jobs[job.id]
+                extra -= 1
+
+    def stats(self):
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.state] += 1
+        return counts
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    # One queue (and worker pool) per process, shared by every session
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+    return _queue
+
+
+def _job_gauges():
+    if _queue is None:
+        return []
+    return [({"state": state}, value) for state, value in _queue.stats().items()]
+
+
+metrics.registry.gauge("scan_jobs", _job_gauges)
@@ -0,0 +1,165 @@
+# Every link and sender domain inside an offer letter, not just the URL typed
+# into the CHECK URL tab. Scam letters like to say "complete onboarding at
+# acme-hr-portal.xyz" or "send your ID to hr@acme-onboarding.top" halfway
+# down page three, on a domain registered last week.
+#
+# scan_links() is one regex pass over the text, then sorts what it found
+# without touching the network: domains on our allow/block list, shorteners
+# and sites anyone can publish on, webmail providers, and the rest, which need
+# a WHOIS lookup. check_domains() does those side by side, at most LINK_FANOUT
+# at a time per document, so five hidden domains cost about one WHOIS round
+# trip instead of five.
+
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+
+from backend.config import LINK_FANOUT, LINK_MAX_DOMAINS, LINK_WORKERS
+from backend.domains import extract_domain, is_ip_address, registrable_domain
+from backend.email_check import parse_address, get_provider_index
+from backend.reputation_index import lookup_domain, is_user_content
+from backend.whois_client import WHOIS_SERVERS
+
+# Bare "acme-careers.xyz" (no http://, no www.) only counts as a link if the
+# TLD is one we see in job posts, or "e.g." and "offer.pdf" would be domains too
+COMMON_TLDS = set(WHOIS_SERVERS) | {
+    "gle", "ly", "gl", "ee", "cc", "gy", "ms", "to", "gg", "link", "click", "tk", "ml", "ga", "cf",
+}
+
+SHORTENERS = {
+    "bit.ly", "tinyurl.com", "t.co", "goo.gl", "rb.gy", "cutt.ly", "is.gd", "ow.ly", "buff.ly",
+    "shorturl.at", "tiny.cc", "rebrand.ly", "t.ly", "lnkd.in", "shorte.st", "bl.ink", "s.id",
+}
+
+_STOP = r"[^\s<>\"'()\[\]{}|\\^`]"
+_LINK_RE = re.compile(
+    rf"(?P<url>\b(?:https?://|www\.){_STOP}+)"
+    r"|(?P<email>\b[a-z0-9._%+-]+@(?:[a-z0-9-]+\.)+[a-z]{2,24}\b)"
+    rf"|(?P<host>\b(?:[a-z0-9-]+\.)+(?P<tld>[a-z]{{2,24}})\b(?:/{_STOP}*)?)",
+    re.IGNORECASE,
+)
+_TRAILING = ".,;:!?*"
+
+
+@dataclass(frozen=True)
+class Link:
+    kind: str       # "url", "email" or "host" (a bare domain in the text)
+    text: str       # as written
+    host: str
+    start: int
+
+
+@dataclass
+class LinkScan:
+    links: list = field(default_factory=list)
+    listed: dict = field(default_factory=dict)      # domain -> DomainListing
+    hosted: list = field(default_factory=list)      # shortener / user-content hosts
+    ip_hosts: list = field(default_factory=list)    # links to a bare IP address, no domain
+    webmail: list = field(default_factory=list)     # free or disposable mail domains
+    unknown: list = field(default_factory=list)     # domains that need a WHOIS lookup, in order
+    dropped: int = 0                                # unknown domains over LINK_MAX_DOMAINS
+
+    @property
+    def domains(self):
+        return list(self.listed) + self.unknown
+
+
+def extract_links(text):
+    # Every URL, email address and bare domain, in order of appearance
+    links = []
+    for m in _LINK_RE.finditer(text or ""):
+        if m.group("host") is not None:
+            kind = "host"
+            written = m.group("host").rstrip(_TRAILING)
+            host = extract_domain(written)
+            if not host or (m.group("tld").lower() not in COMMON_TLDS and host not in SHORTENERS):
+                continue
+        elif m.group("email") is not None:
+            kind = "email"
+            written = m.group("email")
+            address = parse_address(written)
+            host = address.host if address else None
+        else:
+            kind = "url"
+            written = m.group("url").rstrip(_TRAILING)
+            host = extract_domain(written)
+        if host:
+            links.append(Link(kind, written, host, m.start()))
+    return links
+
+
+def scan_links(text, skip=(), max_domains=LINK_MAX_DOMAINS):
+    # Sorts the links in `text` by what they need. Domains in `skip` (the one
+    # already checked from the URL tab) are left out.
+    scan = LinkScan(links=extract_links(text))
+    seen = set(skip)
+    providers = get_provider_index()
+    for link in scan.links:
+        if is_ip_address(link.host):
+            if link.host not in scan.ip_hosts:
+                scan.ip_hosts.append(link.host)
+            continue
+        domain = registrable_domain(link.host)
+        if link.kind == "email":
+            address = parse_address(link.text)
+            if address is not None and providers.kind(address):
+                if domain not in scan.webmail:
+                    scan.webmail.append(domain)
+                continue
+        if link.host in SHORTENERS or domain in SHORTENERS or is_user_content(link.host):
+            if link.host not in scan.hosted:
+                scan.hosted.append(link.host)
+            continue
+        if not domain or domain in seen:
+            continue
+        seen.add(domain)
+        listing = lookup_domain(link.host)
+        if listing is not None:
+            scan.listed[domain] = listing
+        elif len(scan.unknown) < max_domains:
+            scan.unknown.append(domain)
+        else:
+            scan.dropped += 1
+    return scan
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_link_executor():
+    # Separate from the forensics pool: check_domains runs inside that pool, and
+    # waiting there on tasks queued behind ourselves could deadlock it
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=LINK_WORKERS, thread_name_prefix="links")
+    return _executor
+
+
+def check_domains(domains, check, fanout=LINK_FANOUT):
+    # {domain: check(domain)} with at most `fanout` lookups in flight; a
+    # lookup that blows up gives None. Finishes as fast as the slowest batch.
+    executor = get_link_executor()
+    todo = iter(domains)
+    running = {}
+    results = {}
+
+    def start_next():
+        domain = next(todo, None)
+        if domain is not None:
+            running[executor.submit(check, domain)] = domain
+
+    for _ in range(max(1, fanout)):
+        start_next()
+    while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            domain = running.pop(future)
+            try:
+                results[domain] = future.result()
+            except Exception:
+                results[domain] = None
+            start_next()
+    return {domain: results[domain] for domain in domains}
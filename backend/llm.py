@@ -0,0 +1,323 @@
+# The one place that talks to Gemini.
+#
+# Every call goes through a single LLMGateway per process, which:
+#   * keeps one genai client (and its connection pool) alive on its own event loop
+#   * caps how many calls are in flight and how many tokens per minute we spend
+#   * retries 429s / 5xx / timeouts with jittered exponential backoff
+#   * can fire off a whole list of prompts at once for batch jobs
+#   * can stream a reply piece by piece (generate_stream / stream_sync)
+#
+# Set GEMINI_BASE_URL to point it at a local fake server (benchmarks/fake_gemini.py).
+
+import asyncio
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+from backend import metrics
+from backend.config import (
+    GEMINI_MODEL, GEMINI_BASE_URL, LLM_MAX_CONCURRENCY, LLM_TOKENS_PER_MINUTE,
+    LLM_TIMEOUT, LLM_MAX_RETRIES, LLM_BACKOFF_BASE, LLM_BACKOFF_CAP, LLM_EXPECTED_OUTPUT_TOKENS,
+)
+
+# HTTP codes worth trying again
+RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    pass
+
+
+_STREAM_DONE = object()
+
+
+@dataclass
+class LLMResult:
+    text: str
+    model: str
+    attempts: int = 1
+    latency: float = 0.0
+    usage: dict = field(default_factory=dict)
+
+
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for budgeting
+    return len(text) // 4 + 1
+
+
+def is_retryable(error):
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    code = getattr(error, "code", None)
+    if code in RETRYABLE_CODES:
+        return True
+    # httpx / aiohttp network errors, without importing either
+    return type(error).__name__ in {"ConnectError", "ReadTimeout", "RemoteProtocolError",
+                                    "ClientConnectorError", "ServerDisconnectedError"}
+
+
+async def _close_stream(stream):
+    # Ends a Gemini stream (and the request behind it); errors on the way out don't matter
+    if stream is not None and hasattr(stream, "aclose"):
+        try:
+            await stream.aclose()
+        except Exception:
+            pass
+
+
+class TokenBudget:
+    """Async token bucket measured in LLM tokens per minute."""
+
+    def __init__(self, tokens_per_minute):
+        self.rate = tokens_per_minute / 60.0
+        self.capacity = tokens_per_minute
+        self.available = float(tokens_per_minute)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def spend(self, tokens):
+        # A single prompt bigger than the whole budget still goes through, it just waits for a full bucket
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.available < tokens:
+                await asyncio.sleep((tokens - self.available) / self.rate)
+                self._refill()
+            self.available -= tokens
+
+    def settle(self, estimated, actual):
+        # Once we know the real usage, pay back (or charge) the difference
+        self.available = min(self.capacity, self.available + estimated - actual)
+
+
+class LLMGateway:
+    def __init__(self, api_key=None, client=None, model=GEMINI_MODEL, base_url=GEMINI_BASE_URL,
+                 max_concurrency=LLM_MAX_CONCURRENCY, tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+                 timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES):
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.client = client or self._make_client(api_key, base_url)
+
+        # Our own event loop on a daemon thread. The async HTTP session is tied
+        # to it, so connections get reused across calls from any thread.
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+        self._thread.start()
+        self._semaphore = None
+        self._budget = None
+        asyncio.run_coroutine_threadsafe(self._setup(), self._loop).result()
+
+    @staticmethod
+    def _make_client(api_key, base_url):
+        from google import genai
+        from google.genai import types
+
+        http_options = types.HttpOptions(base_url=base_url) if base_url else None
+        return genai.Client(api_key=api_key, http_options=http_options)
+
+    async def _setup(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._budget = TokenBudget(self.tokens_per_minute)
+
+    async def generate(self, prompt, model=None, config=None):
+        model = model or self.model
+        estimated = estimate_tokens(prompt) + LLM_EXPECTED_OUTPUT_TOKENS
+        await self._budget.spend(estimated)
+
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                async with self._semaphore:
+                    response = await asyncio.wait_for(
+                        self.client.aio.models.generate_content(model=model, contents=prompt, config=config),
+                        timeout=self.timeout,
+                    )
+                break
+            except Exception as e:
+                metrics.error("gemini", e)
+                if attempt > self.max_retries or not is_retryable(e):
+                    raise LLMError(f"Gemini call failed after {attempt} attempt(s): {e}") from e
+                metrics.count("llm_retries_total")
+                # "Full jitter" backoff so a burst of 429s doesn't retry in lockstep
+                delay = random.uniform(0, min(LLM_BACKOFF_CAP, LLM_BACKOFF_BASE * 2 ** (attempt - 1)))
+                await asyncio.sleep(delay)
+
+        usage = self._record_usage(getattr(response, "usage_metadata", None), estimated, model, started)
+
+        return LLMResult(
+            text=response.text or "",
+            model=model,
+            attempts=attempt,
+            latency=time.monotonic() - started,
+            usage=usage,
+        )
+
+    def _record_usage(self, meta, estimated, model, started):
+        usage = {}
+        if meta is not None:
+            usage = {
+                "prompt_tokens": meta.prompt_token_count or 0,
+                "output_tokens": meta.candidates_token_count or 0,
+                "total_tokens": meta.total_token_count or 0,
+                # Prompt tokens Gemini served from its prefix cache (billed at a discount)
+                "cached_tokens": getattr(meta, "cached_content_token_count", None) or 0,
+            }
+            if usage["total_tokens"]:
+                self._budget.settle(estimated, usage["total_tokens"])
+            metrics.count("llm_tokens_total", usage["prompt_tokens"], kind="prompt")
+            metrics.count("llm_tokens_total", usage["output_tokens"], kind="output")
+            metrics.count("llm_tokens_total", usage["cached_tokens"], kind="cached")
+        metrics.count("llm_calls_total", model=model)
+        metrics.observe("llm_call_seconds", time.monotonic() - started, model=model)
+        return usage
+
+    async def generate_stream(self, prompt, model=None, config=None):
+        # Yields text pieces as they arrive, then one LLMResult with the whole reply.
+        # Retries only happen before the first piece; after that an error ends the stream.
+        # The concurrency slot is held until the stream is finished or cancelled.
+        model = model or self.model
+        estimated = estimate_tokens(prompt) + LLM_EXPECTED_OUTPUT_TOKENS
+        await self._budget.spend(estimated)
+
+        started = time.monotonic()
+        attempt = 0
+        stream = None
+        while True:
+            attempt += 1
+            await self._semaphore.acquire()
+            try:
+                stream = await asyncio.wait_for(
+                    self.client.aio.models.generate_content_stream(model=model, contents=prompt, config=config),
+                    timeout=self.timeout,
+                )
+                chunk = await asyncio.wait_for(stream.__anext__(), timeout=self.timeout)
+                break
+            except StopAsyncIteration:
+                chunk = None
+                break
+            except Exception as e:
+                # A stream that opened and then failed is still generating upstream: close it first
+                await _close_stream(stream)
+                stream = None
+                self._semaphore.release()
+                metrics.error("gemini", e)
+                if attempt > self.max_retries or not is_retryable(e):
+                    raise LLMError(f"Gemini call failed after {attempt} attempt(s): {e}") from e
+                metrics.count("llm_retries_total")
+                delay = random.uniform(0, min(LLM_BACKOFF_CAP, LLM_BACKOFF_BASE * 2 ** (attempt - 1)))
+                await asyncio.sleep(delay)
+
+        metrics.observe("llm_first_token_seconds", time.monotonic() - started, model=model)
+        parts = []
+        meta = None
+        try:
+            while chunk is not None:
+                text = chunk.text or ""
+                if text:
+                    parts.append(text)
+                    yield text
+                meta = getattr(chunk, "usage_metadata", None) or meta
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout=self.timeout)
+                except StopAsyncIteration:
+                    chunk = None
+        except Exception as e:
+            metrics.error("gemini", e)
+            raise LLMError(f"Gemini stream broke off: {e}") from e
+        finally:
+            self._semaphore.release()
+            await _close_stream(stream)
+
+        usage = self._record_usage(meta, estimated, model, started)
+        yield LLMResult(text="".join(parts), model=model, attempts=attempt,
+                        latency=time.monotonic() - started, usage=usage)
+
+    async def generate_many(self, prompts, model=None, config=None):
+        # Results come back in the same order; failures come back as LLMError objects
+        tasks = [self.generate(p, model=model, config=config) for p in prompts]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    # --- Blocking wrappers for Streamlit / worker threads ---
+
+    def generate_sync(self, prompt, model=None, config=None):
+        future = asyncio.run_coroutine_threadsafe(self.generate(prompt, model, config), self._loop)
+        return future.result()
+
+    def generate_many_sync(self, prompts, model=None, config=None):
+        future = asyncio.run_coroutine_threadsafe(self.generate_many(prompts, model, config), self._loop)
+        return future.result()
+
+    def stream_sync(self, prompt, model=None, config=None):
+        return LLMStream(self, prompt, model, config)
+
+
+class LLMStream:
+    """A streaming call, for use from a normal thread.
+
+    Iterating gives the text pieces as they arrive, and .result holds the
+    LLMResult once the reply is complete. Leaving the loop early (break, an
+    exception, the Streamlit script being stopped) cancels the call, so
+    Gemini stops generating for a user who has already left.
+    """
+
+    def __init__(self, gateway, prompt, model=None, config=None):
+        self.result = None
+        self.finished = False
+        self._queue = queue.Queue()
+        self._future = asyncio.run_coroutine_threadsafe(
+            self._pump(gateway.generate_stream(prompt, model, config)), gateway._loop
+        )
+
+    async def _pump(self, pieces):
+        try:
+            async for piece in pieces:
+                self._queue.put(piece)
+        except Exception as e:
+            self._queue.put(e)
+        finally:
+            self._queue.put(_STREAM_DONE)
+
+    def __iter__(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STREAM_DONE:
+                    self.finished = True
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                if isinstance(item, LLMResult):
+                    self.result = item
+                    continue
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        if not self.finished and not self._future.done():
+            self._future.cancel()
+            metrics.count("llm_cancelled_total")
+
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+
+def get_gateway(api_key):
+    # One gateway per API key per process, so limits are shared by every session
+    with _gateways_lock:
+        if api_key not in _gateways:
+            _gateways[api_key] = LLMGateway(api_key=api_key)
+        return _gateways[api_key]
@@ -0,0 +1,218 @@
+# Keyword matching engines for the scam phrase scan.
+#
+# The old way was `keyword in text` for every keyword, which means one pass over
+# the text per phrase. That's fine for a dozen phrases but not for thousands of
+# phrases + obfuscated variants. The engines here are built once and then do a
+# single pass over the text no matter how many phrases there are.
+
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class KeywordEntry:
+    phrase: str       # what we look for in the (lowercased) text
+    keyword: str      # the canonical keyword it reports as
+    weight: float = 1.0
+
+
+@dataclass(frozen=True)
+class Match:
+    keyword: str
+    phrase: str
+    start: int
+    end: int
+
+
+@dataclass
+class ScanResult:
+    matches: list = field(default_factory=list)
+    counts: Counter = field(default_factory=Counter)
+    weights: dict = field(default_factory=dict)
+    disguised: list = field(default_factory=list)   # keywords that were written in disguise
+
+    @property
+    def keywords(self):
+        # Canonical keywords in the order we first saw them
+        return list(self.counts)
+
+    @property
+    def score(self):
+        # Each distinct keyword counts once, repeats don't pile up
+        return sum(self.weights[k] for k in self.counts)
+
+
+def make_entries(keywords, weights=None, variants=None):
+    # Turns the config lists into KeywordEntry objects
+    weights = weights or {}
+    variants = variants or {}
+    entries = []
+    for keyword in keywords:
+        weight = weights.get(keyword, 1.0)
+        for phrase in [keyword, *variants.get(keyword, [])]:
+            entries.append(KeywordEntry(phrase.lower(), keyword, weight))
+    return entries
+
+
+def load_keyword_file(path):
+    # One phrase per line: "phrase<TAB>weight<TAB>canonical keyword" (last two optional)
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            parts = line.split("\t")
+            phrase = parts[0].strip().lower()
+            weight = float(parts[1]) if len(parts) > 1 and parts[1].strip() else 1.0
+            keyword = parts[2].strip() if len(parts) > 2 and parts[2].strip() else phrase
+            entries.append(KeywordEntry(phrase, keyword, weight))
+    return entries
+
+
+class BaseMatcher(ABC):
+    def __init__(self, entries):
+        self.entries = [e for e in entries if e.phrase]
+        self.by_phrase = {e.phrase: e for e in self.entries}
+
+    @abstractmethod
+    def find(self, text):
+        # Yields Match objects for every hit in `text`
+        ...
+
+    def scan(self, text):
+        result = ScanResult()
+        for match in self.find(text):
+            result.matches.append(match)
+            result.counts[match.keyword] += 1
+            result.weights[match.keyword] = self.by_phrase[match.phrase].weight
+        return result
+
+
+class SubstringMatcher(BaseMatcher):
+    # The original loop: one `in` check per phrase. Kept around as the baseline.
+
+    def find(self, text):
+        text_lower = text.lower()
+        for entry in self.entries:
+            start = text_lower.find(entry.phrase)
+            while start != -1:
+                yield Match(entry.keyword, entry.phrase, start, start + len(entry.phrase))
+                start = text_lower.find(entry.phrase, start + 1)
+
+
+class RegexMatcher(BaseMatcher):
+    """One compiled regex built from a trie of the phrases.
+
+    Sharing prefixes ("wire transfer" / "wire money") keeps the regex engine from
+    retrying every alternative at every position, so the cost barely grows with
+    the number of phrases. The pattern sits in a lookahead so overlapping hits
+    are found too, and shorter phrases that are a prefix of the hit ("wire" in
+    "wire transfer") get reported from a table built up front. Same hits as
+    Aho-Corasick, but the scanning loop runs in C.
+    """
+
+    def __init__(self, entries):
+        super().__init__(entries)
+        trie = {}
+        self.prefixes = {}
+        for entry in self.entries:
+            node = trie
+            for ch in entry.phrase:
+                node = node.setdefault(ch, {})
+            node[""] = True
+        for phrase in self.by_phrase:
+            node = trie
+            found = []
+            for i, ch in enumerate(phrase):
+                node = node[ch]
+                if "" in node:
+                    found.append(phrase[:i + 1])
+            self.prefixes[phrase] = found
+        self.pattern = re.compile("(?=(" + self._to_regex(trie) + "))") if self.entries else None
+
+    def _to_regex(self, node):
+        ends_here = "" in node
+        branches = [re.escape(ch) + self._to_regex(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends_here:
+            # Prefer the longer phrase, fall back to the shorter one
+            body = "(?:" + body + ")?"
+        return body
+
+    def find(self, text):
+        if self.pattern is None:
+            return
+        by_phrase, prefixes = self.by_phrase, self.prefixes
+        for m in self.pattern.finditer(text.lower()):
+            start = m.start()
+            for phrase in prefixes[m.group(1)]:
+                yield Match(by_phrase[phrase].keyword, phrase, start, start + len(phrase))
+
+
+class AhoCorasickMatcher(BaseMatcher):
+    """Classic Aho-Corasick automaton: one linear pass, reports every (overlapping) hit."""
+
+    def __init__(self, entries):
+        super().__init__(entries)
+        # State 0 is the root. goto[s] maps a char to the next state.
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for entry in self.entries:
+            state = 0
+            for ch in entry.phrase:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                    self.goto[state][ch] = nxt
+                state = nxt
+            if entry.phrase not in self.out[state]:
+                self.out[state] = self.out[state] + (entry.phrase,)
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = list(self.goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find(self, text):
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for i, ch in enumerate(text.lower()):
+            nxt = goto[state].get(ch)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(ch)
+            state = nxt or 0
+            if out[state]:
+                for phrase in out[state]:
+                    yield Match(self.by_phrase[phrase].keyword, phrase, i - len(phrase) + 1, i + 1)
+
+
+ENGINES = {
+    "substring": SubstringMatcher,
+    "regex": RegexMatcher,
+    "aho": AhoCorasickMatcher,
+}
+
+
+def build_matcher(entries, engine="regex"):
+    return ENGINES[engine](entries)
@@ -0,0 +1,271 @@
+# Where does a scan's time go? Per-stage latency histograms, counters for
+# errors/timeouts/tokens, and cache hit rates, all kept in memory per process.
+#
+#   with metrics.timed("whois"):
+#       ...
+#   metrics.count("external_errors_total", service="search", kind="timeout")
+#
+# Export with prometheus_text() or snapshot() (JSON friendly). Set
+# METRICS_PORT to also serve them over HTTP (/metrics and /metrics.json).
+
+import bisect
+import json
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend.config import METRICS_ENABLED, METRICS_HOST
+
+PREFIX = "safeguard_"
+
+# Seconds. WHOIS/search/LLM calls live in the upper half, keyword scans in the lower.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)     # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        # Estimated from the buckets (linear inside a bucket), like Prometheus does
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Registry:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.counters = {}      # (name, labels) -> float
+        self.histograms = {}    # (name, labels) -> Histogram
+        self.gauges = {}        # name -> callable returning [(labels dict, value)]
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def count(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def gauge(self, name, read):
+        # `read()` is called at export time and returns [(labels, value)]
+        self.gauges[name] = read
+
+    @contextmanager
+    def timed(self, stage, service=None):
+        # Times the block as stage_duration_seconds{stage=...}. Exceptions are
+        # counted as errors for `service` (if given) and passed on.
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            if service:
+                self.error(service, e)
+            raise
+        finally:
+            self.observe("stage_duration_seconds", time.perf_counter() - started, stage=stage)
+
+    def error(self, service, error):
+        self.count("external_errors_total", service=service, kind=error_kind(error))
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {key: (h.count, h.sum, h.quantile(0.5), h.quantile(0.95), h.quantile(0.99))
+                          for key, h in self.histograms.items()}
+        return {
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            "histograms": [
+                {"name": name, "labels": dict(labels), "count": count, "sum": round(total, 6),
+                 "p50": _round(p50), "p95": _round(p95), "p99": _round(p99)}
+                for (name, labels), (count, total, p50, p95, p99) in sorted(histograms.items())
+            ],
+            "gauges": [
+                {"name": name, "labels": labels, "value": value}
+                for name, read in sorted(self.gauges.items()) for labels, value in read()
+            ],
+        }
+
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (list(h.counts), h.sum, h.count, h.buckets))
+                                for key, h in self.histograms.items())
+
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                typed.add(name)
+            lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value:g}")
+
+        for (name, labels), (counts, total, count, buckets) in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else f"{bound:g}"
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {count}")
+
+        for name, read in sorted(self.gauges.items()):
+            lines.append(f"# TYPE {PREFIX}{name} gauge")
+            for labels, value in read():
+                lines.append(f"{PREFIX}{name}{_format_labels(sorted(labels.items()))} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _round(value):
+    return None if value is None else round(value, 4)
+
+
+def error_kind(error):
+    # Buckets exceptions into a few kinds so the label set stays small
+    if isinstance(error, (TimeoutError, socket.timeout)) or "timed out" in str(error).lower():
+        return "timeout"
+    if isinstance(error, ConnectionError):
+        return "connection"
+    code = getattr(error, "code", None)
+    if code == 429 or type(error).__name__ == "RateLimited":
+        return "rate_limited"
+    if isinstance(code, int) and code >= 500:
+        return "server_error"
+    return type(error).__name__
+
+
+# The one registry everything in this process reports into
+registry = Registry(enabled=METRICS_ENABLED)
+count = registry.count
+observe = registry.observe
+timed = registry.timed
+error = registry.error
+snapshot = registry.snapshot
+prometheus_text = registry.prometheus_text
+
+
+def _cache_gauges():
+    from backend.cache import all_cache_stats
+
+    values = []
+    for stats in all_cache_stats():
+        labels = {"cache": stats["name"]}
+        values += [
+            (dict(labels, result="hit"), stats["hits"]),
+            (dict(labels, result="miss"), stats["misses"]),
+            (dict(labels, result="disk_hit"), stats["disk_hits"]),
+        ]
+    return values
+
+
+def _cache_hit_ratio():
+    from backend.cache import all_cache_stats
+
+    return [({"cache": stats["name"]}, stats["hit_rate"]) for stats in all_cache_stats()]
+
+
+registry.gauge("cache_lookups", _cache_gauges)
+registry.gauge("cache_hit_ratio", _cache_hit_ratio)
+
+
+def stage_summary():
+    # {stage: {"count", "p50_ms", "p95_ms"}} for the debug panel
+    summary = {}
+    for h in snapshot()["histograms"]:
+        if h["name"] == "stage_duration_seconds":
+            summary[h["labels"]["stage"]] = {
+                "count": h["count"],
+                "p50_ms": None if h["p50"] is None else round(h["p50"] * 1000, 1),
+                "p95_ms": None if h["p95"] is None else round(h["p95"] * 1000, 1),
+                "avg_ms": round(h["sum"] / h["count"] * 1000, 1) if h["count"] else None,
+            }
+    return summary
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body, content_type = json.dumps(snapshot()).encode("utf-8"), "application/json"
+        elif self.path.startswith("/metrics"):
+            body, content_type = prometheus_text().encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port, host=METRICS_HOST):
+    # Serves /metrics (Prometheus) and /metrics.json on a background thread, once per process
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, daemon=True, name="metrics").start()
+    return _server
@@ -0,0 +1,165 @@
+# Undoes the tricks scammers use to slip past the keyword scan, before it runs:
+#
+#   "Kіndly" (Cyrillic і), "wire​transfer", "wire\n   transfer",
+#   "ｗｉｒｅ ｔｒａｎｓｆｅｒ", "k1ndly", "wh@tsapp", "cashier’s check"
+#
+# all come out as the plain lowercase phrase. One pass over the text:
+#   * NFKC (fullwidth, ligatures, superscripts...), then accents dropped
+#   * look-alike letters from other scripts folded to Latin (CONFUSABLES)
+#   * zero-width / format characters removed
+#   * any run of whitespace (line breaks from PDFs included) becomes one space
+#   * leetspeak digits/symbols become letters, but only inside words, so
+#     "$45" and "2024" are left alone
+#
+# Every output character can be traced back to where it came from
+# (NormalizedText.span), so a hit can be highlighted in the original.
+#
+# Most documents are plain ASCII with normal spacing, so the Python loop only
+# touches the characters that need work; the runs in between are copied with
+# str.lower() at C speed and cost one entry in the offset map, not one per character.
+
+import re
+import unicodedata
+from array import array
+from bisect import bisect_right
+
+# Letters from other scripts that look like Latin ones. Not the full Unicode
+# confusables list, just the ones that show up in practice.
+CONFUSABLES = {
+    # Cyrillic
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o", "р": "p",
+    "с": "c", "т": "t", "у": "y", "х": "x", "і": "i", "ї": "i", "ј": "j", "ѕ": "s", "һ": "h",
+    "ԁ": "d", "ԛ": "q", "ԝ": "w", "ӏ": "l", "ɡ": "g",
+    # Greek
+    "α": "a", "β": "b", "ε": "e", "η": "n", "ι": "i", "κ": "k", "ν": "v", "ο": "o", "ρ": "p",
+    "τ": "t", "υ": "u", "χ": "x", "ω": "w",
+    # Punctuation that NFKC leaves alone
+    "‘": "'", "’": "'", "ʼ": "'", "ʹ": "'", "′": "'", "´": "'",
+    "“": '"', "”": '"', "„": '"', "″": '"',
+    "‐": "-", "‑": "-", "‒": "-", "–": "-", "—": "-", "―": "-", "−": "-",
+    # Latin look-alikes
+    "ı": "i", "ł": "l", "ø": "o", "đ": "d", "ß": "ss",
+}
+
+# Only swapped when a letter sits right next to them ("k1ndly", "wh@tsapp")
+LEET = {"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s", "|": "l"}
+
+# Runs of characters that need a closer look: anything but printable ASCII,
+# minus digits and @ $ |. A single character class keeps the regex engine
+# on its fast path; double spaces are found with str.find() in the runs between.
+_SPECIAL_RE = re.compile(r"[^\x20-\x23\x25-\x2f\x3a-\x3f\x41-\x7b\x7d\x7e]+")
+
+_fold_cache = {}
+
+
+def fold_char(ch):
+    # What one non-ASCII character turns into ("" to drop it). Cached per character.
+    folded = _fold_cache.get(ch)
+    if folded is None:
+        if unicodedata.category(ch) in ("Cf", "Mn", "Me"):
+            folded = ""     # zero-width space/joiner, soft hyphen, BOM, stray accents
+        elif ch.lower() in CONFUSABLES:
+            folded = CONFUSABLES[ch.lower()]
+        else:
+            folded = unicodedata.normalize("NFKC", ch).lower()
+            if not folded.isascii():
+                # é -> e, but keep characters with no Latin base (CJK etc.) as they are
+                stripped = "".join(c for c in unicodedata.normalize("NFKD", folded)
+                                   if not unicodedata.combining(c))
+                stripped = "".join(CONFUSABLES.get(c, c) for c in stripped)
+                folded = stripped if stripped.isascii() else folded
+        _fold_cache[ch] = folded
+    return folded
+
+
+class NormalizedText:
+    """The normalized text plus a map back to the original.
+
+    The map is piecewise: a new segment starts wherever the two texts stop
+    lining up one to one. Clean text is a handful of segments, however long.
+    """
+
+    def __init__(self, text, seg_starts, seg_origins):
+        self.text = text
+        self._starts = seg_starts       # where each segment starts in `text`
+        self._origins = seg_origins     # ...and where that is in the original
+
+    def original_index(self, i):
+        k = bisect_right(self._starts, i) - 1
+        return self._origins[k] + (i - self._starts[k])
+
+    def span(self, start, end):
+        # Original (start, end) for a non-empty text[start:end]
+        return self.original_index(start), self.original_index(end - 1) + 1
+
+
+class _Builder:
+    def __init__(self):
+        self.parts = []
+        self.length = 0
+        self.starts = array("Q")
+        self.origins = array("Q")
+        self.last = " "     # last character written; a space trims leading whitespace
+
+    def _map(self, orig):
+        # Output position self.length comes from `orig`; only stored if that breaks the current segment
+        if not self.starts or orig - self.length != self.origins[-1] - self.starts[-1]:
+            self.starts.append(self.length)
+            self.origins.append(orig)
+
+    def copy(self, text, start, end):
+        # text[start:end] is plain printable ASCII: lowercase it, squeezing double spaces
+        while start < end:
+            if self.last == " " and text[start] == " ":
+                start += 1
+                continue
+            cut = text.find("  ", start, end)
+            stop = end if cut == -1 else cut + 1
+            self._map(start)
+            self.parts.append(text[start:stop].lower())
+            self.length += stop - start
+            self.last = text[stop - 1]
+            start = stop
+
+    def emit(self, piece, orig):
+        # `piece` stands in for the single original character at `orig`
+        for k in range(len(piece)):
+            self._map(orig)
+            self.length += 1
+        self.parts.append(piece)
+        self.last = piece[-1]
+
+
+def normalize_text(text):
+    out = _Builder()
+    pos = 0
+    size = len(text)
+    for m in _SPECIAL_RE.finditer(text):
+        out.copy(text, pos, m.start())
+        for i in range(m.start(), m.end()):
+            ch = text[i]
+            if ch in LEET:
+                if out.last.isalpha() or (i + 1 < size and text[i + 1].isalpha()):
+                    ch = LEET[ch]
+                out.emit(ch, i)
+            elif ch.isspace():
+                if out.last != " ":
+                    out.emit(" ", i)
+            elif ch.isascii():
+                out.emit(ch.lower(), i)
+            else:
+                folded = fold_char(ch)
+                if folded:
+                    out.emit(folded, i)
+        pos = m.end()
+    out.copy(text, pos, size)
+
+    normalized = "".join(out.parts)
+    if normalized.endswith(" "):
+        normalized = normalized[:-1]
+    return NormalizedText(normalized, out.starts, out.origins)
+
+
+def normalize_phrase(phrase):
+    # Keyword phrases go through the same pipeline, so both sides look alike
+    return normalize_text(phrase).text
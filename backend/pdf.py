@@ -0,0 +1,126 @@
+# Pulling text out of PDFs without letting one huge upload take over the server.
+# Pages come out one at a time (a generator), there are caps on size and page
+# count, and we stop as soon as there's enough text to scan. Big files are
+# read through mmap from a spooled temp file (backend/uploads.py), and worker
+# processes get its path rather than a copy of the bytes.
+
+import io
+import mmap
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from backend.config import (
+    PDF_MAX_BYTES, PDF_MAX_PAGES, PDF_MAX_CHARS,
+    PDF_WORKERS, PDF_PARALLEL_MIN_PAGES, PDF_PAGES_PER_TASK,
+)
+from backend.uploads import Upload, UploadTooLarge, megabytes
+
+
+class PdfTooLarge(UploadTooLarge):
+    pass
+
+
+@contextmanager
+def _pdf_reader(source):
+    # `source` is bytes, a file path (read through mmap) or a seekable stream.
+    # A mapping opened here is closed on the way out; worker processes live
+    # long and would otherwise keep one per upload.
+    # pypdf is only imported the first time someone uploads a PDF.
+    from pypdf import PdfReader
+
+    if isinstance(source, str):
+        with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield PdfReader(data)
+        return
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    yield PdfReader(source)
+
+
+def iter_pdf_pages(source, max_pages=PDF_MAX_PAGES):
+    # Yields the text of each page (empty pages are skipped)
+    with _pdf_reader(source) as reader:
+        for page in reader.pages[:max_pages]:
+            content = page.extract_text()
+            if content:
+                yield content
+
+
+def _extract_page_range(source, start, stop):
+    # Runs inside a worker process: text for pages [start, stop). `source` is a path or small bytes.
+    with _pdf_reader(source) as reader:
+        return [page.extract_text() or "" for page in reader.pages[start:stop]]
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    return _process_pool
+
+
+def iter_pdf_pages_parallel(upload, max_pages=PDF_MAX_PAGES):
+    # Same as iter_pdf_pages, but batches of pages are parsed in other processes.
+    # Results still come back in page order. Small PDFs (or single-core boxes)
+    # aren't worth the overhead.
+    with _pdf_reader(upload.stream()) as reader:
+        page_count = min(len(reader.pages), max_pages)
+        if page_count < PDF_PARALLEL_MIN_PAGES or PDF_WORKERS < 2 or (os.cpu_count() or 1) < 2:
+            for page in reader.pages[:max_pages]:
+                content = page.extract_text()
+                if content:
+                    yield content
+            return
+
+    pool = get_process_pool()
+    source = upload.source()
+    futures = [
+        pool.submit(_extract_page_range, source, start, min(start + PDF_PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PDF_PAGES_PER_TASK)
+    ]
+    try:
+        for future in futures:
+            for content in future.result():
+                if content:
+                    yield content
+    finally:
+        # If the caller stopped early (enough text), don't bother with the rest
+        for future in futures:
+            future.cancel()
+
+
+def extract_pdf_text(file, max_pages=PDF_MAX_PAGES, max_bytes=PDF_MAX_BYTES,
+                     max_chars=PDF_MAX_CHARS, parallel=False):
+    # Collects page text until max_chars is reached. `file` is bytes, a file
+    # object or an Upload. Raises PdfTooLarge for huge files.
+    if isinstance(file, Upload):
+        if file.size > max_bytes:
+            raise PdfTooLarge(f"PDF is bigger than {megabytes(max_bytes)}")
+        return _collect_text(file, max_pages, max_chars, parallel)
+    try:
+        upload = Upload(file, max_bytes=max_bytes)
+    except UploadTooLarge:
+        raise PdfTooLarge(f"PDF is bigger than {megabytes(max_bytes)}") from None
+    with upload:
+        return _collect_text(upload, max_pages, max_chars, parallel)
+
+
+def _collect_text(upload, max_pages, max_chars, parallel):
+    pages = iter_pdf_pages_parallel(upload, max_pages) if parallel else iter_pdf_pages(upload.stream(), max_pages)
+    parts = []
+    total = 0
+    for content in pages:
+        parts.append(content)
+        total += len(content)
+        if total >= max_chars:
+            break
+    pages.close()
+    text = "".join(parts)[:max_chars]
+    return text if text.strip() else None
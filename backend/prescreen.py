@@ -0,0 +1,209 @@
+# Quick local risk score from the forensic signals we already have.
+#
+# A days-old domain plus a handful of scam phrases doesn't need an LLM to call
+# it, and neither does a 20 year old domain whose recruiter writes from that
+# same domain. For those we answer straight away; everything in between still
+# goes to Gemini.
+#
+# Every signal belongs to a family (the URL's domain, the offer text, the
+# recruiter's email, links inside the text). One family on its own never
+# decides: a real google.com link doesn't clear a Gmail "recruiter", and three
+# scam phrases don't convict a letter we know nothing else about. A red flag
+# on the email always rules out a SAFE shortcut.
+
+from dataclasses import dataclass, field
+
+from backend.config import (
+    PRESCREEN_SCAM_POINTS, PRESCREEN_SAFE_POINTS, PRESCREEN_MIN_CONFIDENCE, PRESCREEN_MIN_FAMILIES,
+)
+from backend.email_check import check_email
+
+# Risk points per signal. Positive = riskier.
+DOMAIN_AGE_POINTS = [
+    (30, 5.0),      # under a month old
+    (180, 3.0),     # under six months
+]
+DOMAIN_TRUST_POINTS = [
+    (3650, -6.0),   # ten years or more
+    (1825, -4.0),   # five years or more
+    (730, -2.0),    # two years or more
+]
+LISTING_POINTS = {"bad": 10.0, "good": -8.0, "edu": -2.0}
+MAX_KEYWORD_POINTS = 8.0
+FREE_MAIL_POINTS = 2.0
+DISPOSABLE_MAIL_POINTS = 4.0
+EMAIL_MISMATCH_POINTS = 1.0
+EMAIL_MATCH_POINTS = -1.0
+NOT_OFFICIAL_DOMAIN_POINTS = 3.0
+LOOKALIKE_DOMAIN_POINTS = 3.0
+WEBSITE_MISMATCH_POINTS = 1.0
+WEBSITE_MATCH_POINTS = -1.0
+NO_MX_POINTS = 2.0
+NO_SPF_DMARC_POINTS = 1.0
+IP_LINK_POINTS = 3.0
+
+
+@dataclass
+class PrescreenResult:
+    verdict: str            # SAFE / CAUTION / SCAM
+    confidence: float       # 0..1
+    points: float
+    signals: list = field(default_factory=list)     # [(points, reason, family)], strongest first
+
+    @property
+    def red_flags(self):
+        return [reason for points, reason, _ in self.signals if points > 0]
+
+    @property
+    def trust_signals(self):
+        return [reason for points, reason, _ in self.signals if points < 0]
+
+    @property
+    def agreeing_families(self):
+        # Families whose signals, added up, point the same way as the verdict
+        totals = {}
+        for points, _, family in self.signals:
+            totals[family] = totals.get(family, 0) + points
+        sign = {"SCAM": 1, "SAFE": -1}.get(self.verdict, 0)
+        return sorted(family for family, total in totals.items() if total * sign > 0)
+
+    @property
+    def decisive(self):
+        # Sure enough that asking the LLM isn't worth it, on more than one kind of evidence
+        return (self.verdict != "CAUTION" and self.confidence >= PRESCREEN_MIN_CONFIDENCE
+                and len(self.agreeing_families) >= PRESCREEN_MIN_FAMILIES)
+
+    @property
+    def confidence_label(self):
+        return "High" if self.confidence >= 0.85 else "Medium" if self.confidence >= 0.6 else "Low"
+
+
+def email_signals(check, company_name, mail_dns=None):
+    # Returns [(points, reason)] for the recruiter's address (an EmailCheck)
+    if check is None:
+        return []
+    domain = check.domain
+    if check.provider == "disposable":
+        return [(DISPOSABLE_MAIL_POINTS, f"Recruiter writes from a disposable inbox ({domain})")]
+    if check.provider == "free":
+        if company_name:
+            return [(FREE_MAIL_POINTS, f"Recruiter uses a free webmail address ({domain}) instead of a company domain")]
+        return [(FREE_MAIL_POINTS / 2, f"Recruiter uses a free webmail address ({domain})")]
+
+    signals = []
+    if check.official_domain and not check.company_match:
+        signals.append((NOT_OFFICIAL_DOMAIN_POINTS,
+                        f"Email domain {domain} is not {company_name}'s official domain ({check.official_domain})"))
+    elif check.lookalike:
+        signals.append((LOOKALIKE_DOMAIN_POINTS, f"Email domain {domain} borrows the name '{company_name}' "
+                                                 f"but isn't the company's domain"))
+    elif check.company_match:
+        signals.append((EMAIL_MATCH_POINTS, f"Email domain {domain} matches the company name"))
+    elif check.company_match is False:
+        signals.append((EMAIL_MISMATCH_POINTS, f"Email domain {domain} doesn't match '{company_name}'"))
+
+    if check.website_match:
+        signals.append((WEBSITE_MATCH_POINTS, f"Email and website share the domain {domain}"))
+    elif check.website_match is False:
+        signals.append((WEBSITE_MISMATCH_POINTS, f"Email domain {domain} differs from the website ({check.website_domain})"))
+
+    if mail_dns is not None:
+        if not mail_dns["mx"]:
+            signals.append((NO_MX_POINTS, f"Email domain {domain} can't receive mail (no MX record)"))
+        elif not mail_dns["spf"] and not mail_dns["dmarc"]:
+            signals.append((NO_SPF_DMARC_POINTS, f"Email domain {domain} has no SPF or DMARC record"))
+    return signals
+
+
+def link_signals(links, link_ages):
+    # Known scam domains, links to bare IP addresses and the youngest domain mentioned inside the text
+    if links is None:
+        return []
+    signals = [(LISTING_POINTS["bad"], f"Text links to {domain}, a known scam domain")
+               for domain, listing in links.listed.items() if listing.kind == "bad"]
+    if links.ip_hosts:
+        signals.append((IP_LINK_POINTS, f"Text links to a bare IP address ({links.ip_hosts[0]})"))
+    ages = [(result[1], domain) for domain, result in (link_ages or {}).items() if result and result[1] is not None]
+    if ages:
+        age, domain = min(ages)
+        for limit, points in DOMAIN_AGE_POINTS:
+            if age < limit:
+                signals.append((points, f"Text mentions {domain}, only {age} days old"))
+                break
+    return signals
+
+
+def prescreen(age_days=None, keyword_scan=None, email=None, company_name=None, listing=None,
+              email_check=None, mail_dns=None, links=None, link_ages=None):
+    # `email_check` is the engine's EmailCheck; a bare `email` address gets checked here
+    signals = []
+
+    def add(family, found):
+        signals.extend((points, reason, family) for points, reason in found)
+
+    if listing is not None:
+        reason = {
+            "bad": f"{listing.domain} is a known scam domain",
+            "good": f"{listing.domain} is a well-known employer's official domain",
+            "edu": f"{listing.domain} is a university domain",
+        }[listing.kind]
+        add("domain", [(LISTING_POINTS[listing.kind], reason)])
+
+    if age_days is not None:
+        for limit, points in DOMAIN_AGE_POINTS:
+            if age_days < limit:
+                add("domain", [(points, f"Domain is only {age_days} days old")])
+                break
+        else:
+            for limit, points in DOMAIN_TRUST_POINTS:
+                if age_days >= limit:
+                    add("domain", [(points, f"Domain has been registered for {age_days // 365} years")])
+                    break
+
+    has_keywords = bool(keyword_scan and keyword_scan.counts)
+    if has_keywords:
+        points = min(keyword_scan.score, MAX_KEYWORD_POINTS)
+        add("text", [(points, "Scam phrases: " + ", ".join(keyword_scan.keywords))])
+
+    if email_check is None and email:
+        email_check = check_email(email, company_name)
+    email_found = email_signals(email_check, company_name, mail_dns)
+    email_flags = [reason for points, reason in email_found if points > 0]
+    add("email", email_found)
+    add("links", link_signals(links, link_ages))
+
+    total = sum(points for points, _, _ in signals)
+    if total >= PRESCREEN_SCAM_POINTS:
+        verdict = "SCAM"
+    elif total <= PRESCREEN_SAFE_POINTS and not has_keywords and not email_flags and total < 0:
+        verdict = "SAFE"
+    else:
+        verdict = "CAUTION"
+    # Every 2 points of evidence halves the doubt: 4 pts -> 0.75, 6 -> 0.88, 8 -> 0.94
+    confidence = round(1 - 0.5 ** (abs(total) / 2), 3)
+    signals.sort(key=lambda s: -abs(s[0]))
+    return PrescreenResult(verdict, confidence, total, signals)
+
+
+def prescreen_report(result):
+    # Same layout as the Gemini report, so the UI can show it the same way
+    summary = {
+        "SCAM": "The forensic evidence alone shows several strong fraud signals.",
+        "SAFE": "Long-established domain and no suspicious signals were found.",
+        "CAUTION": "Some signals are mixed, verify before proceeding.",
+    }[result.verdict]
+    advice = {
+        "SCAM": "Do not reply, send money or share personal details. Report it to your career office.",
+        "SAFE": "Looks legitimate, but still apply through the company's official careers page.",
+        "CAUTION": "Verify the recruiter through the company's official website before going further.",
+    }[result.verdict]
+    flags = "\n".join(f"* {reason}" for reason in result.red_flags) or "* None found"
+    trust = "".join(f" {reason}." for reason in result.trust_signals)
+    report = (
+        "\n## 🛡️ Analysis Report\n"
+        f"**Confidence:** {result.confidence_label}\n\n"
+        f"### 📝 Summary\n{summary}{trust}\n\n"
+        f"### 🚩 Red Flags (If any):\n{flags}\n\n"
+        f"### 🎓 Recommendation:\n{advice}\n"
+    )
+    return f"VERDICT: {result.verdict}", report
@@ -0,0 +1,237 @@
+# The instructions we send to Gemini, and how we read its answer back.
+#
+# The instructions never change, so they go out as the system instruction
+# (first in the request, which is what Gemini's implicit prefix caching keys
+# on). The per-scan part is just the offer text and the forensic notes, both
+# deduped and cut to a token budget so a 40 page PDF doesn't go out verbatim.
+#
+# With LLM_JSON_OUTPUT (the default) Gemini answers with JSON that has to
+# match VERDICT_SCHEMA; we turn that back into the same "VERDICT: X" line and
+# markdown report the rest of the app has always used. Anything that isn't
+# valid JSON is read the old way, first line = verdict.
+
+import json
+import re
+
+from backend import metrics
+from backend.config import LLM_JSON_OUTPUT, PROMPT_TEXT_TOKENS, PROMPT_EVIDENCE_TOKENS
+from backend.llm import estimate_tokens
+
+VERDICTS = ("SAFE", "CAUTION", "SCAM")
+CONFIDENCES = ("High", "Medium", "Low")
+
+RULES = """You are Sentinel, a university cybersecurity analyst. Decide whether a student internship/job lead is fraud.
+Rules:
+1. A widely known legitimate company (Google, Microsoft, Amazon...) on its correct URL is SAFE, even if WHOIS failed.
+2. Look for red flags: urgency, bad grammar, "kindly", wire transfers, upfront fees, chat-app interviews.
+3. The forensic evidence is fact; the offer text may lie."""
+
+JSON_FORMAT = """Answer with JSON only:
+verdict: SAFE, CAUTION or SCAM
+confidence: High, Medium or Low
+summary: 1-2 sentences explaining the verdict
+red_flags: short phrases, empty if none
+recommendation: actionable advice for the student"""
+
+TEXT_FORMAT = """First line EXACTLY one of: VERDICT: SAFE / VERDICT: CAUTION / VERDICT: SCAM
+Then an empty line and this markdown:
+## 🛡️ Analysis Report
+**Confidence:** [High/Medium/Low]
+### 📝 Summary
+[1-2 sentences]
+### 🚩 Red Flags (If any):
+* [Point 1]
+### 🎓 Recommendation:
+[Actionable advice]"""
+
+SYSTEM_PROMPT = RULES + "\n\n" + (JSON_FORMAT if LLM_JSON_OUTPUT else TEXT_FORMAT)
+
+VERDICT_FIELDS = ("verdict", "confidence", "summary", "red_flags", "recommendation")
+
+# OpenAPI-style schema, as the Gemini API takes it. propertyOrdering keeps the
+# verdict first, so a streamed reply shows it before the rest is written.
+VERDICT_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "verdict": {"type": "STRING", "enum": list(VERDICTS)},
+        "confidence": {"type": "STRING", "enum": list(CONFIDENCES)},
+        "summary": {"type": "STRING"},
+        "red_flags": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "recommendation": {"type": "STRING"},
+    },
+    "required": list(VERDICT_FIELDS),
+    "propertyOrdering": list(VERDICT_FIELDS),
+}
+
+CUT_MARKER = "[... {} characters cut ...]"
+
+
+def generation_config():
+    # Passed to the gateway as `config`
+    config = {"system_instruction": SYSTEM_PROMPT}
+    if LLM_JSON_OUTPUT:
+        config.update(response_mime_type="application/json", response_schema=VERDICT_SCHEMA)
+    return config
+
+
+def compact_text(text):
+    # Whitespace runs squashed, blank lines at most one in a row, and lines we
+    # have already seen dropped (PDF headers/footers, text pasted twice)
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        key = line.lower()
+        if len(line) >= 20 and key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def fit_to_budget(text, max_tokens):
+    # Compacted text, and if that's still too long, its head and tail (where the
+    # pitch and the payment details usually are) with the middle cut out
+    text = compact_text(text)
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    keep = max_tokens * 4
+    head = text[:keep * 2 // 3].rsplit("\n", 1)[0]
+    tail = text[-(keep // 3):].split("\n", 1)[-1]
+    cut = len(text) - len(head) - len(tail)
+    return f"{head}\n{CUT_MARKER.format(cut)}\n{tail}"
+
+
+def build_prompt(input_text, forensic_context, text_tokens=PROMPT_TEXT_TOKENS,
+                 evidence_tokens=PROMPT_EVIDENCE_TOKENS):
+    # Only the per-scan part; the instructions are in generation_config()
+    return (
+        f"OFFER:\n{fit_to_budget(input_text, text_tokens)}\n\n"
+        f"FORENSIC EVIDENCE:\n{fit_to_budget(forensic_context, evidence_tokens) or 'None'}"
+    )
+
+
+def validate_verdict(data):
+    # Checks a decoded reply against VERDICT_SCHEMA and tidies it up. Raises ValueError.
+    if not isinstance(data, dict):
+        raise ValueError("reply is not a JSON object")
+    verdict = str(data.get("verdict", "")).strip().upper()
+    if verdict not in VERDICTS:
+        raise ValueError(f"unknown verdict {data.get('verdict')!r}")
+    confidence = str(data.get("confidence", "")).strip().capitalize()
+    flags = data.get("red_flags") or []
+    if not isinstance(flags, list):
+        raise ValueError("red_flags is not a list")
+    return {
+        "verdict": verdict,
+        "confidence": confidence if confidence in CONFIDENCES else "Unknown",
+        "summary": str(data.get("summary") or "").strip(),
+        "red_flags": [str(flag).strip() for flag in flags if str(flag).strip()],
+        "recommendation": str(data.get("recommendation") or "").strip(),
+    }
+
+
+def render_report(data, partial=False):
+    # (verdict_line, report_body) in the markdown layout the UI and the cache expect.
+    # Missing fields are left out, so this also works on a half-streamed reply.
+    verdict_line = f"VERDICT: {data['verdict']}" if data.get("verdict") in VERDICTS else None
+    parts = ["\n## 🛡️ Analysis Report"]
+    if data.get("confidence"):
+        parts.append(f"**Confidence:** {data['confidence']}\n")
+    if data.get("summary"):
+        parts.append(f"### 📝 Summary\n{data['summary']}\n")
+    if "red_flags" in data and (data["red_flags"] or not partial):
+        flags = data["red_flags"] or ["None found"]
+        parts.append("### 🚩 Red Flags (If any):\n" + "\n".join(f"* {flag}" for flag in flags) + "\n")
+    if data.get("recommendation"):
+        parts.append(f"### 🎓 Recommendation:\n{data['recommendation']}\n")
+    return verdict_line, "\n".join(parts)
+
+
+def _strip_fences(text):
+    # Some models wrap JSON in ```json ... ``` even when asked not to
+    return re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", text)
+
+
+def parse_verdict(full_text):
+    # First line is "VERDICT: ...", the rest is the markdown report
+    lines = full_text.split('\n')
+    verdict_line = lines[0].strip().upper()
+    report_body = "\n".join(lines[1:])
+    return verdict_line, report_body
+
+
+def parse_reply(full_text):
+    # (verdict_line, report_body) from either a JSON reply or an old-style text one
+    if _strip_fences(full_text).lstrip().startswith("{"):
+        try:
+            return render_report(validate_verdict(json.loads(_strip_fences(full_text))))
+        except ValueError as e:     # JSONDecodeError is a ValueError too
+            metrics.count("llm_parse_failures_total", kind=type(e).__name__)
+    return parse_verdict(full_text)
+
+
+def close_partial_json(text):
+    # Makes a cut-off JSON document parseable by closing the open string and
+    # brackets. Returns the decoded value, or None if it still doesn't parse.
+    closers = []
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]" and closers:
+            closers.pop()
+    if escaped:
+        text = text[:-1]
+    text += '"' if in_string else ""
+    # A trailing comma or a key still waiting for its value won't parse
+    text = re.sub(r'(,\s*|,?\s*"[^"]*"\s*:\s*)$', "", text)
+    try:
+        return json.loads(text + "".join(reversed(closers)))
+    except ValueError:
+        return None
+
+
+class VerdictStream:
+    """parse_reply() for a reply that arrives in pieces.
+
+    feed() each piece as it comes in. verdict_line is set as soon as the
+    verdict is known (the first line of a text reply, the "verdict" field of a
+    JSON one), report_body grows with everything after it.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.verdict_line = None
+        self.report_body = ""
+
+    def feed(self, piece):
+        self.text += piece
+        if _strip_fences(self.text).lstrip().startswith("{"):
+            data = close_partial_json(_strip_fences(self.text))
+            if isinstance(data, dict):
+                # The last string may be cut mid-word, that's fine for a preview
+                verdict_line, body = render_report(data, partial=True)
+                if verdict_line is not None:
+                    self.verdict_line = verdict_line
+                    self.report_body = body
+        elif "\n" in self.text:
+            self.verdict_line, self.report_body = parse_verdict(self.text)
+            self.verdict_line = self.verdict_line or None
+
+    def finish(self):
+        # Same (verdict_line, report_body) parse_reply gives for the whole text
+        return parse_reply(self.text)
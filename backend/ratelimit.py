@@ -0,0 +1,212 @@
+# Keeps us polite with the outside world (WHOIS servers, Google search).
+# A token bucket caps the request rate, a semaphore caps how many are in flight.
+# SharedTokenBucket keeps its state in sqlite, so the rate holds across every
+# streamlit worker and batch process on the box, not just within one.
+# RedisRateBucket does the same across every replica (CACHE_BACKEND=redis).
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from backend.cache import enable_wal
+from backend.config import CACHE_DIR, CACHE_BACKEND, CACHE_KEY_PREFIX
+from backend.resp import RedisError, get_redis_client
+
+
+class RateLimited(Exception):
+    # Couldn't get a slot before the timeout
+    pass
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def acquire(self, timeout=None):
+        # Blocks until a token is free. Returns False if we gave up after `timeout` seconds.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None:
+                if now + wait > deadline:
+                    return False
+            time.sleep(wait)
+
+
+class SharedTokenBucket:
+    """Same as TokenBucket, but the tokens live in a sqlite row shared by all processes."""
+
+    def __init__(self, name, rate, burst=1, path=None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.path = path or os.path.join(CACHE_DIR, "ratelimit.sqlite3")
+        self._lock = threading.Lock()
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # Autocommit mode, we open the transactions ourselves
+        self._conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        enable_wal(self._conn)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+
+    def _take(self):
+        # Takes a token if there is one. Returns 0, or how long until the next one.
+        # Wall clock time here, monotonic clocks don't line up between processes.
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+                now = time.time()
+                tokens = self.burst if row is None else min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                self._conn.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                                   (self.name, tokens, now))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def try_acquire(self):
+        return self._take() == 0
+
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if wait == 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class RedisRateBucket:
+    """`rate` calls per second for the whole fleet, counted in Redis.
+
+    A fixed window of burst/rate seconds allows `burst` calls; INCR on the
+    window's key hands them out atomically, with no scripting needed on the
+    server. Windows follow the server's clock so replicas agree on them.
+    If Redis is unreachable we fall back to a local bucket rather than stop.
+    """
+
+    def __init__(self, name, rate, burst=1, client=None, prefix=CACHE_KEY_PREFIX):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.window = burst / rate
+        self.client = client or get_redis_client()
+        self.prefix = prefix
+        self.fallback = TokenBucket(rate, burst)
+
+    def _take(self):
+        # 0 if we got a call, otherwise seconds until the next window opens
+        now = self.client.server_time()
+        index = int(now // self.window)
+        key = f"{self.prefix}ratelimit:{self.name}:{index}"
+        used = self.client.execute("INCR", key)
+        if used == 1:
+            self.client.execute("PEXPIRE", key, int(self.window * 1000) + 1000)
+        if used <= self.burst:
+            return 0.0
+        return (index + 1) * self.window - now + 0.001
+
+    def try_acquire(self):
+        try:
+            return self._take() == 0
+        except (OSError, RedisError):
+            return self.fallback.try_acquire()
+
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                wait = self._take()
+            except (OSError, RedisError):
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                return self.fallback.acquire(remaining)
+            if wait == 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+def shared_bucket(name, rate, burst=1, backend=CACHE_BACKEND):
+    # Fleet-wide bucket with CACHE_BACKEND=redis, host-wide (sqlite) otherwise,
+    # and a per-process one if neither can be opened
+    if backend == "redis":
+        try:
+            bucket = RedisRateBucket(name, rate, burst)
+            bucket.client.ping()
+            return bucket
+        except (OSError, RedisError):
+            pass
+    if backend != "memory":
+        try:
+            return SharedTokenBucket(name, rate, burst)
+        except (OSError, sqlite3.Error):
+            pass
+    return TokenBucket(rate, burst)
+
+
+class ServiceLimiter:
+    # Rate limit + max concurrent calls for one external service
+
+    def __init__(self, name, rate, burst=1, concurrency=1, bucket=None):
+        self.name = name
+        self.bucket = bucket or TokenBucket(rate, burst)
+        self.slots = threading.BoundedSemaphore(concurrency)
+
+    @contextmanager
+    def limit(self, timeout=None):
+        # With a timeout, raises RateLimited instead of waiting forever
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self.slots.acquire(timeout=timeout):
+            raise RateLimited(self.name)
+        try:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self.bucket.acquire(remaining):
+                raise RateLimited(self.name)
+            yield
+        finally:
+            self.slots.release()
+
+    def wrap(self, fn):
+        # Returns fn guarded by this limiter
+        def limited(*args, **kwargs):
+            with self.limit():
+                return fn(*args, **kwargs)
+        limited.__name__ = getattr(fn, "__name__", "limited")
+        return limited
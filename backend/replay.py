@@ -0,0 +1,216 @@
+# Recordings of real scans, so changes to the pipeline can be replayed offline.
+#
+# Every shortcut we take (scan cache, prescreen, prompt budgets, another
+# Gemini model) can flip verdicts. With REPLAY_RECORD set, each scan is
+# appended to that file as one JSON line: the input, the results of the slow
+# checks (WHOIS, reputation search, mail DNS, link WHOIS), Gemini's raw reply
+# with its token usage, and the verdict we gave.
+# benchmarks/bench_replay.py plays a recording back through the engine under
+# different settings and compares the verdicts.
+#
+# Replaying uses RecordedChecks and RecordedGateway in place of the network:
+# each check answers with what it answered at recording time, so domain ages
+# don't drift and nothing hits Google. A path ending in .gz is gzipped.
+# The file holds the full offer texts, so keep it local.
+
+import atexit
+import gzip
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+from backend import metrics
+from backend.config import REPLAY_RECORD, REPLAY_RECORD_SAMPLE, GEMINI_MODEL
+from backend.domains import registrable_domain
+from backend.llm import LLMError, LLMResult
+from backend.reputation import SEARCH_FAILED
+from backend.result_cache import scan_key
+
+# Scans with the same key are only written once per process; forgotten past this many
+MAX_SEEN_KEYS = 50_000
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def make_record(scan_input, report, **extra):
+    # One recording line for a finished (or undecided) Report
+    evidence = report.evidence
+    checks = {}
+    if evidence.domain and "age_days" in evidence.domain and scan_input.url:
+        checks["domain_age"] = [evidence.domain["registered"], evidence.domain["age_days"]]
+    if evidence.reputation is not None and evidence.company_listing is None:
+        checks["reputation"] = evidence.reputation
+    if evidence.email_dns is not None:
+        checks["email_dns"] = {"domain": evidence.email.domain, "result": evidence.email_dns}
+    if evidence.link_ages:
+        checks["link_ages"] = evidence.link_ages
+    record = {
+        "id": scan_key(scan_input)[-16:],
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "input": {"text": scan_input.text, "url": scan_input.url, "company": scan_input.company,
+                  "email": scan_input.email, "upload_digest": scan_input.upload_digest},
+        "checks": checks,
+        "verdict": report.verdict,
+        "decided_by": report.decided_by,
+    }
+    reply = report.llm_reply
+    if reply is not None:
+        record["llm"] = {"model": reply.model, "text": reply.text, "usage": reply.usage,
+                         "attempts": reply.attempts, "latency_ms": round(reply.latency * 1000, 1)}
+    record.update(extra)
+    return record
+
+
+class ReplayRecorder:
+    """Appends scans to a JSONL recording. Safe to share between threads.
+
+    Writing never breaks a scan: errors are counted and the scan goes on.
+    """
+
+    def __init__(self, path, sample=1.0):
+        self.path = path
+        self.sample = sample
+        self.written = 0
+        self._seen = set()
+        self._file = None
+        self._lock = threading.Lock()
+
+    def record(self, scan_input, report, **extra):
+        if self.sample < 1.0 and random.random() >= self.sample:
+            return
+        try:
+            line = json.dumps(make_record(scan_input, report, **extra), ensure_ascii=False, default=str)
+            key = scan_key(scan_input)
+            with self._lock:
+                if key in self._seen:
+                    return
+                if len(self._seen) >= MAX_SEEN_KEYS:
+                    self._seen.clear()
+                self._seen.add(key)
+                if self._file is None:
+                    self._file = _open(self.path, "a")
+                self._file.write(line + "\n")
+                # A gzip flush ends the block without resetting the compressor,
+                # so the file stays small and readable while we're still writing
+                self._file.flush()
+                self.written += 1
+        except Exception:
+            metrics.count("replay_record_errors_total")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder():
+    # The process-wide recorder, or None when REPLAY_RECORD isn't set
+    global _recorder
+    if not REPLAY_RECORD:
+        return None
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = ReplayRecorder(REPLAY_RECORD, REPLAY_RECORD_SAMPLE)
+            atexit.register(_recorder.close)
+    return _recorder
+
+
+def load_recording(path):
+    # Records in file order. A gzip file whose writer is still running (or
+    # died) has no end marker yet; everything before that is still returned.
+    records = []
+    with _open(path, "r") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+        except (EOFError, json.JSONDecodeError):
+            pass
+    return records
+
+
+class RecordedChecks:
+    """The engine's slow checks, answered from a recording.
+
+    Domain ages are keyed by registrable domain, so a domain that was only
+    seen as a link at recording time still answers as the URL and vice versa.
+    Anything that wasn't recorded answers like a failed lookup and is counted
+    in `misses`.
+    """
+
+    def __init__(self, records):
+        self.ages = {}
+        self.reputation = {}
+        self.mail_dns = {}
+        self.misses = 0
+        self._lock = threading.Lock()
+        for record in records:
+            checks, scan = record.get("checks", {}), record["input"]
+            if "domain_age" in checks:
+                self.ages[registrable_domain(scan["url"])] = tuple(checks["domain_age"])
+            for domain, result in (checks.get("link_ages") or {}).items():
+                if result:
+                    self.ages.setdefault(domain, tuple(result))
+            if "reputation" in checks:
+                self.reputation[scan["company"]] = checks["reputation"]
+            if "email_dns" in checks:
+                self.mail_dns[checks["email_dns"]["domain"]] = checks["email_dns"]["result"]
+
+    def _miss(self, answer):
+        with self._lock:
+            self.misses += 1
+        return answer
+
+    def check_domain_age(self, url):
+        result = self.ages.get(registrable_domain(url))
+        return result if result is not None else self._miss(("Hidden/Error", None))
+
+    def check_company_reputation(self, company_name):
+        result = self.reputation.get(company_name)
+        return result if result is not None else self._miss(SEARCH_FAILED)
+
+    def check_mail_dns(self, domain):
+        if domain in self.mail_dns:
+            return self.mail_dns[domain]
+        return self._miss(None)
+
+    def install(self, engine):
+        # Point an Engine's checks at the recording
+        engine.check_domain_age = self.check_domain_age
+        engine.check_company_reputation = self.check_company_reputation
+        engine.check_mail_dns = self.check_mail_dns
+        return engine
+
+
+class RecordedGateway:
+    """Stands in for LLMGateway with the reply recorded for one scan.
+
+    The reply is the same whatever the prompt, so this measures changes that
+    decide *whether* Gemini gets asked (prescreen, cache). Prompt or model
+    changes need a gateway that actually reads the prompt. `delay` scales the
+    recorded latency (0 = answer at once).
+    """
+
+    def __init__(self, record, delay=0.0):
+        self.reply = record.get("llm")
+        self.delay = delay
+
+    def generate_sync(self, prompt, model=None, config=None):
+        if self.reply is None:
+            raise LLMError("No Gemini reply was recorded for this scan")
+        if self.delay:
+            time.sleep(self.reply["latency_ms"] / 1000 * self.delay)
+        return LLMResult(text=self.reply["text"], model=self.reply.get("model") or model or GEMINI_MODEL,
+                         attempts=self.reply.get("attempts") or 1,
+                         latency=self.reply["latency_ms"] / 1000, usage=self.reply.get("usage") or {})
@@ -0,0 +1,163 @@
+# Company reputation lookups ("<company> scam review fraud complaints" on Google).
+#
+# Google starts refusing us after a handful of quick searches, so every lookup
+# goes through ReputationService:
+#   * the key is the normalized company name, so "Acme, Inc." and "ACME" are one entry
+#   * results are kept in a TTLCache (memory + sqlite), failures only briefly
+#   * a token bucket shared by all processes caps how fast we search
+#   * concurrent lookups for the same company share a single search
+#
+# The search itself is pluggable. REPUTATION_BACKEND=stub (or passing a
+# StubSearchBackend) gives canned answers without touching the network.
+
+import threading
+import time
+
+from backend import metrics
+from backend.cache import TTLCache, SingleFlight, MISS
+from backend.config import (
+    REPUTATION_BACKEND, REPUTATION_CACHE_TTL, REPUTATION_CACHE_NEGATIVE_TTL, REPUTATION_CACHE_MAX_ITEMS,
+    REPUTATION_RATE_WAIT, REPUTATION_RESULTS, SEARCH_RATE, SEARCH_CONCURRENCY,
+)
+from backend.ratelimit import ServiceLimiter, RateLimited, shared_bucket
+from backend.reputation_index import normalize_company
+
+SEARCH_FAILED = "⚠️ Could not verify company reputation online (Network/API Limit)."
+NOTHING_FOUND = "No specific scam reports found."
+
+
+def reputation_query(company_name):
+    return f'"{company_name}" scam review fraud complaints'
+
+
+class GoogleSearchBackend:
+    # The real thing, via the googlesearch package
+
+    def search(self, query, num_results):
+        from googlesearch import search  # only loaded once someone searches
+
+        return [
+            {"title": hit.title, "url": hit.url, "description": hit.description}
+            for hit in search(query, num_results=num_results, advanced=True)
+        ]
+
+
+class StubSearchBackend:
+    """Offline stand-in for Google. `results` maps company name -> list of hits.
+
+    Names are matched after normalize_company(), unknown companies get no hits.
+    `latency` fakes a slow network, `fail` makes every search raise.
+    """
+
+    def __init__(self, results=None, latency=0.0, fail=False):
+        self.results = {normalize_company(name): hits for name, hits in (results or {}).items()}
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query, num_results):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise ConnectionError("stub search backend is set to fail")
+        company = query.split('"')[1] if query.count('"') >= 2 else query
+        return list(self.results.get(normalize_company(company), []))[:num_results]
+
+
+SEARCH_BACKENDS = {"google": GoogleSearchBackend, "stub": StubSearchBackend}
+
+
+def format_hits(hits):
+    if not hits:
+        return NOTHING_FOUND
+    return "\n".join(f"- [{hit['title']}]({hit['url']}): {hit['description']}" for hit in hits)
+
+
+class ReputationService:
+    def __init__(self, backend=None, cache=None, limiter=None, rate_wait=REPUTATION_RATE_WAIT,
+                 num_results=REPUTATION_RESULTS):
+        self.backend = backend or SEARCH_BACKENDS[REPUTATION_BACKEND]()
+        self.cache = cache or TTLCache(
+            "reputation",
+            ttl=REPUTATION_CACHE_TTL,
+            negative_ttl=REPUTATION_CACHE_NEGATIVE_TTL,
+            max_items=REPUTATION_CACHE_MAX_ITEMS,
+        )
+        self.limiter = limiter or ServiceLimiter(
+            "search", SEARCH_RATE, concurrency=SEARCH_CONCURRENCY,
+            bucket=shared_bucket("search", SEARCH_RATE),
+        )
+        self.rate_wait = rate_wait
+        self.num_results = num_results
+        self.flights = SingleFlight()
+        self.searches = 0
+        self.rate_limited = 0
+
+    def lookup(self, company_name, limiter=None):
+        # Markdown list of what the search found, same text the old helper returned.
+        # `limiter` stands in for self.limiter on a real search (cache hits skip it).
+        key = normalize_company(company_name) or company_name.strip().lower()
+        if not key:
+            return NOTHING_FOUND
+        record = self.cache.get(key)
+        if record is MISS:
+            record = self.flights.do(key, self._search, key, company_name, limiter or self.limiter)
+        if record.get("error"):
+            return SEARCH_FAILED
+        return format_hits(record["hits"])
+
+    def _search(self, key, company_name, limiter):
+        # Someone else may have finished the same search while we waited for the flight
+        record = self.cache.get(key)
+        if record is not MISS:
+            return record
+        failed = None
+        try:
+            with limiter.limit(timeout=self.rate_wait):
+                self.searches += 1
+                try:
+                    with metrics.timed("search", service="search"):
+                        hits = self.backend.search(reputation_query(company_name), self.num_results)
+                except Exception as e:
+                    failed = e
+        except RateLimited:
+            # Our own limit, not Google's: don't remember it, the next try may get a slot
+            self.rate_limited += 1
+            metrics.count("throttled_total", service="search")
+            return {"error": "rate limited"}
+        except Exception as e:
+            # The limiter broke (shared bucket's database locked, Redis gone), not
+            # the search: same as above, nothing to remember about the company
+            metrics.count("limiter_errors_total", service="search")
+            return {"error": type(e).__name__}
+        if failed is not None:
+            # Only the search backend's own failures are remembered (for the negative TTL)
+            record = {"error": type(failed).__name__}
+            self.cache.set(key, record, negative=True)
+            return record
+        record = {"hits": hits}
+        self.cache.set(key, record)
+        return record
+
+    def stats(self):
+        return {
+            "searches": self.searches,
+            "coalesced": self.flights.coalesced,
+            "rate_limited": self.rate_limited,
+            "cache": self.cache.stats(),
+        }
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_reputation_service():
+    # One per process, so every session shares the cache, limiter and flights
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ReputationService()
+    return _service
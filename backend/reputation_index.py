@@ -0,0 +1,147 @@
+# Local allow/block list for domains, so google.com never costs us a WHOIS call.
+#
+# The list lives in backend/data/domain_reputation.txt and gets loaded the first
+# time anyone asks (a few ms). After that every lookup is a couple of set
+# membership checks, no network involved.
+
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+from backend.config import DOMAIN_REPUTATION_FILE
+from backend.domains import extract_domain, registrable_domain
+
+DEFAULT_LIST = os.path.join(os.path.dirname(__file__), "data", "domain_reputation.txt")
+
+KINDS = ("good", "bad", "edu", "ugc")
+
+
+@dataclass(frozen=True)
+class DomainListing:
+    kind: str           # "good", "bad" or "edu"
+    domain: str
+    company: str = ""
+
+
+# Legal-form words that don't change which company it is
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "llp", "ltd", "limited", "corp", "corporation", "co",
+    "company", "plc", "gmbh", "ag", "sa", "pvt", "private", "pte", "bv", "nv", "srl",
+}
+
+
+def normalize_company(name):
+    # "Google, Inc." -> "google", "Tata Consultancy Services Pvt. Ltd." -> "tata consultancy services"
+    words = re.findall(r"[a-z0-9&]+", (name or "").lower())
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    if words and words[0] == "the" and len(words) > 1:
+        words.pop(0)
+    return " ".join(words)
+
+
+class DomainIndex:
+    def __init__(self):
+        self.good = {}          # domain -> company name
+        self.bad = set()
+        self.edu_suffixes = set()
+        self.ugc = set()
+        self.companies = {}     # normalized company name -> domain
+        self.load_ms = 0.0
+
+    def add(self, kind, domain, names=()):
+        domain = domain.lower().strip(".")
+        if kind == "good":
+            self.good[domain] = names[0] if names else ""
+            for name in names:
+                self.companies.setdefault(normalize_company(name), domain)
+        elif kind == "bad":
+            self.bad.add(domain)
+        elif kind == "edu":
+            self.edu_suffixes.add(domain)
+        elif kind == "ugc":
+            self.ugc.add(domain)
+
+    def load_file(self, path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                parts = line.split(None, 2)
+                if len(parts) < 2 or parts[0] not in KINDS:
+                    continue
+                names = parts[2].split("|") if len(parts) > 2 else ()
+                self.add(parts[0], parts[1], [n.strip() for n in names if n.strip()])
+
+    def _is_user_content(self, host):
+        # sites.google.com/anything is not Google vouching for it
+        labels = host.split(".")
+        return any(".".join(labels[i:]) in self.ugc for i in range(len(labels) - 1))
+
+    def is_user_content(self, url):
+        host = extract_domain(url)
+        return bool(host) and self._is_user_content(host)
+
+    def lookup(self, url):
+        # Returns a DomainListing, or None if we know nothing about it
+        host = extract_domain(url)
+        if not host:
+            return None
+        domain = registrable_domain(host)
+        if domain in self.bad or host in self.bad:
+            return DomainListing("bad", domain or host)
+        if self._is_user_content(host):
+            return None
+        if domain in self.good:
+            return DomainListing("good", domain, self.good[domain])
+        labels = host.split(".")
+        for i in range(1, len(labels)):
+            if ".".join(labels[i:]) in self.edu_suffixes:
+                return DomainListing("edu", domain or host)
+        return None
+
+    def lookup_company(self, company_name):
+        # Well-known employer by name -> DomainListing for its official domain
+        domain = self.companies.get(normalize_company(company_name))
+        if domain is None:
+            return None
+        return DomainListing("good", domain, self.good.get(domain, ""))
+
+    def __len__(self):
+        return len(self.good) + len(self.bad) + len(self.edu_suffixes) + len(self.ugc)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_domain_index():
+    # Loaded once per process on first use
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                started = time.perf_counter()
+                index = DomainIndex()
+                index.load_file(DEFAULT_LIST)
+                if DOMAIN_REPUTATION_FILE and os.path.exists(DOMAIN_REPUTATION_FILE):
+                    index.load_file(DOMAIN_REPUTATION_FILE)
+                index.load_ms = (time.perf_counter() - started) * 1000
+                _index = index
+    return _index
+
+
+def lookup_domain(url):
+    return get_domain_index().lookup(url)
+
+
+def is_user_content(url):
+    # Hosted on a site where anyone can publish (or a link shortener)
+    return get_domain_index().is_user_content(url)
+
+
+def lookup_company(company_name):
+    return get_domain_index().lookup_company(company_name)
@@ -0,0 +1,69 @@
+# Content-addressed caches for uploads and finished scans.
+#
+# Scam campaigns send the exact same attachment to hundreds of students, so we
+# key on a hash of the uploaded bytes: the extracted text of a document and the
+# whole scan result (forensics + Gemini verdict) only get computed once.
+
+import hashlib
+import re
+
+from backend.cache import TTLCache, dump_value
+from backend.config import (
+    SCAN_CACHE_TTL, SCAN_CACHE_MAX_ITEMS, SCAN_CACHE_MAX_BYTES, SCAN_CACHE_MAX_DISK_ITEMS,
+    SCAN_RECORD_EXCERPT_CHARS,
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# upload digest -> extracted text
+document_cache = TTLCache(
+    "document_text",
+    ttl=SCAN_CACHE_TTL,
+    max_items=SCAN_CACHE_MAX_ITEMS,
+    max_bytes=SCAN_CACHE_MAX_BYTES // 2,
+    max_disk_items=SCAN_CACHE_MAX_DISK_ITEMS,
+)
+
+# scan key -> {"text" (just the start of it), "forensic_context", "verdict", "report"}
+scan_cache = TTLCache(
+    "scan_result",
+    ttl=SCAN_CACHE_TTL,
+    max_items=SCAN_CACHE_MAX_ITEMS,
+    max_bytes=SCAN_CACHE_MAX_BYTES // 2,
+    max_disk_items=SCAN_CACHE_MAX_DISK_ITEMS,
+)
+
+
+def content_digest(data):
+    # sha256 of raw bytes (or text), used as the cache key for uploads
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def normalize_input(text):
+    # Same message with different spacing/line breaks should hit the same entry
+    return _WHITESPACE_RE.sub(" ", text or "").strip()
+
+
+def scan_key(scan_input):
+    # Uploads are keyed on their bytes, everything else on the normalized input.
+    # The URL, company and email are part of the key too: the same message from
+    # another sender or about another site is a different scan.
+    digest = content_digest(dump_value([
+        normalize_input(scan_input.text),
+        (scan_input.url or "").strip(),
+        normalize_input(scan_input.company).lower(),
+        (scan_input.email or "").strip().lower(),
+    ]))
+    upload_digest = scan_input.upload_digest
+    return f"{upload_digest}:{digest}" if upload_digest else digest
+
+
+def make_scan_record(input_text, forensic_context, verdict, report):
+    return {
+        "text": input_text[:SCAN_RECORD_EXCERPT_CHARS],
+        "forensic_context": forensic_context,
+        "verdict": verdict,
+        "report": report,
+    }
@@ -0,0 +1,153 @@
+# Uploads without several copies of them sitting in RAM.
+#
+# A 50 MB PDF used to be held as the upload buffer, a bytes copy from
+# getvalue(), another copy for pypdf, and one pickled copy per batch of pages
+# sent to the PDF worker processes. With a few of those at once a worker could
+# run out of memory. Now an upload:
+#   * is refused as soon as it goes over UPLOAD_MAX_BYTES, before it's read in full
+#   * is copied once, in chunks, hashing as it goes. Small files stay in memory,
+#     anything over UPLOAD_SPOOL_BYTES goes to a temp file that pypdf reads
+#     through mmap, so the pages live in the OS page cache instead of our heap
+#   * reaches the PDF worker processes as a file path, not as bytes
+#   * if it's text, is decoded chunk by chunk and cut at INPUT_MAX_CHARS
+
+import codecs
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+
+from backend.config import UPLOAD_MAX_BYTES, UPLOAD_SPOOL_BYTES, UPLOAD_TMP_DIR, INPUT_MAX_CHARS
+
+CHUNK_BYTES = 256 * 1024
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def megabytes(size):
+    return f"{size / (1024 * 1024):g} MB"
+
+
+class Upload:
+    """One uploaded file, spooled to disk if it's big. Use it as a context manager.
+
+    `source` is bytes or a binary file object. `digest` is the sha256 of the
+    content (same as result_cache.content_digest), `path` the temp file or None
+    if the content stayed in memory.
+    """
+
+    def __init__(self, source, max_bytes=UPLOAD_MAX_BYTES, spool_bytes=UPLOAD_SPOOL_BYTES):
+        self.path = None
+        self._data = None
+        self._mmaps = []
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._from_bytes(bytes(source) if not isinstance(source, bytes) else source, max_bytes, spool_bytes)
+        else:
+            self._from_file(source, max_bytes, spool_bytes)
+
+    def _from_bytes(self, data, max_bytes, spool_bytes):
+        if len(data) > max_bytes:
+            raise UploadTooLarge(f"File is bigger than {megabytes(max_bytes)}")
+        self.size = len(data)
+        self.digest = hashlib.sha256(data).hexdigest()
+        if self.size <= spool_bytes:
+            self._data = data
+        else:
+            self._spool([data])
+
+    def _from_file(self, file, max_bytes, spool_bytes):
+        if hasattr(file, "seek"):
+            file.seek(0)
+        hasher = hashlib.sha256()
+        chunks, size, spool = [], 0, None
+        try:
+            while True:
+                chunk = file.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File is bigger than {megabytes(max_bytes)}")
+                hasher.update(chunk)
+                if spool is not None:
+                    spool.write(chunk)
+                    continue
+                chunks.append(chunk)
+                if size > spool_bytes:
+                    spool = self._spool(chunks, keep_open=True)
+                    chunks = []
+        except BaseException:
+            if spool is not None:
+                spool.close()
+            self.close()
+            raise
+        if spool is not None:
+            spool.close()
+        else:
+            self._data = b"".join(chunks)
+        self.size = size
+        self.digest = hasher.hexdigest()
+
+    def _spool(self, chunks, keep_open=False):
+        if UPLOAD_TMP_DIR:
+            os.makedirs(UPLOAD_TMP_DIR, exist_ok=True)
+        handle = tempfile.NamedTemporaryFile(prefix="upload-", dir=UPLOAD_TMP_DIR or None, delete=False)
+        self.path = handle.name
+        for chunk in chunks:
+            handle.write(chunk)
+        if keep_open:
+            return handle
+        handle.close()
+
+    def stream(self):
+        # Seekable binary stream over the content (an mmap for spooled files)
+        if self.path is None:
+            return io.BytesIO(self._data)
+        if self.size == 0:
+            return io.BytesIO(b"")
+        with open(self.path, "rb") as f:
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mmaps.append(view)
+        return view
+
+    def source(self):
+        # What to hand to another process: the temp file's path, or the (small) bytes
+        return self.path if self.path is not None else self._data
+
+    def read_text(self, max_chars=INPUT_MAX_CHARS):
+        # UTF-8 text, decoded a chunk at a time and cut at max_chars
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        stream = self.stream()
+        parts, total = [], 0
+        while total < max_chars:
+            chunk = stream.read(CHUNK_BYTES)
+            text = decoder.decode(chunk, final=not chunk)
+            parts.append(text)
+            total += len(text)
+            if not chunk:
+                break
+        return "".join(parts)[:max_chars]
+
+    def close(self):
+        for view in self._mmaps:
+            try:
+                view.close()
+            except BufferError:
+                pass    # pypdf still holds a slice of it; goes away with the reader
+        self._mmaps = []
+        self._data = None
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,70 +1,145 @@
-import re
-import whois
-from datetime import datetime
-from pypdf import PdfReader
-from googlesearch import search
-import streamlit as st
-from backend.config import SCAM_KEYWORDS
+from contextlib import nullcontext
+from dataclasses import replace
+from datetime import date, datetime
+from backend.config import (
+    SCAM_KEYWORDS, SCAM_KEYWORD_WEIGHTS, SCAM_KEYWORD_VARIANTS, SCAM_KEYWORDS_FILE, KEYWORD_ENGINE,
+    KEYWORD_NORMALIZE, KEYWORD_CHUNK_CHARS,
+    DOMAIN_CACHE_TTL, DOMAIN_CACHE_NEGATIVE_TTL, DOMAIN_CACHE_MAX_ITEMS, WHOIS_BACKEND,
+)
+from backend import metrics
+from backend.cache import TTLCache, MISS
+from backend.domains import extract_domain, is_ip_address, registrable_domain
+from backend.matcher import ScanResult, build_matcher, make_entries, load_keyword_file
+from backend.normalize import normalize_text, normalize_phrase
+from backend.pdf import extract_pdf_text, PdfTooLarge
+from backend.reputation import get_reputation_service
+from backend.whois_client import get_resolver
 
-# This handles all the heavy lifting for checking scams
+# This handles all the heavy lifting for checking scams.
+# No streamlit in here: errors are raised and the UI decides how to show them.
+
+
+class DocumentError(ValueError):
+    # Something wrong with an upload. The message is fine to show to the user.
+    pass
+
+# Built once when the module loads, then reused for every scan (and rerun)
+_keyword_entries = make_entries(SCAM_KEYWORDS, SCAM_KEYWORD_WEIGHTS, SCAM_KEYWORD_VARIANTS)
+if SCAM_KEYWORDS_FILE:
+    _keyword_entries += load_keyword_file(SCAM_KEYWORDS_FILE)
+if KEYWORD_NORMALIZE:
+    # Phrases get the same treatment as the text, or "cashier’s check" could never match
+    _keyword_entries = [replace(e, phrase=normalize_phrase(e.phrase)) for e in _keyword_entries]
+keyword_matcher = build_matcher(_keyword_entries, KEYWORD_ENGINE)
+
+# Chunks overlap by this much so a phrase cut in half at the border is still
+# found; roomy enough for a phrase with a hidden character between every letter
+_chunk_overlap = 4 * max((len(e.phrase) for e in _keyword_entries), default=0) + 16
+
+def _scan_text(text):
+    if not KEYWORD_NORMALIZE:
+        return keyword_matcher.scan(text)
+    normalized = normalize_text(text)
+    result = keyword_matcher.scan(normalized.text)
+    # Positions back in the original text, so hits can be highlighted there
+    matches = []
+    for match in result.matches:
+        start, end = normalized.span(match.start, match.end)
+        matches.append(replace(match, start=start, end=end))
+        written = " ".join(text[start:end].lower().split())
+        if written != match.phrase and match.keyword not in result.disguised:
+            result.disguised.append(match.keyword)
+    result.matches = matches
+    return result
+
+def scan_keywords_detailed(text, chunk_chars=KEYWORD_CHUNK_CHARS):
+    # Every hit with its position in `text`, plus counts and weights per keyword.
+    # Long texts are scanned a chunk at a time, so the normalized copy and its
+    # offset map never cover more than one chunk.
+    if len(text) <= chunk_chars + _chunk_overlap:
+        return _scan_text(text)
+    result = ScanResult()
+    for offset in range(0, len(text), chunk_chars):
+        part = _scan_text(text[offset:offset + chunk_chars + _chunk_overlap])
+        for match in part.matches:
+            # Hits starting in the overlap belong to the next chunk
+            if match.start >= chunk_chars:
+                continue
+            result.matches.append(replace(match, start=match.start + offset, end=match.end + offset))
+            result.counts[match.keyword] += 1
+            result.weights[match.keyword] = part.weights[match.keyword]
+        result.disguised += [k for k in part.disguised if k not in result.disguised and k in result.counts]
+    return result
 
 def scan_for_keywords(text):
     # Checks if any bad words are in the text
-    found = []
-    text_lower = text.lower()
-    for keyword in SCAM_KEYWORDS:
-        if keyword in text_lower:
-            found.append(keyword)
-    return found
+    return scan_keywords_detailed(text).keywords
 
 def extract_text_from_pdf(file):
-    # Grabs text from the PDF file
+    # Grabs text from the PDF file (capped, see backend/pdf.py). Raises DocumentError.
     try:
-        pdf = PdfReader(file)
-        text = ""
-        for page in pdf.pages:
-            content = page.extract_text()
-            if content:
-                text += content
-        return text if text.strip() else None
+        return extract_pdf_text(file, parallel=True)
+    except PdfTooLarge as e:
+        raise DocumentError(f"{e}. Please upload a smaller file.") from e
     except Exception as e:
-        st.error(f"Error reading PDF: {e}")
-        return None
+        raise DocumentError(f"Error reading PDF: {e}") from e
+
+# Domain ages barely change, so we remember them (see backend/cache.py)
+domain_cache = TTLCache(
+    "domain_age",
+    ttl=DOMAIN_CACHE_TTL,
+    negative_ttl=DOMAIN_CACHE_NEGATIVE_TTL,
+    max_items=DOMAIN_CACHE_MAX_ITEMS,
+)
+
+def _python_whois_creation_date(domain):
+    # The old way, kept behind WHOIS_BACKEND=python-whois
+    import whois  # heavy, so only loaded the first time we actually need it
 
-def check_domain_age(url):
-    # Figures out how old a website is
+    creation_date = whois.whois(domain).creation_date
+    # Sometimes whois returns a list, sometimes a date
+    if isinstance(creation_date, list):
+        creation_date = creation_date[0]
+    return creation_date.date() if isinstance(creation_date, datetime) else creation_date
+
+def _lookup_creation_date(domain, limiter=None):
+    # Asks WHOIS/RDAP when the domain was registered. Returns [label, "YYYY-MM-DD" or None]
     try:
-        # Handle URLs without protocol
-        if not url.startswith(("http://", "https://")):
-            url = "https://" + url
-
-        domain_match = re.search(r'https?://(?:www\.)?([\w\-.]+)', url)
-        if not domain_match:
-            return "Invalid URL", None
-        domain = domain_match.group(1)
-        w = whois.whois(domain)
-        creation_date = w.creation_date
-        
-        # Sometimes whois returns a list, sometimes a date
-        if isinstance(creation_date, list):
-            creation_date = creation_date[0]
-            
+        with limiter.limit() if limiter else nullcontext(), metrics.timed("whois", service="whois"):
+            if WHOIS_BACKEND == "python-whois":
+                creation_date = _python_whois_creation_date(domain)
+            else:
+                creation_date = get_resolver().lookup(domain)
+
         if not creation_date:
-            return "Unknown", None
-            
-        age_days = (datetime.now() - creation_date).days
-        return creation_date.strftime('%Y-%m-%d'), age_days
-    except Exception:
-        return "Hidden/Error", None
+            return ["Unknown", None]
 
-def check_company_reputation(company_name):
-    # Googles the company to see if people say it's a scam
-    query = f'"{company_name}" scam review fraud complaints'
-    results = []
-    try:
-        # Search top 3 results
-        for j in search(query, num_results=3, advanced=True):
-            results.append(f"- [{j.title}]({j.url}): {j.description}")
+        created = creation_date.strftime('%Y-%m-%d')
+        return [created, created]
     except Exception:
-        return "⚠️ Could not verify company reputation online (Network/API Limit)."
-    return "\n".join(results) if results else "No specific scam reports found."
+        return ["Hidden/Error", None]
+
+def check_domain_age(url, limiter=None):
+    # Figures out how old a website is. `limiter` (a ServiceLimiter) only
+    # guards the actual WHOIS query, cache hits don't wait for it.
+    domain = registrable_domain(url)
+    if not domain:
+        return ("IP address, no domain", None) if is_ip_address(extract_domain(url)) else ("Invalid URL", None)
+
+    record = domain_cache.get(domain)
+    if record is MISS:
+        record = _lookup_creation_date(domain, limiter)
+        # Failed lookups get cached too, just not for as long
+        domain_cache.set(domain, record, negative=record[1] is None)
+
+    label, created = record
+    if created is None:
+        return label, None
+    age_days = (date.today() - date.fromisoformat(created)).days
+    return label, age_days
+
+def check_company_reputation(company_name, limiter=None):
+    # Googles the company to see if people say it's a scam. Cached, rate limited
+    # and deduplicated by the reputation service (see backend/reputation.py);
+    # `limiter` replaces the service's own limiter for the search itself.
+    return get_reputation_service().lookup(company_name, limiter)
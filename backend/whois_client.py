@@ -0,0 +1,272 @@
+# Our own domain-age lookup, instead of python-whois.
+#
+# python-whois parses every field of every registry format and hands back
+# a date, a list of dates or a string depending on the day (hence the old
+# debug_whois.py). All we need is when the domain was registered, so this:
+#   * knows the WHOIS/RDAP server for the TLDs we actually see (others are
+#     looked up once via whois.iana.org and remembered)
+#   * asks RDAP first where the registry has it (clean JSON, one keep-alive
+#     HTTPS connection per host and thread), then falls back to port 43
+#   * keeps every step inside one overall deadline
+#   * only parses out the creation date
+#
+# Server entries can be "host" or "host:port", which is how the benchmark
+# points it at benchmarks/fake_whois.py.
+
+import http.client
+import json
+import re
+import socket
+import threading
+import time
+from datetime import date
+from urllib.parse import urlsplit
+
+from backend.config import WHOIS_QUERY_TIMEOUT, RDAP_ENABLED
+
+WHOIS_PORT = 43
+IANA_WHOIS = "whois.iana.org"
+MAX_RESPONSE_BYTES = 64 * 1024
+
+# Keyed on the last label; second-level suffixes like co.uk use the same server
+WHOIS_SERVERS = {
+    "com": "whois.verisign-grs.com", "net": "whois.verisign-grs.com",
+    "org": "whois.pir.org", "info": "whois.nic.info", "biz": "whois.nic.biz",
+    "edu": "whois.educause.edu", "io": "whois.nic.io", "ai": "whois.nic.ai",
+    "co": "whois.nic.co", "me": "whois.nic.me", "us": "whois.nic.us",
+    "app": "whois.nic.google", "dev": "whois.nic.google", "page": "whois.nic.google",
+    "xyz": "whois.nic.xyz", "online": "whois.nic.online", "site": "whois.nic.site",
+    "tech": "whois.nic.tech", "store": "whois.nic.store", "top": "whois.nic.top",
+    "club": "whois.nic.club", "live": "whois.nic.live", "shop": "whois.nic.shop",
+    "icu": "whois.nic.icu", "work": "whois.nic.work", "jobs": "whois.nic.jobs",
+    "in": "whois.registry.in", "uk": "whois.nic.uk", "au": "whois.auda.org.au",
+    "ca": "whois.cira.ca", "nz": "whois.irs.net.nz", "sg": "whois.sgnic.sg",
+    "za": "whois.registry.net.za", "de": "whois.denic.de", "fr": "whois.nic.fr",
+    "nl": "whois.domain-registry.nl", "eu": "whois.eu", "jp": "whois.jprs.jp",
+    "br": "whois.registro.br", "cn": "whois.cnnic.cn", "ru": "whois.tcinet.ru",
+}
+
+# Registries with an RDAP service we trust to answer quickly
+RDAP_SERVERS = {
+    "com": "https://rdap.verisign.com/com/v1/",
+    "net": "https://rdap.verisign.com/net/v1/",
+    "org": "https://rdap.publicinterestregistry.org/rdap/",
+    "app": "https://pubapi.registry.google/rdap/",
+    "dev": "https://pubapi.registry.google/rdap/",
+    "page": "https://pubapi.registry.google/rdap/",
+    "xyz": "https://rdap.centralnic.com/xyz/",
+    "online": "https://rdap.centralnic.com/online/",
+    "site": "https://rdap.centralnic.com/site/",
+    "tech": "https://rdap.centralnic.com/tech/",
+    "store": "https://rdap.centralnic.com/store/",
+    "uk": "https://rdap.nominet.uk/uk/",
+}
+
+# A couple of servers want the query dressed up
+QUERY_FORMATS = {
+    "whois.jprs.jp": "{domain}/e",
+    "whois.denic.de": "-T dn,ace {domain}",
+}
+
+# Every spelling of "creation date" we've seen in the wild
+_CREATED_RE = re.compile(
+    r"^\s*\[?(?:creation date|created(?: on| date)?|registered(?: on| date)?|registration (?:date|time)"
+    r"|domain (?:name )?(?:registration|create|created) date|record created(?: on)?"
+    r"|domain record activated|commencement date|registration_date)\]?\s*\.*:?\s*(.+?)\s*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_NOT_FOUND_RE = re.compile(r"^\s*(?:no match|not found|no data found|no entries found|status:\s*free|%% not found)",
+                           re.IGNORECASE | re.MULTILINE)
+_REFER_RE = re.compile(r"^\s*(?:refer|whois):\s*(\S+)", re.IGNORECASE | re.MULTILINE)
+
+MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+_DATE_FORMATS = [
+    # (regex, which groups are year / month / day)
+    (re.compile(r"(\d{4})[-./](\d{1,2})[-./](\d{1,2})"), (1, 2, 3)),          # 2001-02-03, 2001.02.03
+    (re.compile(r"(\d{1,2})[-./ ]([a-z]{3})[a-z]*[-./ ,]+(\d{4})", re.I), (3, 2, 1)),   # 03-Feb-2001
+    (re.compile(r"([a-z]{3})[a-z]*\.? (\d{1,2}),? (\d{4})", re.I), (3, 1, 2)),  # Feb 3 2001
+    (re.compile(r"(\d{1,2})[./-](\d{1,2})[./-](\d{4})"), (3, 2, 1)),            # 03.02.2001
+    (re.compile(r"([a-z]{3})[a-z]*-(\d{4})", re.I), (2, 1, None)),              # before Aug-1996
+]
+
+
+class WhoisError(Exception):
+    pass
+
+
+def parse_date(text):
+    for pattern, (year, month, day) in _DATE_FORMATS:
+        match = pattern.search(text)
+        if not match:
+            continue
+        month_value = match.group(month)
+        month_value = MONTHS.get(month_value[:3].lower()) if month_value.isalpha() else int(month_value)
+        try:
+            return date(int(match.group(year)), month_value or 0, int(match.group(day)) if day else 1)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_creation_date(text):
+    # Earliest creation date in a WHOIS response, or None
+    dates = [d for d in (parse_date(value) for value in _CREATED_RE.findall(text)) if d]
+    return min(dates) if dates else None
+
+
+def parse_rdap_creation_date(payload):
+    for event in payload.get("events", []):
+        if event.get("eventAction") == "registration" and event.get("eventDate"):
+            return parse_date(event["eventDate"])
+    return None
+
+
+def split_server(server):
+    host, _, port = server.partition(":")
+    return host, int(port) if port else WHOIS_PORT
+
+
+class DomainAgeResolver:
+    """Finds out when a registrable domain was created.
+
+    lookup() returns a date, None if the registry has no creation date (or no
+    such domain), and raises WhoisError if no server answered in time.
+    """
+
+    # How long resolved server addresses are kept (seconds)
+    DNS_TTL = 600
+    # Share of the timeout RDAP may use before we try plain WHOIS
+    RDAP_SHARE = 0.6
+
+    def __init__(self, timeout=WHOIS_QUERY_TIMEOUT, whois_servers=None, rdap_servers=None,
+                 iana_server=IANA_WHOIS):
+        self.timeout = timeout
+        self.whois_servers = dict(WHOIS_SERVERS if whois_servers is None else whois_servers)
+        self.rdap_servers = dict((RDAP_SERVERS if RDAP_ENABLED else {}) if rdap_servers is None else rdap_servers)
+        self.iana_server = iana_server
+        self._addresses = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def lookup(self, domain):
+        deadline = time.monotonic() + self.timeout
+        tld = domain.rsplit(".", 1)[-1].lower()
+        errors = []
+
+        if tld in self.rdap_servers:
+            # Leave some of the budget for the port 43 fallback
+            rdap_deadline = time.monotonic() + self.timeout * self.RDAP_SHARE
+            try:
+                return self.rdap_lookup(domain, self.rdap_servers[tld], rdap_deadline)
+            except (OSError, http.client.HTTPException, ValueError, WhoisError) as e:
+                errors.append(f"rdap: {e}")
+
+        try:
+            server = self.whois_servers.get(tld) or self.find_server(tld, deadline)
+            if server:
+                text = self.query(server, QUERY_FORMATS.get(split_server(server)[0], "{domain}").format(domain=domain),
+                                  deadline)
+                if _NOT_FOUND_RE.search(text):
+                    return None
+                return parse_creation_date(text)
+            errors.append(f"no WHOIS server for .{tld}")
+        except (OSError, WhoisError) as e:
+            errors.append(f"whois: {e}")
+        raise WhoisError("; ".join(errors))
+
+    def _remaining(self, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise WhoisError("timed out")
+        return remaining
+
+    def _address(self, host, port):
+        # getaddrinfo is surprisingly slow, and registry servers don't move around much
+        now = time.monotonic()
+        with self._lock:
+            cached = self._addresses.get((host, port))
+        if cached and cached[1] > now:
+            return cached[0]
+        family, _, _, _, address = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0]
+        with self._lock:
+            self._addresses[(host, port)] = ((family, address), now + self.DNS_TTL)
+        return family, address
+
+    def query(self, server, query, deadline):
+        # One WHOIS exchange over port 43: send the query, read until the server hangs up
+        host, port = split_server(server)
+        family, address = self._address(host, port)
+        with socket.socket(family, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self._remaining(deadline))
+            sock.connect(address)
+            sock.sendall(query.encode("utf-8") + b"\r\n")
+            chunks = []
+            size = 0
+            while size < MAX_RESPONSE_BYTES:
+                sock.settimeout(self._remaining(deadline))
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+        return b"".join(chunks).decode("utf-8", "replace")
+
+    def find_server(self, tld, deadline):
+        # Asks IANA who runs this TLD, once per process
+        text = self.query(self.iana_server, tld, deadline)
+        match = _REFER_RE.search(text)
+        server = match.group(1) if match else None
+        if server:
+            with self._lock:
+                self.whois_servers[tld] = server
+        return server
+
+    def _connection(self, base_url, timeout):
+        # Keep-alive HTTPS connection per host, one set per thread
+        parts = urlsplit(base_url)
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        key = (parts.scheme, parts.netloc)
+        conn = connections.get(key)
+        if conn is None:
+            cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+            conn = connections[key] = cls(parts.netloc, timeout=timeout)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return key, conn
+
+    def rdap_lookup(self, domain, base_url, deadline):
+        path = urlsplit(base_url).path + f"domain/{domain}"
+        for attempt in range(2):
+            key, conn = self._connection(base_url, self._remaining(deadline))
+            try:
+                conn.request("GET", path, headers={"Accept": "application/rdap+json"})
+                response = conn.getresponse()
+                body = response.read(MAX_RESPONSE_BYTES)
+            except (OSError, http.client.HTTPException):
+                # Server closed our idle keep-alive connection, try once on a fresh one
+                conn.close()
+                self._local.connections.pop(key, None)
+                if attempt:
+                    raise
+                continue
+            if response.status == 404:
+                return None
+            if response.status != 200:
+                raise WhoisError(f"RDAP answered {response.status}")
+            return parse_rdap_creation_date(json.loads(body))
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver():
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = DomainAgeResolver()
+    return _resolver
@@ -0,0 +1,137 @@
+# End-to-end load test of engine.analyze() against local fakes of WHOIS,
+# Google search and Gemini (benchmarks/fake_backends.py), so it runs offline
+# and the numbers only move when our code does.
+#
+#   python benchmarks/bench_analyze.py --count 200 --concurrency 1 4 16
+#   python benchmarks/bench_analyze.py --corpus corpus.jsonl --gemini-latency 2 --json results.json
+#
+# For every concurrency level the caches are emptied, the corpus is scanned
+# once, and we report latency percentiles, throughput, who decided each
+# verdict and how often it matched the corpus label. --stages adds where the
+# time went, per pipeline stage.
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Runs shouldn't see each other's results through the sqlite/Redis caches
+os.environ.setdefault("CACHE_BACKEND", "memory")
+
+from backend import metrics
+from backend.batch import build_input_text
+from backend.cache import clear_all_caches
+from backend.engine import Engine, ScanInput
+from benchmarks.corpus import make_corpus, load_corpus
+from benchmarks.fake_backends import FakeBackends
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def to_scan_input(item):
+    return ScanInput(text=build_input_text(item), url=item.get("url") or "",
+                     company=item.get("company") or "", email=item.get("email") or "")
+
+
+def run_level(engine, items, concurrency, gateway):
+    # Scans every item with `concurrency` threads; returns one summary dict
+    clear_all_caches()
+    metrics.registry.reset()
+
+    def scan(item):
+        started = time.perf_counter()
+        try:
+            report = engine.analyze(to_scan_input(item), gateway)
+        except Exception as e:
+            return time.perf_counter() - started, None, type(e).__name__, item
+        return time.perf_counter() - started, report, None, item
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(scan, items))
+    wall = time.perf_counter() - started
+
+    latencies = [elapsed * 1000 for elapsed, _, _, _ in results]
+    decided_by = Counter()
+    agree = judged = 0
+    errors = Counter()
+    for _, report, error, item in results:
+        if error:
+            errors[error] += 1
+            continue
+        decided_by[report.decided_by or "undecided"] += 1
+        if report.decided and item.get("label"):
+            judged += 1
+            agree += item["label"] in report.verdict
+    return {
+        "concurrency": concurrency,
+        "requests": len(items),
+        "seconds": round(wall, 3),
+        "throughput": round(len(items) / wall, 2),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(max(latencies), 1),
+        "decided_by": dict(decided_by),
+        "agreement": round(agree / judged, 3) if judged else None,
+        "errors": dict(errors),
+        "stages": metrics.stage_summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="JSONL from benchmarks/corpus.py (default: generate one)")
+    parser.add_argument("--count", type=int, default=100, help="offers to generate without --corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--whois-latency", type=float, default=0.05)
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--gemini-latency", type=float, default=1.0)
+    parser.add_argument("--gemini-jitter", type=float, default=0.2)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0, help="fraction of Gemini calls answered 429")
+    parser.add_argument("--no-llm", action="store_true", help="stop after the prescreen, like batch without --llm")
+    parser.add_argument("--stages", action="store_true", help="print per-stage timings too")
+    parser.add_argument("--json", help="write the results here as well")
+    args = parser.parse_args()
+
+    items = load_corpus(args.corpus) if args.corpus else make_corpus(args.count, seed=args.seed)
+    backends = FakeBackends(args.whois_latency, args.search_latency, args.gemini_latency, args.gemini_jitter,
+                            args.gemini_error_rate, llm_concurrency=max(args.concurrency))
+    gateway = None if args.no_llm else backends.gateway
+    engine = Engine()
+
+    print(f"{len(items)} offers; fake latency whois {args.whois_latency:g}s, search {args.search_latency:g}s, "
+          f"gemini {'off' if args.no_llm else f'{args.gemini_latency:g}s'}\n")
+    print(f"{'conc':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'agree':>6}  decided by")
+    levels = []
+    for concurrency in args.concurrency:
+        level = run_level(engine, items, concurrency, gateway)
+        levels.append(level)
+        decided = ", ".join(f"{k} {v}" for k, v in sorted(level["decided_by"].items()))
+        if level["errors"]:
+            decided += f"; errors {level['errors']}"
+        agreement = "-" if level["agreement"] is None else f"{level['agreement']:.0%}"
+        print(f"{concurrency:>5} {level['throughput']:>8.2f} {level['p50_ms']:>9.1f} {level['p95_ms']:>9.1f} "
+              f"{level['p99_ms']:>9.1f} {level['max_ms']:>9.1f} {agreement:>6}  {decided}")
+        if args.stages:
+            for stage, timing in sorted(level["stages"].items()):
+                print(f"{'':>5} {stage:<14} n={timing['count']:<5} avg {timing['avg_ms']} ms, "
+                      f"p50 {timing['p50_ms']} ms, p95 {timing['p95_ms']} ms")
+
+    print(f"\nbackend calls: {backends.stats()}")
+    backends.close()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "levels": levels}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# How long does the app spend importing stuff before it can draw the first page?
+#
+#   python benchmarks/bench_import.py                 # median of a few cold starts
+#   python benchmarks/bench_import.py --top 15        # heaviest modules (python -X importtime)
+#   python benchmarks/bench_import.py --max-ms 900    # exit 1 if we got slower (for CI)
+#
+# It pulls the top-level import lines out of streamlit/app.py and runs them in a
+# fresh interpreter, so adding a heavy import to the app shows up here straight away.
+
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "streamlit", "app.py")
+
+# Imported lazily by the app, listed to show what they would cost at startup
+HEAVY_BACKENDS = ["google.genai", "whois", "pypdf", "googlesearch"]
+
+
+def app_imports():
+    # Source of every top-level import statement in app.py
+    with open(APP, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def import_script(statements):
+    return "\n".join(
+        ["import sys, time", f"sys.path.insert(0, {ROOT!r})", "t = time.perf_counter()"]
+        + statements
+        + ["print((time.perf_counter() - t) * 1000)"]
+    )
+
+
+def run_once(script, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", script]
+    # Run from somewhere neutral so ./streamlit doesn't shadow the real package
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=os.path.dirname(ROOT))
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    return proc
+
+
+def measure(statements, runs):
+    script = import_script(statements)
+    return [float(run_once(script).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+
+
+def top_modules(statements, count):
+    # Parses `-X importtime` output: "import time: self [us] | cumulative | name"
+    proc = run_once(import_script(statements), importtime=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        # Nested imports are indented under their parent, keep only the outermost ones
+        if not name[1:].startswith(" "):
+            rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app import time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="show the N slowest top-level packages")
+    parser.add_argument("--max-ms", type=float, help="fail if the median app import time is above this")
+    args = parser.parse_args()
+
+    statements = app_imports()
+    app_times = measure(statements, args.runs)
+    median = statistics.median(app_times)
+    print(f"app.py top-level imports: median {median:.0f} ms over {args.runs} runs "
+          f"(min {min(app_times):.0f}, max {max(app_times):.0f})")
+
+    for module in HEAVY_BACKENDS:
+        try:
+            times = measure([f"import {module}"], max(1, args.runs // 2))
+            print(f"  lazy backend {module:<14} would add ~{statistics.median(times):.0f} ms if imported at startup")
+        except SystemExit as e:
+            print(f"  lazy backend {module:<14} not installed ({e})")
+
+    if args.top:
+        print("\nSlowest top-level packages (cumulative):")
+        for cumulative_us, name in top_modules(statements, args.top):
+            print(f"  {cumulative_us / 1000:>8.1f} ms  {name}")
+
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"\nFAIL: {median:.0f} ms is over the {args.max_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
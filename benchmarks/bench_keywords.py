@@ -0,0 +1,81 @@
+# Compares the keyword engines in backend/matcher.py on big offer letters.
+#
+#   python benchmarks/bench_keywords.py
+#   python benchmarks/bench_keywords.py --phrases 5000 --sizes 10000 100000 1000000
+#
+# "substring" is the old `keyword in text` loop, the rest are the new engines.
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import SCAM_KEYWORDS
+from backend.matcher import ENGINES, make_entries
+
+SAMPLE_LETTER = os.path.join(os.path.dirname(__file__), "..", "test_data", "scam_offer_letter.txt")
+
+
+def make_text(size, seed=0):
+    # Repeats the sample scam letter with some filler until it's `size` chars long
+    rng = random.Random(seed)
+    with open(SAMPLE_LETTER, encoding="utf-8") as f:
+        letter = f.read()
+    filler_words = "the team role remote salary weekly manager hours project data entry office".split()
+    parts = []
+    total = 0
+    while total < size:
+        chunk = letter if rng.random() < 0.2 else " ".join(rng.choice(filler_words) for _ in range(200))
+        parts.append(chunk)
+        total += len(chunk) + 1
+    return "\n".join(parts)[:size]
+
+
+def make_phrases(count, seed=1):
+    # Real keywords plus made-up two/three word phrases to simulate a big list
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mi", "tre", "pon", "sa", "vi", "dex", "ru", "fen", "qu", "zo"]
+    phrases = list(SCAM_KEYWORDS)
+    while len(phrases) < count:
+        words = ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(2, 3))]
+        phrases.append(" ".join(words))
+    return phrases[:count]
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--phrases", type=int, nargs="+", default=[len(SCAM_KEYWORDS), 500, 5000])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'phrases':>8} {'chars':>10} " + " ".join(f"{name:>12}" for name in ENGINES) + "   (ms, best of %d)" % args.repeat)
+    for count in args.phrases:
+        entries = make_entries(make_phrases(count))
+        build_times = {}
+        matchers = {}
+        for name, cls in ENGINES.items():
+            start = time.perf_counter()
+            matchers[name] = cls(entries)
+            build_times[name] = time.perf_counter() - start
+        for size in args.sizes:
+            text = make_text(size)
+            row = [best_of(lambda m=m: m.scan(text), args.repeat) * 1000 for m in matchers.values()]
+            print(f"{count:>8} {size:>10} " + " ".join(f"{ms:>12.1f}" for ms in row))
+        print(f"{'':>8} {'build':>10} " + " ".join(f"{build_times[n] * 1000:>12.1f}" for n in ENGINES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# Peak memory of reading uploads, before and after backend/uploads.py.
+#
+#   python benchmarks/bench_memory.py --pdf-mb 14 --txt-mb 14 --users 4
+#
+# "old" is the previous path: getvalue() copy, a second copy for pypdf, the
+# whole .txt decoded at once. "new" is engine.read_document() on the file
+# object, which hashes while copying, spools big files to disk and reads them
+# through mmap. Numbers are tracemalloc peaks (Python heap, above what the
+# upload buffers themselves already take), for one upload and for --users
+# uploads at the same time. Last line: keyword scan of a long text in one go
+# vs in chunks.
+
+import argparse
+import hashlib
+import io
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CACHE_BACKEND", "memory")
+
+from backend.cache import clear_all_caches
+from backend.config import PDF_MAX_CHARS
+from backend.engine import get_engine
+from backend.pdf import _pdf_reader
+from backend.utils import scan_keywords_detailed
+from benchmarks.bench_keywords import make_text
+from benchmarks.pdfgen import make_pdf
+
+MB = 1024 * 1024
+
+
+def old_read_document(upload, filename):
+    # What the app did before: upload.getvalue(), hash, then a copy for pypdf
+    data = upload.getvalue()
+    digest = hashlib.sha256(data).hexdigest()
+    if filename.endswith(".pdf"):
+        copy = bytes(bytearray(data))     # read_pdf_bytes(bytes(file))
+        parts, total = [], 0
+        with _pdf_reader(copy) as reader:
+            for page in reader.pages:
+                content = page.extract_text() or ""
+                parts.append(content)
+                total += len(content)
+                if total >= PDF_MAX_CHARS:
+                    break
+        text = "".join(parts)[:PDF_MAX_CHARS]
+    else:
+        text = data.decode("utf-8", errors="replace")
+    return text, digest
+
+
+def new_read_document(upload, filename):
+    return get_engine().read_document(upload, filename)
+
+
+def measure(fn, uploads):
+    # (peak MB above the starting point, seconds) for running fn on every upload at once
+    clear_all_caches()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    threads = [threading.Thread(target=fn, args=(upload, name)) for upload, name in uploads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return peak / MB, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pdf-mb", type=float, default=14)
+    parser.add_argument("--txt-mb", type=float, default=14)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--scan-chars", type=int, default=5_000_000)
+    args = parser.parse_args()
+
+    pages = 40
+    pdf = make_pdf([make_text(3000, seed=i) for i in range(pages)], image_bytes=int(args.pdf_mb * MB / pages))
+    txt = (make_text(1_000_000) * int(args.txt_mb + 1)).encode("utf-8")[:int(args.txt_mb * MB)]
+    # Distinct files, so the content cache doesn't make the other users free
+    pdfs = [pdf + b"\n%" + str(i).encode() for i in range(args.users)]
+    txts = [txt + str(i).encode() for i in range(args.users)]
+
+    print(f"{'upload':<16} {'users':>5} {'old MB':>8} {'new MB':>8} {'old s':>7} {'new s':>7}")
+    for label, files, name in (("pdf", pdfs, "offer.pdf"), ("txt", txts, "offer.txt")):
+        size = len(files[0]) / MB
+        for users in sorted({1, args.users}):
+            uploads = [(io.BytesIO(data), name) for data in files[:users]]
+            old_mb, old_s = measure(old_read_document, uploads)
+            new_mb, new_s = measure(new_read_document, uploads)
+            print(f"{f'{label} {size:.1f} MB':<16} {users:>5} {old_mb:>8.1f} {new_mb:>8.1f} {old_s:>7.2f} {new_s:>7.2f}")
+
+    text = make_text(args.scan_chars)
+    whole = measure(lambda t, chunk: scan_keywords_detailed(t, chunk_chars=chunk), [(text, len(text))])
+    chunked = measure(lambda t, _: scan_keywords_detailed(t), [(text, None)])
+    print(f"\nkeyword scan of {len(text):,} chars: {whole[0]:.1f} MB in one go ({whole[1]:.2f}s), "
+          f"{chunked[0]:.1f} MB in chunks ({chunked[1]:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
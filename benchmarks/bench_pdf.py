@@ -0,0 +1,59 @@
+# Times PDF text extraction on generated multi-page PDFs.
+#
+#   python benchmarks/bench_pdf.py --pages 10 50 200
+#
+# "old" is the original loop (`text += page.extract_text()` over every page),
+# "stream" is backend/pdf.py with the page/char caps, "parallel" adds the process pool.
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pypdf import PdfReader
+
+from backend.pdf import extract_pdf_text
+from benchmarks.pdfgen import make_pdf
+from benchmarks.bench_keywords import make_text
+
+
+def old_extract(data):
+    pdf = PdfReader(io.BytesIO(data))
+    text = ""
+    for page in pdf.pages:
+        content = page.extract_text()
+        if content:
+            text += content
+    return text
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, len(result or "")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--no-limits", action="store_true", help="turn off the page/char caps")
+    args = parser.parse_args()
+
+    limits = {}
+    if args.no_limits:
+        limits = {"max_pages": 10**6, "max_chars": 10**12, "max_bytes": 10**12}
+
+    print(f"{'pages':>6} {'KB':>8} {'old ms':>10} {'stream ms':>10} {'parallel ms':>12} {'chars old/new':>16}")
+    for count in args.pages:
+        data = make_pdf([make_text(3000, seed=i) for i in range(count)])
+        old_ms, old_chars = timed(lambda: old_extract(data))
+        stream_ms, new_chars = timed(lambda: extract_pdf_text(data, **limits))
+        par_ms, _ = timed(lambda: extract_pdf_text(data, parallel=True, **limits))
+        print(f"{count:>6} {len(data) // 1024:>8} {old_ms:>10.0f} {stream_ms:>10.0f} {par_ms:>12.0f} {old_chars:>8}/{new_chars}")
+
+
+if __name__ == "__main__":
+    main()
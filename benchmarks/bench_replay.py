@@ -0,0 +1,260 @@
+# Replays a recording of scans (backend/replay.py) under different settings
+# and puts verdict agreement, latency and Gemini cost side by side, so a
+# faster mode can be judged before it's turned on.
+#
+#   REPLAY_RECORD=scans.jsonl.gz streamlit run streamlit/app.py        # record real traffic
+#   PRESCREEN_ENABLED=0 python benchmarks/bench_replay.py --record scans.jsonl.gz --count 300
+#   python benchmarks/bench_replay.py scans.jsonl.gz \
+#       --config baseline --config no-prescreen PRESCREEN_ENABLED=0 \
+#       --config eager PRESCREEN_MIN_CONFIDENCE=0.6 PRESCREEN_SCAM_POINTS=4
+#
+# A configuration is a name plus environment overrides; each one runs in its
+# own process, since settings are read at import time. The slow checks
+# answer from the recording. Gemini answers with:
+#   --llm recorded  the reply recorded for that scan (default). Only says
+#                   something about changes to *whether* Gemini is asked.
+#                   Scans the prescreen decided at recording time have no
+#                   reply, so record with PRESCREEN_ENABLED=0 to judge the prescreen.
+#   --llm fake      benchmarks/fake_gemini.py, which reads the prompt, for
+#                   prompt budget changes (PROMPT_TEXT_TOKENS=...)
+#   --llm live      the real API (GOOGLE_API_KEY), for GEMINI_MODEL=...
+# Agreement is measured against the recorded verdict, the corpus label where
+# there is one (synthetic recordings), and the first configuration.
+# Without a recording, a synthetic one is made first (like --record).
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CACHE_BACKEND", "memory")
+
+from backend import metrics
+from backend.cache import clear_all_caches
+from backend.engine import Engine, ScanInput
+from backend.prompt import VERDICTS
+from backend.replay import ReplayRecorder, RecordedChecks, RecordedGateway, load_recording
+from benchmarks.bench_analyze import percentile, to_scan_input
+from benchmarks.corpus import make_corpus, load_corpus
+
+DEFAULT_CONFIGS = [
+    ["baseline"],
+    ["no-prescreen", "PRESCREEN_ENABLED=0"],
+    ["eager-prescreen", "PRESCREEN_MIN_CONFIDENCE=0.6", "PRESCREEN_SCAM_POINTS=4", "PRESCREEN_SAFE_POINTS=-2"],
+]
+
+
+def verdict_word(verdict):
+    return next((v for v in VERDICTS if v in (verdict or "")), None)
+
+
+def record_synthetic(args):
+    # Scans a synthetic corpus against the fake backends and records every scan, with its label
+    from benchmarks.fake_backends import FakeBackends
+
+    items = load_corpus(args.corpus) if args.corpus else make_corpus(args.count, seed=args.seed)
+    backends = FakeBackends(whois_latency=0.01, search_latency=0.02, gemini_latency=0.05, gemini_jitter=0.05)
+    recorder = ReplayRecorder(args.record)
+    engine = Engine()
+
+    def scan(item):
+        scan_input = to_scan_input(item)
+        recorder.record(scan_input, engine.analyze(scan_input, backends.gateway), label=item.get("label"))
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(scan, items))
+    recorder.close()
+    backends.close()
+    print(f"Recorded {recorder.written} scans to {args.record} ({os.path.getsize(args.record) / 1024:.0f} KB)",
+          file=sys.stderr)
+
+
+def run_config(args):
+    # Child process: replays the recording once under the current environment, prints one JSON line
+    records = load_recording(args.recording)
+    checks = RecordedChecks(records)
+    engine = checks.install(Engine())
+    backends = None
+    if args.llm == "fake":
+        from benchmarks.fake_backends import FakeBackends
+        backends = FakeBackends(gemini_latency=args.fake_latency, llm_concurrency=args.concurrency)
+    elif args.llm == "live":
+        from backend.llm import get_gateway
+        live = get_gateway(os.environ["GOOGLE_API_KEY"])
+
+    def gateway_for(record):
+        if args.llm == "recorded":
+            return RecordedGateway(record, args.llm_delay)
+        return backends.gateway if backends else live
+
+    def scan(record):
+        started = time.perf_counter()
+        try:
+            report = engine.analyze(ScanInput(**record["input"]), gateway_for(record))
+        except Exception as e:
+            return record["id"], None, type(e).__name__, time.perf_counter() - started
+        return record["id"], report, None, time.perf_counter() - started
+
+    clear_all_caches()
+    metrics.registry.reset()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(scan, records))
+    wall = time.perf_counter() - started
+
+    verdicts, decided_by, errors = {}, Counter(), Counter()
+    tokens = Counter()
+    for scan_id, report, error, _ in results:
+        if error:
+            errors[error] += 1
+            verdicts[scan_id] = None
+            continue
+        verdicts[scan_id] = verdict_word(report.verdict)
+        decided_by[report.decided_by or "undecided"] += 1
+        for kind in ("prompt_tokens", "output_tokens", "cached_tokens"):
+            tokens[kind] += (report.usage or {}).get(kind, 0)
+    latencies = [elapsed * 1000 for _, _, _, elapsed in results]
+    if backends:
+        backends.close()
+    print(json.dumps({
+        "verdicts": verdicts,
+        "decided_by": dict(decided_by),
+        "errors": dict(errors),
+        "tokens": dict(tokens),
+        "check_misses": checks.misses,
+        "seconds": round(wall, 3),
+        "p50_ms": round(percentile(latencies, 50), 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 1) if latencies else None,
+        "stages": metrics.stage_summary(),
+    }))
+
+
+def agreement(verdicts, expected):
+    # Share of scans both sides decided on where they gave the same verdict
+    pairs = [(verdicts.get(k), v) for k, v in expected.items() if v and verdicts.get(k)]
+    return sum(a == b for a, b in pairs) / len(pairs) if pairs else None
+
+
+def percent(value):
+    return "-" if value is None else f"{value:.0%}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("recording", nargs="?", help="JSONL(.gz) written with REPLAY_RECORD (default: make one)")
+    parser.add_argument("--config", nargs="+", action="append", metavar="NAME [VAR=VALUE ...]",
+                        help="a configuration to replay under; repeat for more (default: a prescreen comparison)")
+    parser.add_argument("--llm", choices=["recorded", "fake", "live"], default="recorded")
+    parser.add_argument("--llm-delay", type=float, default=0.0,
+                        help="with --llm recorded, sleep this times the recorded Gemini latency")
+    parser.add_argument("--fake-latency", type=float, default=0.2, help="with --llm fake, seconds per Gemini call")
+    parser.add_argument("--concurrency", type=int, default=4)
+    # Gemini 2.5 Flash list prices, USD per million tokens; check the current ones
+    parser.add_argument("--price-in", type=float, default=0.30)
+    parser.add_argument("--price-out", type=float, default=2.50)
+    parser.add_argument("--changes", type=int, default=0, help="list this many scans whose verdict moved")
+    parser.add_argument("--stages", action="store_true", help="print per-stage timings too")
+    parser.add_argument("--json", help="write the results here as well")
+    parser.add_argument("--record", metavar="PATH", help="record a synthetic corpus to PATH instead of replaying")
+    parser.add_argument("--corpus", help="with --record: JSONL from benchmarks/corpus.py (default: generate one)")
+    parser.add_argument("--count", type=int, default=100, help="with --record: offers to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--run-config", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.record:
+        record_synthetic(args)
+        return
+    if args.run_config:
+        run_config(args)
+        return
+
+    env = dict(os.environ, CACHE_BACKEND="memory")
+    env.pop("REPLAY_RECORD", None)      # don't record the replay into a recording
+    script = os.path.abspath(__file__)
+    workdir = None
+    if not args.recording:
+        workdir = tempfile.TemporaryDirectory(prefix="replay-")
+        args.recording = os.path.join(workdir.name, "synthetic.jsonl.gz")
+        # Prescreen off while recording, so every scan has a Gemini reply to replay
+        subprocess.run([sys.executable, script, "--record", args.recording, "--count", str(args.count),
+                        "--seed", str(args.seed)], env=dict(env, PRESCREEN_ENABLED="0"), check=True)
+
+    records = load_recording(args.recording)
+    recorded = {r["id"]: verdict_word(r.get("verdict")) for r in records}
+    labels = {r["id"]: r.get("label") for r in records}
+    print(f"{len(records)} recorded scans, {sum(1 for r in records if r.get('llm'))} with a Gemini reply; "
+          f"Gemini answers: {args.llm}\n")
+
+    configs = args.config or DEFAULT_CONFIGS
+    runs = []
+    for name, *overrides in configs:
+        child_env = dict(env, **dict(o.split("=", 1) for o in overrides))
+        command = [sys.executable, script, args.recording, "--run-config", "--llm", args.llm,
+                   "--llm-delay", str(args.llm_delay), "--fake-latency", str(args.fake_latency),
+                   "--concurrency", str(args.concurrency)]
+        child = subprocess.run(command, env=child_env, stdout=subprocess.PIPE, text=True)
+        if child.returncode != 0:
+            print(f"{name}: replay failed (exit {child.returncode})")
+            continue
+        run = json.loads(child.stdout.strip().splitlines()[-1])
+        run.update(name=name, overrides=overrides)
+        runs.append(run)
+    if not runs:
+        sys.exit(1)
+
+    first = runs[0]["verdicts"]
+    print(f"{'config':<18} {'vs rec':>6} {'label':>6} {'vs 1st':>6} {'undec':>6} {'llm':>5} "
+          f"{'tok/scan':>9} {'$/1k':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for run in runs:
+        verdicts = run["verdicts"]
+        scans = len(verdicts) or 1
+        tokens = run["tokens"]
+        cost = (tokens.get("prompt_tokens", 0) * args.price_in + tokens.get("output_tokens", 0) * args.price_out) / 1e6
+        run.update(
+            agree_recorded=agreement(verdicts, recorded),
+            agree_label=agreement(verdicts, labels),
+            agree_first=agreement(verdicts, first),
+            llm_calls=run["decided_by"].get("llm", 0),
+            tokens_per_scan=round((tokens.get("prompt_tokens", 0) + tokens.get("output_tokens", 0)) / scans, 1),
+            cost_per_1k=round(cost / scans * 1000, 4),
+        )
+        undecided = sum(v is None for v in verdicts.values())
+        print(f"{run['name']:<18} {percent(run['agree_recorded']):>6} {percent(run['agree_label']):>6} "
+              f"{percent(run['agree_first']):>6} {undecided:>6} {run['llm_calls']:>5} {run['tokens_per_scan']:>9} "
+              f"{run['cost_per_1k']:>7.3f} {run['p50_ms']:>8} {run['p95_ms']:>8}")
+
+    print()
+    for run in runs:
+        decided = ", ".join(f"{k} {v}" for k, v in sorted(run["decided_by"].items()))
+        extra = f"; errors {run['errors']}" if run["errors"] else ""
+        extra += f"; {run['check_misses']} checks not in the recording" if run["check_misses"] else ""
+        settings = " ".join(run["overrides"]) or "defaults"
+        print(f"{run['name']:<18} {settings}: decided by {decided}{extra}")
+        if args.stages:
+            for stage, timing in sorted(run["stages"].items()):
+                print(f"{'':>18} {stage:<14} n={timing['count']:<5} avg {timing['avg_ms']} ms, "
+                      f"p95 {timing['p95_ms']} ms")
+
+    if args.changes:
+        for run in runs[1:]:
+            moved = [(k, first.get(k), v) for k, v in run["verdicts"].items() if v != first.get(k)]
+            print(f"\n{run['name']}: {len(moved)} verdict(s) differ from {runs[0]['name']}")
+            for scan_id, before, after in moved[:args.changes]:
+                print(f"  {scan_id}  {before} -> {after}  (recorded {recorded.get(scan_id)}, label {labels.get(scan_id)})")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"recording": args.recording, "llm": args.llm, "configs": runs}, f, indent=2)
+    if workdir:
+        workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# Several "replicas" (processes) looking up the same domains, with the cache
+# kept per process, in a shared sqlite file, or in Redis (the fake server
+# from benchmarks/fake_redis.py unless --redis-url is given).
+#
+#   python benchmarks/bench_shared_cache.py --workers 4 --domains 200 --lookup-ms 20
+#
+# "slow lookups" is how many times the (fake) WHOIS call really ran. With a
+# shared store it should be about --domains, however many workers there are.
+# The second table checks a shared rate limit holds across all the workers.
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.cache import TTLCache, MISS, SQLiteStore, RedisStore
+from backend.ratelimit import ServiceLimiter, TokenBucket, SharedTokenBucket, RedisRateBucket
+from backend.resp import RespClient
+from benchmarks.fake_redis import start_fake_redis
+
+
+def make_store(kind, location):
+    if kind == "sqlite":
+        return SQLiteStore(location)
+    if kind == "redis":
+        return RedisStore(RespClient(location), prefix=f"bench:{os.getppid()}:")
+    return None
+
+
+def cache_worker(kind, location, domains, lookup_ms, results):
+    cache = TTLCache("bench_domain_age", ttl=600, store=make_store(kind, location))
+    slow = 0
+    for domain in domains:
+        if cache.get(domain) is MISS:
+            time.sleep(lookup_ms / 1000)     # the WHOIS call we're trying to avoid
+            slow += 1
+            cache.set(domain, ["2020-01-01", 1000])
+    results.put(slow)
+
+
+def make_bucket(kind, location, rate, burst):
+    if kind == "sqlite":
+        return SharedTokenBucket(f"bench-{os.getppid()}", rate, burst, path=location)
+    if kind == "redis":
+        return RedisRateBucket(f"bench-{os.getppid()}", rate, burst, client=RespClient(location))
+    return TokenBucket(rate, burst)
+
+
+def limit_worker(kind, location, calls, rate, results):
+    limiter = ServiceLimiter("bench", rate, bucket=make_bucket(kind, location, rate, 1))
+    for _ in range(calls):
+        with limiter.limit():
+            pass
+    results.put(time.time())
+
+
+def rotate(items, start):
+    return items[start:] + items[:start]
+
+
+def run_workers(target, args_for, workers):
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=target, args=args_for(i) + (results,)) for i in range(workers)]
+    for proc in procs:
+        proc.start()
+    values = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--domains", type=int, default=200)
+    parser.add_argument("--lookup-ms", type=float, default=20)
+    parser.add_argument("--rate", type=float, default=10, help="shared limit for the rate test (calls/s)")
+    parser.add_argument("--calls", type=int, default=10, help="calls per worker in the rate test")
+    parser.add_argument("--redis-url", help="use a real Redis instead of the fake one")
+    args = parser.parse_args()
+
+    fake = None if args.redis_url else start_fake_redis()
+    redis_url = args.redis_url or fake.url
+    folder = tempfile.mkdtemp(prefix="bench_shared_")
+    locations = {
+        "memory": None,
+        "sqlite": os.path.join(folder, "cache.sqlite3"),
+        "redis": redis_url,
+    }
+    domains = [f"company{i}.com" for i in range(args.domains)]
+
+    print(f"{args.workers} workers, {args.domains} domains, {args.lookup_ms:g} ms per slow lookup\n")
+    print(f"{'store':<8} {'slow lookups':>13} {'seconds':>9}")
+    for kind, location in locations.items():
+        started = time.perf_counter()
+        # Each worker walks the list from a different point, like replicas getting different traffic
+        slow = run_workers(cache_worker, lambda i: (
+            kind, location, rotate(domains, i * len(domains) // args.workers), args.lookup_ms,
+        ), args.workers)
+        print(f"{kind:<8} {sum(slow):>13} {time.perf_counter() - started:>9.2f}")
+
+    total = args.workers * args.calls
+    print(f"\nrate test: {total} calls, limit {args.rate:g}/s for everyone "
+          f"(ideal {(total - 1) / args.rate:.1f}s)")
+    print(f"{'bucket':<8} {'seconds':>9} {'calls/s':>9}")
+    for kind, location in locations.items():
+        if kind == "sqlite":
+            location = os.path.join(folder, "ratelimit.sqlite3")
+        started = time.time()
+        finished = run_workers(limit_worker, lambda i: (kind, location, args.calls, args.rate), args.workers)
+        elapsed = max(finished) - started
+        print(f"{kind:<8} {elapsed:>9.2f} {total / elapsed:>9.1f}")
+
+    if fake is not None:
+        fake.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Domain-age lookups: our resolver (backend/whois_client.py) vs python-whois,
+# both talking to the local fake WHOIS server so the network isn't the variable.
+#
+#   python benchmarks/bench_whois.py --domains 200 --latency 0.02
+#
+# python-whois always connects to port 43 on the real registry host, so for
+# the comparison its socket is pointed at the fake server instead. It also
+# follows the "Registrar WHOIS Server" referral (a second query) like it does
+# for real .com lookups; we don't, the registry's creation date is enough.
+
+import argparse
+import os
+import socket
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.whois_client import DomainAgeResolver, parse_creation_date
+from benchmarks.fake_whois import start_fake_whois, fake_creation_date, fake_record
+
+
+def make_domains(count):
+    return [f"{prefix}company{i}.com" for i in range(count) for prefix in ("", "new")][:count]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(name, lookup, domains):
+    times = []
+    correct = 0
+    for domain in domains:
+        start = time.perf_counter()
+        try:
+            created = lookup(domain)
+        except Exception:
+            created = None
+        times.append((time.perf_counter() - start) * 1000)
+        correct += created == fake_creation_date(domain)
+    print(f"{name:<14} {statistics.mean(times):>9.2f} {percentile(times, 50):>9.2f} "
+          f"{percentile(times, 95):>9.2f} {correct:>6}/{len(domains)}")
+
+
+def python_whois_lookup(fake_address):
+    import whois
+    from whois.whois import NICClient
+
+    host, port = fake_address.split(":")
+
+    class RedirectedSocket(socket.socket):
+        def connect(self, address):
+            super().connect((host, int(port)))
+
+    NICClient.get_socket = lambda self: RedirectedSocket(socket.AF_INET, socket.SOCK_STREAM)
+    # Skip its whois.iana.org lookup, that would need the real network
+    NICClient.choose_server = lambda self, domain: "whois.verisign-grs.com"
+
+    def lookup(domain):
+        created = whois.whois(domain, quiet=True).creation_date
+        if isinstance(created, list):
+            created = created[0]
+        return created.date() if created else None
+    return lookup
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--domains", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake server latency per answer (s)")
+    args = parser.parse_args()
+
+    server = start_fake_whois(latency=args.latency)
+    domains = make_domains(args.domains)
+    resolver = DomainAgeResolver(timeout=5, whois_servers={"com": server.address}, rdap_servers={})
+
+    sample = fake_record("example.com")
+    start = time.perf_counter()
+    for _ in range(10000):
+        parse_creation_date(sample)
+    print(f"parse only: {(time.perf_counter() - start) * 100:.1f} µs per response\n")
+
+    print(f"{'client':<14} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'correct':>13}")
+    run("native", resolver.lookup, domains)
+    try:
+        run("python-whois", python_whois_lookup(server.address), domains)
+    except ImportError:
+        print("python-whois    not installed, skipped")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
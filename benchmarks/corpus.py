@@ -0,0 +1,134 @@
+# Synthetic internship offers, scam and legit, for benchmarks and load tests.
+#
+#   python benchmarks/corpus.py --count 500 --scam-ratio 0.4 -o corpus.jsonl
+#   python benchmarks/corpus.py --count 50 --pdf-every 5 -o corpus/offers.jsonl
+#
+# Each line is a batch item ({"id", "text", "url", "company", "email"} plus a
+# "label" the scanner never sees), so the file also works with
+# `python -m backend.batch corpus.jsonl`. Same seed, same corpus.
+#
+# Scam domains start with "new", which benchmarks/fake_whois.py reports as
+# registered last week; everything else comes back years old.
+
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.pdfgen import make_pdf
+
+ROLES = ["Data Analyst Intern", "Software Engineering Intern", "Marketing Intern", "Research Assistant",
+         "Junior Accountant", "UX Design Intern", "Operations Intern", "Business Analyst Intern"]
+LEGIT_COMPANIES = ["Northwind Analytics", "Bluepeak Systems", "Harbor Lane Health", "Cobalt Ridge Energy",
+                   "Lumen Works", "Tidewater Logistics", "Greenfield Labs", "Summit Row Partners"]
+SCAM_COMPANIES = ["Global Tech Futures", "Prime Staffing Solutions", "Elite Remote Careers",
+                  "WorldWide Data Services", "Apex Hiring Group", "Star Digital Agency"]
+FREE_MAIL = ["gmail.com", "outlook.com", "yahoo.com", "hotmail.com"]
+SCAM_TLDS = ["xyz", "top", "online", "site", "com"]
+
+LEGIT_PARAGRAPHS = [
+    "Thank you for interviewing with our team last week. We are pleased to offer you the {role} position "
+    "starting in June, reporting to {manager}.",
+    "The internship runs for twelve weeks. The stipend is ${pay} per hour, paid biweekly through payroll.",
+    "Please review the attached offer letter and the employee handbook. If you accept, our HR team will "
+    "schedule your onboarding session and send the background check consent form.",
+    "You will work on real projects with the {team} team and present your results at the end of the summer.",
+    "Equipment is provided by the company and shipped to your address before your first day.",
+    "If you have questions about benefits or relocation, reply to this email or call our recruiting office.",
+]
+SCAM_PARAGRAPHS = [
+    "Congratulations! After reviewing your resume we have selected you for the {role} position. "
+    "No interview is required.",
+    "You will earn ${pay} per hour working from home. Kindly respond immediately as positions are limited.",
+    "We will send you a cashier's check to purchase equipment from our certified vendor. "
+    "Deposit the check and wire transfer the balance to the vendor today.",
+    "A refundable training fee of ${fee} is required to secure your spot. Payment via gift card or crypto.",
+    "Interviews are conducted via Telegram text chat. Contact our hiring manager {manager} on Telegram.",
+    "Please send your bank account details and a copy of your ID to verify your identity for direct deposit.",
+    "This offer expires in 24 hours. Act now, urgent response required.",
+]
+FILLER = ("Our company values teamwork, integrity and continuous learning. We are committed to diversity and "
+          "to building a workplace where every intern can grow. ")
+MANAGERS = ["Dana Lee", "Sam Patel", "Chris Morgan", "Alex Kim", "Jordan Reyes"]
+TEAMS = ["analytics", "platform", "growth", "finance", "research"]
+
+
+def slug(name):
+    return "".join(ch for ch in name.lower() if ch.isalnum())
+
+
+def make_offer(rng, index, scam, pad_words=0):
+    role = rng.choice(ROLES)
+    fill = {"role": role, "manager": rng.choice(MANAGERS), "team": rng.choice(TEAMS),
+            "pay": rng.choice([18, 22, 25, 35, 45, 55]), "fee": rng.choice([49, 100, 150, 299])}
+    if scam:
+        company = rng.choice(SCAM_COMPANIES)
+        paragraphs = rng.sample(SCAM_PARAGRAPHS, rng.randint(3, 5))
+        domain = f"new{slug(company)}{index}.{rng.choice(SCAM_TLDS)}"
+        email = f"{slug(company)}.hr{index}@{rng.choice(FREE_MAIL)}"
+    else:
+        company = rng.choice(LEGIT_COMPANIES)
+        paragraphs = rng.sample(LEGIT_PARAGRAPHS, rng.randint(3, 5))
+        domain = f"{slug(company)}{index}.com"
+        email = f"recruiting@{domain}"
+    body = "\n\n".join(p.format(**fill) for p in paragraphs)
+    if pad_words:
+        words = FILLER.split()
+        body += "\n\n" + " ".join(words[i % len(words)] for i in range(pad_words))
+    text = f"Subject: {role} offer - {company}\n\nDear Candidate,\n\n{body}\n\nSincerely,\n{fill['manager']}\n{company}"
+    return {
+        "id": f"{'scam' if scam else 'legit'}-{index:05d}",
+        "text": text,
+        "url": f"https://careers.{domain}/apply",
+        "company": company,
+        "email": email,
+        "label": "SCAM" if scam else "SAFE",
+    }
+
+
+def make_corpus(count, scam_ratio=0.4, seed=0, pad_words=0):
+    rng = random.Random(seed)
+    return [make_offer(rng, i, rng.random() < scam_ratio, pad_words) for i in range(count)]
+
+
+def write_corpus(items, path, pdf_every=0):
+    # JSONL at `path`; with pdf_every, every n-th item's text goes into a PDF next to it instead
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for i, item in enumerate(items):
+            if pdf_every and i % pdf_every == 0:
+                item = dict(item)
+                name = f"{item['id']}.pdf"
+                with open(os.path.join(folder, name), "wb") as pdf:
+                    pdf.write(make_pdf([item.pop("text")]))
+                item["file"] = name
+            f.write(json.dumps(item) + "\n")
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic internship offers")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--scam-ratio", type=float, default=0.4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pad-words", type=int, default=0, help="add this many filler words to every offer")
+    parser.add_argument("--pdf-every", type=int, default=0, help="put every n-th offer in a PDF file")
+    parser.add_argument("-o", "--output", default="corpus.jsonl")
+    args = parser.parse_args()
+
+    items = make_corpus(args.count, args.scam_ratio, args.seed, args.pad_words)
+    write_corpus(items, args.output, args.pdf_every)
+    scams = sum(item["label"] == "SCAM" for item in items)
+    print(f"Wrote {len(items)} offers ({scams} scams) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
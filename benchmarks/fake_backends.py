@@ -0,0 +1,70 @@
+# Everything the scanner talks to, faked locally with adjustable latency:
+# WHOIS (benchmarks/fake_whois.py), DNS (benchmarks/fake_dns.py), Google
+# search (StubSearchBackend) and Gemini (benchmarks/fake_gemini.py).
+#
+#   backends = FakeBackends(whois_latency=0.05, search_latency=0.3, gemini_latency=1.0)
+#   report = get_engine().analyze(item_input, backends.gateway)
+#   backends.close()
+#
+# Installing them swaps the process-wide resolvers and reputation service, so
+# the normal Engine picks them up. Set CACHE_BACKEND=memory before importing
+# backend if runs shouldn't see each other's cached results.
+
+from backend import dns_client, reputation, whois_client
+from backend.cache import TTLCache
+from backend.dns_client import DnsResolver
+from backend.llm import LLMGateway
+from backend.ratelimit import ServiceLimiter
+from backend.reputation import ReputationService, StubSearchBackend
+from backend.whois_client import DomainAgeResolver
+from benchmarks.corpus import SCAM_COMPANIES, SCAM_TLDS
+from benchmarks.fake_dns import start_fake_dns
+from benchmarks.fake_gemini import start_fake_gemini
+from benchmarks.fake_whois import start_fake_whois
+
+# Every scam company has a couple of complaints online
+SCAM_HITS = {
+    company: [
+        {"title": f"{company} scam - fake job offer", "url": "https://forum.example/t/1",
+         "description": "They sent me a check and asked for a wire transfer back."},
+        {"title": f"Is {company} legit?", "url": "https://reviews.example/2",
+         "description": "Fraud complaints from several students."},
+    ]
+    for company in SCAM_COMPANIES
+}
+
+
+class FakeBackends:
+    def __init__(self, whois_latency=0.05, search_latency=0.3, gemini_latency=1.0, gemini_jitter=0.0,
+                 gemini_error_rate=0.0, chunk_delay=0.0, llm_concurrency=8, dns_latency=0.01):
+        self.whois = start_fake_whois(latency=whois_latency)
+        self.dns = start_fake_dns(latency=dns_latency)
+        self.gemini = start_fake_gemini(latency=gemini_latency, jitter=gemini_jitter,
+                                        error_rate=gemini_error_rate, chunk_delay=chunk_delay)
+        self.search = StubSearchBackend(SCAM_HITS, latency=search_latency)
+
+        tlds = set(SCAM_TLDS) | {"com", "net", "org", "io"}
+        whois_client._resolver = DomainAgeResolver(
+            timeout=5, whois_servers={tld: self.whois.address for tld in tlds}, rdap_servers={},
+        )
+        dns_client._resolver = DnsResolver(servers=[self.dns.address], timeout=2)
+        # Memory-only cache and no real rate limit: we're measuring our code, not Google's patience
+        reputation._service = ReputationService(
+            backend=self.search,
+            cache=TTLCache("reputation", ttl=3600, store=None),
+            limiter=ServiceLimiter("search", rate=1000, burst=1000, concurrency=64),
+        )
+        self.gateway = LLMGateway(api_key="fake", base_url=self.gemini.url,
+                                  max_concurrency=llm_concurrency, tokens_per_minute=10**9, max_retries=2)
+
+    def stats(self):
+        return {"whois_queries": self.whois.queries, "dns_queries": self.dns.queries, "searches": self.search.calls,
+                "gemini_requests": self.gemini.requests, "gemini_failures": self.gemini.failures}
+
+    def close(self):
+        self.whois.shutdown()
+        self.dns.shutdown()
+        self.gemini.shutdown()
+        whois_client._resolver = None
+        dns_client._resolver = None
+        reputation._service = None
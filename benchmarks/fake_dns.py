@@ -0,0 +1,131 @@
+# A DNS server that answers MX and TXT queries from memory, for benchmarks and
+# offline runs of the recruiter email checks (backend/email_check.py).
+#
+#   python benchmarks/fake_dns.py --port 5353 --latency 0.02
+#   DNS_SERVERS=127.0.0.1:5353 streamlit run streamlit/app.py
+#
+# Same naming trick as fake_whois.py: domains starting with "new" exist but
+# have no MX/SPF/DMARC (a scammer's fresh look-alike domain), domains starting
+# with "nomatch" don't exist, everything else looks like a real employer.
+# --truncate sets the TC bit on UDP answers, to exercise the TCP fallback.
+
+import argparse
+import random
+import socketserver
+import struct
+import threading
+import time
+
+TYPE_MX = 15
+TYPE_TXT = 16
+
+
+def fake_records(name, qtype):
+    # (rcode, [rdata]) for a query
+    name = name.lower().rstrip(".")
+    domain = name[len("_dmarc."):] if name.startswith("_dmarc.") else name
+    if domain.startswith("nomatch"):
+        return 3, []
+    if domain.startswith("new"):
+        return 0, []
+    if qtype == TYPE_MX:
+        return 0, [struct.pack("!H", 10) + encode_name(f"mx1.{domain}"),
+                   struct.pack("!H", 20) + encode_name(f"mx2.{domain}")]
+    if qtype == TYPE_TXT:
+        text = "v=DMARC1; p=reject; rua=mailto:dmarc@" + domain if name != domain else "v=spf1 mx -all"
+        return 0, [bytes([len(text)]) + text.encode("ascii")]
+    return 0, []
+
+
+def encode_name(name):
+    return b"".join(bytes([len(label)]) + label.encode("ascii") for label in name.split(".")) + b"\0"
+
+
+def read_question(data):
+    # (name, qtype, end of the question section)
+    labels, offset = [], 12
+    while data[offset]:
+        labels.append(data[offset + 1:offset + 1 + data[offset]].decode("ascii", "replace"))
+        offset += 1 + data[offset]
+    qtype = struct.unpack_from("!H", data, offset + 1)[0]
+    return ".".join(labels), qtype, offset + 5
+
+
+def fake_answer(query, truncate=False):
+    query_id = struct.unpack_from("!H", query)[0]
+    name, qtype, end = read_question(query)
+    rcode, records = fake_records(name, qtype)
+    flags = 0x8180 | rcode | (0x0200 if truncate else 0)
+    answer = struct.pack("!HHHHHH", query_id, flags, 1, len(records), 0, 0) + query[12:end]
+    for rdata in records:
+        # 0xC00C points back at the name in the question
+        answer += struct.pack("!HHHIH", 0xC00C, qtype, 1, 300, len(rdata)) + rdata
+    return answer
+
+
+class FakeDnsServer(socketserver.ThreadingUDPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, truncate=False):
+        super().__init__(address, FakeDnsHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.truncate = truncate
+        self.queries = 0
+        self._lock = threading.Lock()
+        # TCP side on the same port, for answers that were "truncated"
+        self.tcp = socketserver.ThreadingTCPServer(self.server_address, FakeDnsTcpHandler)
+        self.tcp.daemon_threads = True
+        threading.Thread(target=self.tcp.serve_forever, daemon=True).start()
+
+    @property
+    def address(self):
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+    def shutdown(self):
+        self.tcp.shutdown()
+        self.tcp.server_close()
+        super().shutdown()
+        self.server_close()
+
+
+class FakeDnsHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data, sock = self.request
+        with self.server._lock:
+            self.server.queries += 1
+        time.sleep(self.server.latency + random.uniform(0, self.server.jitter))
+        sock.sendto(fake_answer(data, self.server.truncate), self.client_address)
+
+
+class FakeDnsTcpHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        size = struct.unpack("!H", self.rfile.read(2))[0]
+        answer = fake_answer(self.rfile.read(size))
+        self.wfile.write(struct.pack("!H", len(answer)) + answer)
+
+
+def start_fake_dns(port=0, **options):
+    # Starts the server on a background thread and returns it (server.address is "host:port")
+    server = FakeDnsServer(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake DNS server (MX/TXT only)")
+    parser.add_argument("--port", type=int, default=5353)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--truncate", action="store_true", help="set TC on UDP answers (forces TCP)")
+    args = parser.parse_args()
+
+    server = FakeDnsServer(("127.0.0.1", args.port), args.latency, args.jitter, args.truncate)
+    print(f"Fake DNS listening on {server.address}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# A tiny stand-in for the Gemini REST API, so the LLM path can be exercised
+# offline. Point the app or batch runner at it with:
+#
+#   python benchmarks/fake_gemini.py --port 8765 --latency 0.5 --error-rate 0.1 &
+#   GEMINI_BASE_URL=http://127.0.0.1:8765 GOOGLE_API_KEY=fake python -m backend.batch offers/ --llm
+#
+# It answers generateContent with a canned report. The verdict is picked from
+# the prompt (scammy words -> SCAM), and a slice of requests can be failed
+# with 429s to exercise retries. If the request asks for application/json,
+# the report comes back as JSON in the shape of backend.prompt.VERDICT_SCHEMA.
+# streamGenerateContent (?alt=sse) sends the
+# same report a line at a time, --chunk-delay seconds apart, so the streaming
+# UI can be watched filling in.
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCAMMY = ("wire transfer", "kindly", "cashier's check", "training fee", "telegram", "very new")
+
+
+def fake_verdict(prompt):
+    # Only look at the evidence part, older prompts had the instructions (with scammy words) inline
+    lowered = prompt.lower()
+    if "--- instructions ---" in lowered:
+        lowered = lowered.split("--- instructions ---")[0]
+    hits = sum(word in lowered for word in SCAMMY)
+    return ("SCAM" if hits >= 2 else "CAUTION" if hits == 1 else "SAFE"), hits
+
+
+def fake_json_report(prompt):
+    verdict, hits = fake_verdict(prompt)
+    return json.dumps({
+        "verdict": verdict,
+        "confidence": "Medium",
+        "summary": f"Fake analysis ({hits} red flag phrase(s) seen in the prompt).",
+        "red_flags": ["Generated by the local fake server"],
+        "recommendation": "This is not a real verdict.",
+    })
+
+
+def fake_report(prompt):
+    verdict, hits = fake_verdict(prompt)
+    return (
+        f"VERDICT: {verdict}\n\n"
+        "## 🛡️ Analysis Report\n"
+        "**Confidence:** Medium\n\n"
+        "### 📝 Summary\n"
+        f"Fake analysis ({hits} red flag phrase(s) seen in the prompt).\n\n"
+        "### 🚩 Red Flags (If any):\n"
+        "* Generated by the local fake server\n\n"
+        "### 🎓 Recommendation:\n"
+        "This is not a real verdict.\n"
+    )
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0, chunk_delay=0.0):
+        super().__init__(address, FakeGeminiHandler)
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.failures = 0
+        self.streams_cut = 0    # streams the client hung up on halfway
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        with server._lock:
+            server.requests += 1
+            fail = random.random() < server.error_rate
+            server.failures += fail
+
+        time.sleep(server.latency + random.uniform(0, server.jitter))
+        if fail:
+            self._send_json(429, {"error": {"code": 429, "message": "Resource exhausted (fake)", "status": "RESOURCE_EXHAUSTED"}})
+            return
+        streaming = ":streamGenerateContent" in self.path
+        if ":generateContent" not in self.path and not streaming:
+            self._send_json(404, {"error": {"code": 404, "message": f"Unknown path {self.path}", "status": "NOT_FOUND"}})
+            return
+
+        prompt = "".join(
+            part.get("text", "")
+            for content in request.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        generation = request.get("generationConfig", {})
+        wants_json = generation.get("responseMimeType") == "application/json"
+        text = fake_json_report(prompt) if wants_json else fake_report(prompt)
+        system = "".join(part.get("text", "") for part in request.get("systemInstruction", {}).get("parts", []))
+        prompt_tokens = len(system + prompt) // 4 + 1
+        output_tokens = len(text) // 4 + 1
+        usage = {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens,
+        }
+        if streaming:
+            pieces = [text[i:i + 40] for i in range(0, len(text), 40)] if wants_json else text.splitlines(keepends=True)
+            self._send_stream(pieces, usage)
+            return
+        self._send_json(200, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+            "usageMetadata": usage,
+        })
+
+    def _send_stream(self, pieces, usage):
+        # Server-sent events, one "data: {...}" per piece; usage comes with the last one
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for i, piece in enumerate(pieces):
+                if i:
+                    time.sleep(self.server.chunk_delay)
+                chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}]}
+                if i == len(pieces) - 1:
+                    chunk["candidates"][0]["finishReason"] = "STOP"
+                    chunk["usageMetadata"] = usage
+                self.wfile.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            with self.server._lock:
+                self.server.streams_cut += 1
+
+
+def start_fake_gemini(port=0, **options):
+    # Starts the server on a background thread and returns it (server.url has the address)
+    server = FakeGeminiServer(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Gemini API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.2, help="extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--chunk-delay", type=float, default=0.1, help="seconds between streamed pieces")
+    args = parser.parse_args()
+
+    server = FakeGeminiServer(("127.0.0.1", args.port), args.latency, args.jitter, args.error_rate,
+                              args.chunk_delay)
+    print(f"Fake Gemini listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# An in-memory server speaking the Redis protocol, for trying the shared
+# cache (CACHE_BACKEND=redis) without installing Redis:
+#
+#   python benchmarks/fake_redis.py --port 6390 &
+#   CACHE_BACKEND=redis REDIS_URL=redis://127.0.0.1:6390/0 streamlit run streamlit/app.py
+#
+# Only the commands the app uses: PING, AUTH, SELECT, GET, SET (EX/PX/NX),
+# DEL, INCR, PEXPIRE, PTTL, TIME, DBSIZE, FLUSHDB. Keys expire like in Redis.
+# One keyspace for all databases.
+
+import argparse
+import socketserver
+import threading
+import time
+
+
+def _bulk(value):
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _array(items):
+    return b"*%d\r\n" % len(items) + b"".join(_bulk(item) for item in items)
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, latency=0.0, password=None):
+        super().__init__(address, FakeRedisHandler)
+        self.latency = latency
+        self.password = password
+        self.data = {}          # key -> (value bytes, expires_at or None)
+        self.commands = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self.data[key]
+            return None
+        return entry
+
+    def run(self, args):
+        # Runs one command under the lock and returns the encoded reply
+        name = args[0].upper().decode()
+        with self._lock:
+            self.commands += 1
+            handler = getattr(self, "cmd_" + name.lower(), None)
+            if handler is None:
+                return b"-ERR unknown command '%s'\r\n" % name.encode()
+            return handler(*args[1:])
+
+    def cmd_ping(self):
+        return b"+PONG\r\n"
+
+    def cmd_auth(self, *args):
+        if self.password is None or args[-1].decode() == self.password:
+            return b"+OK\r\n"
+        return b"-WRONGPASS invalid password\r\n"
+
+    def cmd_select(self, db):
+        return b"+OK\r\n"
+
+    def cmd_get(self, key):
+        entry = self._live(key)
+        return _bulk(entry[0] if entry else None)
+
+    def cmd_set(self, key, value, *options):
+        expires_at = None
+        options = [o.upper() if o.isalpha() else o for o in options]
+        if b"NX" in options and self._live(key) is not None:
+            return b"$-1\r\n"
+        if b"PX" in options:
+            expires_at = time.time() + int(options[options.index(b"PX") + 1]) / 1000
+        elif b"EX" in options:
+            expires_at = time.time() + int(options[options.index(b"EX") + 1])
+        self.data[key] = (value, expires_at)
+        return b"+OK\r\n"
+
+    def cmd_del(self, *keys):
+        return b":%d\r\n" % sum(self.data.pop(key, None) is not None for key in keys)
+
+    def cmd_incr(self, key):
+        entry = self._live(key)
+        try:
+            value = int(entry[0]) + 1 if entry else 1
+        except ValueError:
+            return b"-ERR value is not an integer or out of range\r\n"
+        self.data[key] = (str(value).encode(), entry[1] if entry else None)
+        return b":%d\r\n" % value
+
+    def cmd_pexpire(self, key, ms):
+        entry = self._live(key)
+        if entry is None:
+            return b":0\r\n"
+        self.data[key] = (entry[0], time.time() + int(ms) / 1000)
+        return b":1\r\n"
+
+    def cmd_pttl(self, key):
+        entry = self._live(key)
+        if entry is None:
+            return b":-2\r\n"
+        return b":%d\r\n" % (-1 if entry[1] is None else int((entry[1] - time.time()) * 1000))
+
+    def cmd_time(self):
+        now = time.time()
+        return _array([str(int(now)).encode(), str(int(now % 1 * 1e6)).encode()])
+
+    def cmd_dbsize(self):
+        return b":%d\r\n" % len(self.data)
+
+    def cmd_flushdb(self, *args):
+        self.data.clear()
+        return b"+OK\r\n"
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()     # inline command, e.g. from telnet
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            try:
+                args = self.read_command()
+            except (OSError, ValueError):
+                return
+            if not args:
+                return
+            time.sleep(self.server.latency)
+            self.wfile.write(self.server.run(args))
+
+
+def start_fake_redis(port=0, **options):
+    # Starts the server on a background thread and returns it (server.url is a redis:// URL)
+    server = FakeRedisServer(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Redis server")
+    parser.add_argument("--port", type=int, default=6390)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every command")
+    parser.add_argument("--password", help="require AUTH with this password")
+    args = parser.parse_args()
+
+    server = FakeRedisServer(("127.0.0.1", args.port), args.latency, args.password)
+    print(f"Fake Redis listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# A port-43 WHOIS server that answers from memory, for benchmarks and offline runs.
+#
+#   python benchmarks/fake_whois.py --port 4343 --latency 0.05
+#
+# Answers look like Verisign's .com output. The creation date is made up but
+# stable per domain; domains starting with "new" were registered last week and
+# domains starting with "nomatch" don't exist.
+
+import argparse
+import hashlib
+import random
+import socketserver
+import threading
+import time
+from datetime import date, timedelta
+
+RECORD = """   Domain Name: {name}
+   Registry Domain ID: {id}_DOMAIN_COM-VRSN
+   Registrar WHOIS Server: whois.example-registrar.com
+   Registrar URL: http://www.example-registrar.com
+   Updated Date: {updated}T10:00:00Z
+   Creation Date: {created}T04:00:00Z
+   Registry Expiry Date: {expires}T04:00:00Z
+   Registrar: Example Registrar, Inc.
+   Registrar IANA ID: 9999
+   Domain Status: clientTransferProhibited https://icann.org/epp#clientTransferProhibited
+   Name Server: NS1.{name}
+   Name Server: NS2.{name}
+   DNSSEC: unsigned
+>>> Last update of whois database: {today}T12:00:00Z <<<
+
+NOTICE: This is a fake WHOIS server used for local benchmarks.
+"""
+
+NO_MATCH = 'No match for "{name}".\r\n>>> Last update of whois database: {today}T12:00:00Z <<<\r\n'
+
+
+def fake_creation_date(domain):
+    domain = domain.lower()
+    if domain.startswith("new"):
+        return date.today() - timedelta(days=7)
+    days = int(hashlib.sha256(domain.encode()).hexdigest()[:8], 16) % (25 * 365)
+    return date.today() - timedelta(days=30 + days)
+
+
+def fake_record(domain):
+    today = date.today()
+    if domain.lower().startswith("nomatch"):
+        return NO_MATCH.format(name=domain.upper(), today=today)
+    created = fake_creation_date(domain)
+    return RECORD.format(
+        name=domain.upper(), id=abs(hash(domain)) % 10**10, created=created,
+        updated=today - timedelta(days=3), expires=today + timedelta(days=200), today=today,
+    ).replace("\n", "\r\n")
+
+
+class FakeWhoisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0):
+        super().__init__(address, FakeWhoisHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    @property
+    def address(self):
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+
+class FakeWhoisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        query = self.rfile.readline().decode("utf-8", "replace").strip()
+        with self.server._lock:
+            self.server.queries += 1
+        time.sleep(self.server.latency + random.uniform(0, self.server.jitter))
+        # python-whois sometimes sends "=domain"
+        self.wfile.write(fake_record(query.lstrip("=").split()[-1]).encode("utf-8"))
+
+
+def start_fake_whois(port=0, **options):
+    # Starts the server on a background thread and returns it (server.address is "host:port")
+    server = FakeWhoisServer(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake WHOIS server")
+    parser.add_argument("--port", type=int, default=4343)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    args = parser.parse_args()
+
+    server = FakeWhoisServer(("127.0.0.1", args.port), args.latency, args.jitter)
+    print(f"Fake WHOIS listening on {server.address}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
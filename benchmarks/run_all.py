@@ -0,0 +1,55 @@
+# Runs the whole benchmark suite, one script after another, offline.
+#
+#   python benchmarks/run_all.py            # full sizes, takes a few minutes
+#   python benchmarks/run_all.py --quick    # smaller inputs, for a quick before/after
+#   python benchmarks/run_all.py --only keywords analyze
+#
+# Each benchmark is a normal script in this folder, so any of them can also be
+# run on its own with more options (see the top of each file).
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# name -> (script, full args, quick args)
+BENCHMARKS = {
+    "import": ("bench_import.py", [], ["--runs", "3"]),
+    "keywords": ("bench_keywords.py", [], ["--sizes", "10000", "100000", "--phrases", "500"]),
+    "normalize": ("bench_normalize.py", [], ["--sizes", "100000", "1000000"]),
+    "pdf": ("bench_pdf.py", [], ["--pages", "10", "50"]),
+    "whois": ("bench_whois.py", ["--latency", "0.01"], ["--domains", "50"]),
+    "shared_cache": ("bench_shared_cache.py", [], ["--domains", "50", "--calls", "5"]),
+    "memory": ("bench_memory.py", [], ["--pdf-mb", "4", "--txt-mb", "4", "--users", "2", "--scan-chars", "1000000"]),
+    "analyze": ("bench_analyze.py", ["--count", "200", "--concurrency", "1", "4", "16"],
+                ["--count", "40", "--concurrency", "1", "8", "--gemini-latency", "0.3"]),
+    "replay": ("bench_replay.py", ["--count", "200"], ["--count", "40"]),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS))
+    args = parser.parse_args()
+
+    failed = []
+    for name in args.only or BENCHMARKS:
+        script, full, quick = BENCHMARKS[name]
+        command = [sys.executable, os.path.join(HERE, script)] + (quick if args.quick else full)
+        print(f"=== {name} ===", flush=True)
+        started = time.perf_counter()
+        if subprocess.run(command).returncode != 0:
+            failed.append(name)
+        print(f"({time.perf_counter() - started:.1f}s)\n", flush=True)
+
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,34 @@
-import whois
-import re
-from datetime import datetime
+import sys
+import time
+from datetime import date
+
+from backend.domains import registrable_domain
+from backend.whois_client import get_resolver, WhoisError
+
+# Quick manual check of the domain age lookup: python debug_whois.py [url ...]
 
 def test_domain(url):
     print(f"Testing URL: {url}")
-    # Improved regex to handle URLs without http
-    if not url.startswith("http"):
-        url = "https://" + url
-        
-    domain_match = re.search(r'https?://(?:www\.)?([\w\-.]+)', url)
-    if not domain_match:
-        print("Regex failed to match domain.")
+    domain = registrable_domain(url)
+    if not domain:
+        print("Could not find a domain in that.")
         return
+    print(f"Registrable Domain: {domain}")
 
-    domain = domain_match.group(1)
-    print(f"Extracted Domain: {domain}")
-    
+    start = time.perf_counter()
     try:
-        w = whois.whois(domain)
-        print(f"Whois Result type: {type(w)}")
-        print(f"Creation Date: {w.creation_date} (Type: {type(w.creation_date)})")
-        
-        creation_date = w.creation_date
-        if isinstance(creation_date, list):
-            creation_date = creation_date[0]
-            print(f"Fixed List Date: {creation_date}")
-            
-        if creation_date:
-            age_days = (datetime.now() - creation_date).days
-            print(f"Age in days: {age_days}")
-        else:
-            print("No creation date found.")
-            
-    except Exception as e:
-        print(f"Whois Error: {e}")
-
-print("--- TEST 1 ---")
-test_domain("google.com")
-print("\n--- TEST 2 ---")
-test_domain("https://www.google.com/")
+        created = get_resolver().lookup(domain)
+    except WhoisError as e:
+        print(f"Lookup Error: {e}")
+        return
+    print(f"Creation Date: {created} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    if created:
+        print(f"Age in days: {(date.today() - created).days}")
+    else:
+        print("No creation date found.")
 
+urls = sys.argv[1:] or ["google.com", "https://www.google.com/", "https://jobs.bbc.co.uk/"]
+for i, url in enumerate(urls, start=1):
+    print(f"--- TEST {i} ---")
+    test_domain(url)
+    print()